@@ -1,9 +1,10 @@
 import streamlit as st
-import subprocess
 import os
-import sys
 from PIL import Image
 
+from game_sessions import CANCELLED, GameRegistry
+from landmark_service import serviceRunning
+
 # Set page configuration
 st.set_page_config(page_title="Fruit Game", layout="centered")
 
@@ -50,31 +51,123 @@ st.markdown(
 # Initialize session state
 if 'current_game' not in st.session_state:
     st.session_state.current_game = None
+    st.session_state.game_session = None
     st.session_state.game_over = False
     st.session_state.error_message = None
     st.session_state.game_score = 0
+    st.session_state.game_result = None
+    st.session_state.game_log = None
+    st.session_state.first_frame = None
+
+# A game lasts one to two and a half minutes; past this many seconds the page suggests it is hung
+HUNG_WARNING = 300
+
+@st.cache_resource
+def get_registry():
+    """Running and recent games, shared by every browser session of this Streamlit instance."""
+    return GameRegistry()
+
+def kiosk_cameras():
+    """Kiosks on this machine, name -> webcam index, from FRUIT_KIOSKS ("Kiosk 1=0,Kiosk 2=1")."""
+    kiosks = {}
+    for entry in os.environ.get("FRUIT_KIOSKS", "Kiosk=0").split(","):
+        name, _, camera = entry.rpartition("=")
+        kiosks[name.strip() or f"Camera {camera}"] = int(camera)
+    return kiosks
+
+def store_result(result, first_frame=None):
+    """Keep the session result the game returned (see session_result.py)."""
+    st.session_state.game_result = result
+    st.session_state.game_score = result["score"] if result else 0
+    st.session_state.first_frame = first_frame
+    st.session_state.error_message = None
 
-def run_game(game_file):
-    """Run the specified game script using the virtual environment's Python and capture score."""
-    if not os.path.isfile(game_file):
-        st.session_state.error_message = f"Error: {game_file} not found in the current directory."
-        return False
+def start_game(game_file, kiosk):
+    """Launch the game for the kiosk without waiting for it; the page follows it through the registry."""
+    # With landmark_service.py running the games read the camera and landmarks from it
     try:
-        python_exe = sys.executable
-        result = subprocess.run([python_exe, game_file], capture_output=True, text=True, check=True)
-        # Extract score from output (assuming game prints score as "Score: X" on exit)
-        output = result.stdout
-        score_line = [line for line in output.split('\n') if line.startswith('Score:')]
-        score = int(score_line[0].split(':')[1].strip()) if score_line else 0
-        st.session_state.game_score = score
-        st.session_state.error_message = None
-        return True
-    except subprocess.CalledProcessError as e:
-        st.session_state.error_message = f"Error running {game_file}: {e.stderr}"
-        return False
-    except FileNotFoundError:
-        st.session_state.error_message = f"Error: Python executable not found at {python_exe}."
+        session = get_registry().launch(game_file, kiosk, kiosk_cameras()[kiosk], service=serviceRunning())
+    except (RuntimeError, ValueError) as e:
+        st.session_state.error_message = f"Cannot start {game_file}: {e}"
         return False
+    st.session_state.current_game = game_file
+    st.session_state.game_session = session.id
+    st.session_state.game_over = False
+    st.session_state.error_message = None
+    st.session_state.game_result = None
+    st.session_state.game_log = None
+    return True
+
+def end_game(session):
+    """Move a finished, failed or cancelled game to the game over screen."""
+    if session is None:
+        store_result(None)
+        st.session_state.error_message = "The game is no longer in the launcher's list."
+    else:
+        # Time to first playable frame: measured by the host, or by the game's startup pipeline
+        startup = (session.result or {}).get("startup") or {}
+        store_result(session.result, session.firstFrameSeconds if session.via == "host"
+                     else startup.get("firstPlayableFrame"))
+        if session.error:
+            st.session_state.error_message = f"Error running {session.game}: {session.error}"
+            st.session_state.game_log = session.log.text(40)
+        elif session.state == CANCELLED:
+            st.session_state.error_message = f"{session.game} was cancelled."
+    st.session_state.game_over = True
+
+def session_caption(session):
+    """One line about a game: where it runs, its state and how long it has been going."""
+    return (f"{session.kiosk or '-'} ({session.resource}): {session.game} #{session.id} "
+            f"{session.state} for {session.elapsed():.0f} s" + (f" in the {session.via}" if session.via else ""))
+
+@st.fragment(run_every=1)
+def show_running():
+    """Status and latest output of this page's game, refreshed every second until it ends."""
+    session = get_registry().session(st.session_state.game_session)
+    if session is None or not session.active:
+        end_game(session)
+        st.rerun()
+    st.markdown(f'<div class="game-over">🎮 Playing {session.game}</div>', unsafe_allow_html=True)
+    st.caption(session_caption(session))
+    if session.elapsed() > HUNG_WARNING:
+        st.warning(f"The game has been running for {session.elapsed():.0f} s, it may be hung.")
+    st.code(session.log.text(15) or "(no output yet)", language=None)
+    if st.button("Cancel game", key="cancel_game",
+                 help="Stop the game (the game host ends it, a game process is terminated or killed)"):
+        if not get_registry().cancel(session.id):
+            st.warning("This game has already ended.")
+
+@st.fragment(run_every=2)
+def show_kiosks():
+    """Every kiosk's running game and the recent ones, refreshed every two seconds."""
+    registry = get_registry()
+    sessions = registry.list()
+    if not sessions:
+        st.caption("No games yet.")
+    for session in sessions:
+        c1, c2 = st.columns([4, 1])
+        c1.caption(session_caption(session))
+        if session.active and c2.button("Cancel", key=f"cancel_{session.id}"):
+            registry.cancel(session.id)
+
+def show_result(result):
+    """Outcome and frame timing of the last game."""
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Score", result["score"])
+    c2.metric("Lives", "-" if result["lives"] is None else result["lives"])
+    c3.metric("Duration", f"{result['duration']:.0f} s")
+    c1.metric("Fruits spawned", result["spawned"])
+    c2.metric("Fruits hit", result["sliced"])
+    c3.metric("Missed", result["missed"])
+    if result["frameMsMean"] is not None:
+        st.caption(f"Frame time: average {result['frameMsMean']:.1f} ms, p95 {result['frameMsP95']:.1f} ms "
+                   f"over {result['frames']} frames, bombs hit: {result['bombs']}")
+
+# Kiosk this page starts games on, preselected with ?kiosk=Name
+kiosks = list(kiosk_cameras())
+requested = st.query_params.get("kiosk")
+kiosk = st.sidebar.selectbox("Kiosk", kiosks, index=kiosks.index(requested) if requested in kiosks else 0,
+                             disabled=bool(st.session_state.current_game and not st.session_state.game_over))
 
 # Main menu
 if not st.session_state.current_game:
@@ -87,31 +180,34 @@ if not st.session_state.current_game:
 
     with col1:
         if st.button("👃🍎 Nose Fruit", key="nose_fruit", help="Play Nose Fruit game"):
-            st.session_state.current_game = "nose_fruit.py"
-            st.session_state.game_over = False
+            start_game("nose_fruit.py", kiosk)
             st.rerun()
 
     with col2:
         if st.button("😋🍌 Fruit Eater", key="fruit_eater", help="Play Fruit Eater game"):
-            st.session_state.current_game = "fruit_eater.py"
-            st.session_state.game_over = False
+            start_game("fruit_eater.py", kiosk)
             st.rerun()
 
     with col3:
         if st.button("👐🍒 Fruit Catcher", key="fruit_catcher", help="Play Fruit Catcher game"):
-            st.session_state.current_game = "fruit_catcher.py"
-            st.session_state.game_over = False
+            start_game("fruit_catcher.py", kiosk)
             st.rerun()
 
-# Game execution and post-game menu
+# Running game, followed without blocking the script
 if st.session_state.current_game and not st.session_state.game_over:
-    success = run_game(st.session_state.current_game)
-    st.session_state.game_over = True
-    st.rerun()
+    show_running()
 
 # Game over menu
 if st.session_state.current_game and st.session_state.game_over:
     st.markdown('<div class="game-over">💀 Game Over!!!</div>', unsafe_allow_html=True)
+    if st.session_state.error_message:
+        st.error(st.session_state.error_message)
+    if st.session_state.game_log:
+        st.code(st.session_state.game_log, language=None)
+    if st.session_state.game_result:
+        show_result(st.session_state.game_result)
+    if st.session_state.first_frame is not None:
+        st.caption(f"First playable frame after {st.session_state.first_frame:.2f} s")
 
     # Tombol di tengah
     col1, col2, col3 = st.columns([1, 1, 1])
@@ -125,13 +221,18 @@ if st.session_state.current_game and st.session_state.game_over:
         with c1:
             if st.button("Menu", key="menu", help="Return to main menu"):
                 st.session_state.current_game = None
+                st.session_state.game_session = None
                 st.session_state.game_over = False
                 st.session_state.error_message = None
                 st.rerun()
         with c2:
             if st.button("Play Again", key="play_again", help="Play the same game again"):
-                st.session_state.game_over = False
+                start_game(st.session_state.current_game, kiosk)
                 st.rerun()
 
     with col3:
         st.empty()  # Spacer kanan
+
+# Games on every kiosk of this machine
+with st.expander("Kiosks"):
+    show_kiosks()
@@ -0,0 +1,279 @@
+import numpy as np
+import pymunk
+
+# Array-backed stand-in for the part of pymunk the games use: a space with
+# gravity, circle bodies, impulses, velocity writes and bb_query. Every body in
+# the space is one row of NumPy arrays (position, velocity, radius, sprite
+# extent, interpolation snapshot), so a step integrates all fruits in two array
+# operations, and the per-frame readers that go through every fruit
+# (PhysicsClock's snapshot, EntityLifecycle.cull, hit_test.DistanceIndex, Fruit
+# Eater's attraction) work on whole columns instead of one pymunk attribute
+# access per fruit; the games read all positions once a frame through
+# game_clock.PhysicsSnapshot rather than body by body. A step integrates like
+# pymunk does (position with the old velocity, then gravity into the
+# velocity), so a body moves exactly as it would under pymunk until it touches
+# another one: bodies here never collide.
+# Rows stay packed: removing a body moves the last row into its place.
+
+
+class ArrayBody:
+    __slots__ = ("mass", "moment", "space", "index", "radius", "extent", "shape",
+                 "_position", "_velocity", "angular_velocity", "angle")
+
+    def __init__(self, mass=1, moment=1):
+        self.mass = mass
+        self.moment = moment
+        self.space = None
+        self.index = None  # row in space's arrays while attached
+        self.radius = 0.0
+        self.extent = (0.0, 0.0)
+        self.shape = None
+        # State of a detached body; an attached one lives in the space's arrays
+        self._position = pymunk.Vec2d(0.0, 0.0)
+        self._velocity = pymunk.Vec2d(0.0, 0.0)
+        # Kept for pymunk compatibility, rotation is not simulated
+        self.angular_velocity = 0.0
+        self.angle = 0.0
+
+    @property
+    def position(self):
+        if self.space is None:
+            return self._position
+        x, y = self.space.positions[self.index].tolist()
+        return pymunk.Vec2d(x, y)
+
+    @position.setter
+    def position(self, value):
+        if self.space is None:
+            self._position = pymunk.Vec2d(float(value[0]), float(value[1]))
+        else:
+            self.space.positions[self.index] = value
+
+    @property
+    def velocity(self):
+        if self.space is None:
+            return self._velocity
+        x, y = self.space.velocities[self.index].tolist()
+        return pymunk.Vec2d(x, y)
+
+    @velocity.setter
+    def velocity(self, value):
+        if self.space is None:
+            self._velocity = pymunk.Vec2d(float(value[0]), float(value[1]))
+        else:
+            self.space.velocities[self.index] = value
+
+    def apply_impulse_at_local_point(self, impulse, point=(0, 0)):
+        # Through the centre of mass only: the games always push at (0, 0)
+        inverse = 1.0 / self.mass
+        if self.space is None:
+            vx, vy = self._velocity
+            self._velocity = pymunk.Vec2d(vx + impulse[0] * inverse, vy + impulse[1] * inverse)
+        else:
+            self.space.velocities[self.index] += (impulse[0] * inverse, impulse[1] * inverse)
+
+
+class ArrayCircle:
+    __slots__ = ("body", "radius", "elasticity", "friction")
+
+    def __init__(self, body, radius, offset=(0, 0)):
+        self.body = body
+        self.radius = radius
+        self.elasticity = 0.0
+        self.friction = 0.0
+        body.radius = float(radius)
+        body.shape = self
+
+
+class ArraySpace:
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.rows = []  # body per row
+        self.bodySet = {}  # attached bodies in the order they were added, like pymunk's space.bodies
+        self._gravity = pymunk.Vec2d(0.0, 0.0)
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        old = self.count
+        columns = {"positions": (capacity, 2), "velocities": (capacity, 2), "previous": (capacity, 2),
+                   "radii": (capacity,), "extents": (capacity, 2)}
+        for name, shape in columns.items():
+            column = np.zeros(shape)
+            if old:
+                column[:old] = getattr(self, name)[:old]
+            setattr(self, name, column)
+        hasPrevious = np.zeros(capacity, dtype=bool)
+        if old:
+            hasPrevious[:old] = self.hasPrevious[:old]
+        self.hasPrevious = hasPrevious
+        self.rows.extend([None] * (capacity - len(self.rows)))
+
+    @property
+    def gravity(self):
+        return self._gravity
+
+    @gravity.setter
+    def gravity(self, value):
+        self._gravity = pymunk.Vec2d(float(value[0]), float(value[1]))
+
+    @property
+    def bodies(self):
+        return list(self.bodySet)
+
+    @property
+    def shapes(self):
+        return [body.shape for body in self.bodySet]
+
+    def add(self, *objs):
+        for obj in objs:
+            if isinstance(obj, ArrayBody) and obj.space is None:
+                self._attach(obj)
+
+    def remove(self, *objs):
+        for obj in objs:
+            if isinstance(obj, ArrayBody) and obj.space is self:
+                self._detach(obj)
+
+    def _attach(self, body):
+        if self.count == len(self.rows):
+            self._allocate(2 * len(self.rows))
+        i = self.count
+        self.positions[i] = body._position
+        self.velocities[i] = body._velocity
+        self.radii[i] = body.radius
+        self.extents[i] = body.extent
+        self.hasPrevious[i] = False
+        self.rows[i] = body
+        self.count += 1
+        body.space, body.index = self, i
+        self.bodySet[body] = None
+
+    def _detach(self, body):
+        # A removed body keeps its last state, like under pymunk
+        body._position, body._velocity = body.position, body.velocity
+        i, last = body.index, self.count - 1
+        if i != last:
+            for column in (self.positions, self.velocities, self.previous, self.radii, self.extents,
+                           self.hasPrevious):
+                column[i] = column[last]
+            moved = self.rows[i] = self.rows[last]
+            moved.index = i
+        self.rows[last] = None
+        self.count -= 1
+        body.space, body.index = None, None
+        del self.bodySet[body]
+
+    def step(self, dt):
+        n = self.count
+        positions, velocities = self.positions[:n], self.velocities[:n]
+        positions += velocities * dt
+        velocities += np.array(self._gravity) * dt
+
+    def reindex_shapes_for_body(self, body):
+        pass  # there is no spatial tree to keep in sync
+
+    def bb_query(self, bb, shape_filter=None):
+        # Shapes whose bounding box overlaps bb, like pymunk.Space.bb_query
+        n = self.count
+        x, y, r = self.positions[:n, 0], self.positions[:n, 1], self.radii[:n]
+        hits = (x - r <= bb.right) & (x + r >= bb.left) & (y - r <= bb.top) & (y + r >= bb.bottom)
+        return [self.rows[i].shape for i in np.flatnonzero(hits)]
+
+    # Bulk access used by PhysicsClock, EntityLifecycle, hit_test and Fruit Eater
+
+    def savePositions(self):
+        n = self.count
+        self.previous[:n] = self.positions[:n]
+        self.hasPrevious[:n] = True
+
+    def forgetPrevious(self, body):
+        if body.space is self:
+            self.hasPrevious[body.index] = False
+
+    def interpolated(self, body, alpha):
+        if body.space is not self or not self.hasPrevious[body.index]:
+            return body.position
+        px, py = self.previous[body.index].tolist()
+        x, y = self.positions[body.index].tolist()
+        return pymunk.Vec2d(px + (x - px) * alpha, py + (y - py) * alpha)
+
+    def setExtent(self, body, halfWidth, halfHeight):
+        body.extent = (halfWidth, halfHeight)
+        if body.space is self:
+            self.extents[body.index] = body.extent
+
+    def offscreen(self, bodies, size, margin):
+        # EntityLifecycle.isOffscreen for all of `bodies` (attached) at once
+        rows = np.fromiter((body.index for body in bodies), dtype=np.intp, count=len(bodies))
+        x, y = self.positions[rows, 0], self.positions[rows, 1]
+        vx, vy = self.velocities[rows, 0], self.velocities[rows, 1]
+        halfW, halfH = self.extents[rows, 0], self.extents[rows, 1]
+        width, height = size
+        gone = ((x < -halfW - margin) & (vx <= 0)) | ((x > width + halfW + margin) & (vx >= 0))
+        if self._gravity[1] < 0:
+            gone |= (y < -halfH - margin) & (vy <= 0)
+        elif self._gravity[1] > 0:
+            gone |= (y > height + halfH + margin) & (vy >= 0)
+        return gone.tolist()
+
+    def bodyPositions(self):
+        return self.rows[:self.count], self.positions[:self.count]
+
+    def snapshot(self, alpha):
+        # (bodies, positions, interpolated positions) of every body, for
+        # game_clock.PhysicsSnapshot: the once-a-frame read the games draw from
+        n = self.count
+        current, previous = self.positions[:n], self.previous[:n]
+        drawn = np.where(self.hasPrevious[:n, None], previous + (current - previous) * alpha, current)
+        return self.rows[:n], current, drawn
+
+    def attract(self, target, radius, speed):
+        n = self.count
+        delta = np.asarray(target, dtype=float) - self.positions[:n]
+        distance = np.hypot(delta[:, 0], delta[:, 1])
+        pulled = (distance < radius) & (distance > 0)
+        self.velocities[:n][pulled] = delta[pulled] / distance[pulled, None] * speed
+
+
+def makeBody(space, mass, moment):
+    if isinstance(space, ArraySpace):
+        return ArrayBody(mass, moment)
+    return pymunk.Body(mass, moment)
+
+
+def makeCircle(body, radius):
+    if isinstance(body, ArrayBody):
+        return ArrayCircle(body, radius)
+    return pymunk.Circle(body, radius)
+
+
+def bodyPositions(space):
+    # (bodies, (N, 2) array of their positions)
+    if isinstance(space, ArraySpace):
+        return space.bodyPositions()
+    bodies = space.bodies
+    return bodies, np.array([tuple(body.position) for body in bodies], dtype=float).reshape(-1, 2)
+
+
+def attract(space, target, radius, speed):
+    # Bodies closer than `radius` to `target` head straight for it at `speed`
+    if isinstance(space, ArraySpace):
+        space.attract(target, radius, speed)
+        return
+    targetX, targetY = target
+    for body in space.bodies:
+        position = body.position
+        dx = targetX - position.x
+        dy = targetY - position.y
+        distance = (dx**2 + dy**2)**0.5
+        if 0 < distance < radius:
+            body.velocity = (dx / distance * speed, dy / distance * speed)
+
+
+PHYSICS_BACKENDS = {"pymunk": pymunk.Space, "array": ArraySpace}
+
+
+def makeSpace(kind, gravity):
+    space = PHYSICS_BACKENDS[kind]()
+    space.gravity = gravity
+    return space
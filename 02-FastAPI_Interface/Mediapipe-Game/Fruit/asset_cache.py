@@ -0,0 +1,132 @@
+import os
+import threading
+import pygame
+from collections import OrderedDict
+
+
+# Process-wide cache for decoded sprite sheets and sounds.
+# Every fruit of the same type and (quantized) scale shares one frame list,
+# so spawning a fruit no longer touches the disk or decodes a PNG/WAV.
+class AssetCache:
+    def __init__(self, maxBytes=256 * 1024 * 1024, scaleStep=0.1):
+        self.maxBytes = maxBytes
+        self.scaleStep = scaleStep
+        self.entries = OrderedDict()  # key -> (asset, size in bytes)
+        self.bytesUsed = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Sprites may be preloaded on a startup thread while the game spawns fruits
+        self.lock = threading.RLock()
+
+    def quantizeScale(self, scale):
+        if not self.scaleStep:
+            return scale
+        return round(round(scale / self.scaleStep) * self.scaleStep, 4)
+
+    def getFrames(self, path, scale=1, grid=(2, 4), animationFrames=None):
+        if animationFrames is None:
+            animationFrames = grid[0] * grid[1]
+        scale = self.quantizeScale(scale)
+        key = ("frames", path, scale, tuple(grid), animationFrames)
+        with self.lock:
+            frames = self._lookup(key)
+            if frames is None:
+                frames, size = self._loadFrames(path, scale, grid, animationFrames)
+                self._store(key, frames, size)
+        return frames
+
+    def getSound(self, path):
+        key = ("sound", path)
+        with self.lock:
+            sound = self._lookup(key)
+            if sound is None:
+                try:
+                    sound = pygame.mixer.Sound(path)
+                except pygame.error:
+                    raise FileNotFoundError(f"Sound file not found: {path}")
+                self._store(key, sound, len(sound.get_raw()))
+        return sound
+
+    def _loadFrames(self, path, scale, grid, animationFrames):
+        try:
+            img = pygame.image.load(path).convert_alpha()
+        except (pygame.error, FileNotFoundError):
+            raise FileNotFoundError(f"Image file not found: {path}")
+        width, height = img.get_size()
+        img = pygame.transform.smoothscale(img, (int(width * scale), int(height * scale)))
+        width, height = img.get_size()
+
+        # Split image to get all frames (subsurfaces share the scaled sheet's pixels)
+        widthSingleFrame = width / grid[1]
+        heightSingleFrame = height / grid[0]
+        frames = []
+        counter = 0
+        for row in range(grid[0]):
+            for col in range(grid[1]):
+                counter += 1
+                if counter <= animationFrames:
+                    frames.append(img.subsurface((col * widthSingleFrame, row * heightSingleFrame,
+                                                  widthSingleFrame, heightSingleFrame)))
+        # Tuple so fruits sharing the list cannot mutate it by accident
+        return tuple(frames), width * height * img.get_bytesize()
+
+    def _lookup(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def _store(self, key, asset, size):
+        self.entries[key] = (asset, size)
+        self.bytesUsed += size
+        # Least recently used entries go first, but never the one just added
+        while self.bytesUsed > self.maxBytes and len(self.entries) > 1:
+            _, (_, oldSize) = self.entries.popitem(last=False)
+            self.bytesUsed -= oldSize
+            self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytesUsed = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.bytesUsed,
+        }
+
+
+_cache = None
+
+
+def getCache():
+    global _cache
+    if _cache is None:
+        _cache = AssetCache()
+    return _cache
+
+
+def preloadFruits(folder="./Fruits", scales=(0.6, 0.7, 0.8), sounds=("./slice.wav", "./explosion.wav"),
+                  stopped=None):
+    # Sprite sheets as Nose Fruit and Fruit Eater request them (scale 0.6-0.8,
+    # quantized by the cache) and their sounds, so no spawn decodes a file.
+    # convert_alpha needs a display mode to be set; stopped() ends it early.
+    cache = getCache()
+    for name in sorted(os.listdir(folder)):
+        for scale in scales:
+            if stopped and stopped():
+                return cache
+            cache.getFrames(os.path.join(folder, name), scale=scale, grid=(4, 4), animationFrames=14)
+    for sound in sounds:
+        cache.getSound(sound)
+    return cache
@@ -0,0 +1,79 @@
+# Micro-benchmark: camera frame -> window, legacy conversion chains vs FramePresenter.
+# Run from the Fruit folder: python benchmarks/bench_frame_presenter.py
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+import pygame
+
+from frame_presenter import FramePresenter
+
+
+def legacyNoseFruit(img, window):
+    imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    imgRGB = np.rot90(imgRGB)
+    frame = pygame.surfarray.make_surface(imgRGB).convert()
+    frame = pygame.transform.flip(frame, True, False)
+    window.blit(frame, (0, 0))
+
+
+def legacyFruitEater(img, window):
+    frame = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    frame = np.rot90(frame)
+    frame = pygame.surfarray.make_surface(frame)
+    frame = pygame.transform.scale(frame, window.get_size())
+    window.blit(frame, (0, 0))
+
+
+def legacyFruitCatcher(img, window):
+    frame = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    frame = pygame.surfarray.make_surface(frame)
+    frame = pygame.transform.rotate(frame, -90)
+    frame = pygame.transform.flip(frame, True, False)
+    window.blit(frame, (0, 0))
+
+
+def measure(fn, img, window, frames):
+    fn(img, window)  # warm-up
+    start = time.perf_counter()
+    for _ in range(frames):
+        fn(img, window)
+    return frames / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Camera frame to window blit micro-benchmark")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+
+    pygame.init()
+    size = (args.width, args.height)
+    window = pygame.display.set_mode(size)
+    img = np.random.randint(0, 256, (args.height, args.width, 3), dtype=np.uint8)
+    # Fruit Eater scales to a window smaller than the camera frame
+    eaterSize = (args.width * 15 // 16, args.height * 15 // 16)
+
+    cases = [
+        ("nose_fruit", legacyNoseFruit, FramePresenter().present, size),
+        ("fruit_eater", legacyFruitEater, FramePresenter(eaterSize, mirror=True).present, eaterSize),
+        ("fruit_catcher", legacyFruitCatcher, FramePresenter().present, size),
+    ]
+    print(f"Frame {args.width}x{args.height}, {args.frames} frames per case")
+    for name, legacy, presenter, windowSize in cases:
+        window = pygame.display.set_mode(windowSize)
+        before = measure(legacy, img, window, args.frames)
+        after = measure(presenter, img, window, args.frames)
+        print(f"{name:14s} legacy {before:8.1f} fps   presenter {after:8.1f} fps   x{after / before:.1f}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# Multi-player inference throughput (--players): every player's strip of the
+# frame through the game's tracker, one after the other in the game process
+# against one worker process per player (multiplayer.MultiPlayerTracker).
+# With a core per player the pool's frame rate should stay close to the
+# single-player one. Frames come from a video (default: the synthetic one).
+# Run from the Fruit folder: python benchmarks/bench_multiplayer.py [--video clip.mp4]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import cv2
+
+from multiplayer import MultiPlayerTracker
+from synthetic import writeInputs
+from trackers import mouthTracker, noseTracker, wristTracker
+
+TRACKERS = {"nose": noseTracker, "wrist": wristTracker, "mouth": mouthTracker}
+
+
+def readFrames(path, count, size):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < count:
+        success, img = cap.read()
+        if not success:
+            if not frames:
+                raise ValueError(f"No frames in {path}")
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            continue
+        frames.append(cv2.cvtColor(cv2.resize(cv2.flip(img, 1), size), cv2.COLOR_BGR2RGB))
+    cap.release()
+    return frames
+
+
+def framesPerSecond(tracker, frames):
+    for imgRGB in frames[:5]:  # warm-up
+        tracker.process(imgRGB)
+    start = time.perf_counter()
+    for imgRGB in frames:
+        tracker.process(imgRGB)
+    return len(frames) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-player inference, in process vs one process per player")
+    parser.add_argument("--video", help="default: the synthetic benchmark video")
+    parser.add_argument("--tracker", choices=sorted(TRACKERS), default="nose")
+    parser.add_argument("--players", type=int, nargs="+", default=[1, 2, 3, 4])
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--width", type=int, default=1200)
+    parser.add_argument("--height", type=int, default=686)
+    args = parser.parse_args()
+
+    video = args.video or writeInputs(os.path.join(tempfile.gettempdir(), "fruit_bench_inputs"))["video"]
+    frames = readFrames(video, args.frames, (args.width, args.height))
+    factory = TRACKERS[args.tracker]
+    print(f"{args.tracker} tracker, {args.width}x{args.height}, {os.cpu_count()} CPU cores")
+    print(f"{'players':>7} {'in process':>12} {'pool':>12} {'pool speedup':>13} {'scaling':>8}")
+    single = None
+    for players in args.players:
+        results = {}
+        for parallel in (False, True):
+            tracker = MultiPlayerTracker(factory, players, parallel=parallel)
+            try:
+                results[parallel] = framesPerSecond(tracker, frames)
+            finally:
+                tracker.close()
+        if single is None:
+            single = results[False] * args.players[0]
+        # scaling: player-frames per second relative to one player tracked in process
+        scaling = results[True] * players / single
+        print(f"{players:>7} {results[False]:>10.1f}/s {results[True]:>10.1f}/s "
+              f"{results[True] / results[False]:>12.2f}x {scaling:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# Micro-benchmark: how many fruits fit in a frame at 23 and 60 fps with pymunk
+# and with the NumPy backend (array_physics, --physics array). A frame does the
+# fruit work that grows with the number of fruits in Nose Fruit: fixed-step
+# physics, every fruit's interpolated position (what drawing reads), a swept
+# hit query and culling, with culled fruits respawned so the count stays put.
+# pymunk also resolves fruit-fruit contacts, the array backend does not.
+# Blitting the sprites is left out unless --draw is given.
+# Run from the Fruit folder: python benchmarks/bench_physics.py
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+import pymunk
+
+from array_physics import PHYSICS_BACKENDS, makeBody, makeCircle, makeSpace
+from entity_lifecycle import EntityLifecycle
+from game_clock import PhysicsClock
+from hit_test import makeHitIndex
+
+WIDTH, HEIGHT = 1200, 686
+INDEXES = {"pymunk": "pymunk", "array": "distance"}
+
+
+class BenchFruit:
+    __slots__ = ("body", "shape", "width", "height")
+
+    def __init__(self, space):
+        self.body = makeBody(space, 1, pymunk.moment_for_circle(1, 0, 30))
+        self.shape = makeCircle(self.body, 30)
+        self.width = self.height = 60
+
+
+class Scene:
+    def __init__(self, backend, count, fps, draw=None):
+        random.seed(0)
+        self.fps = fps
+        self.draw = draw
+        self.space = makeSpace(backend, (0.0, -1000.0))
+        self.physics = PhysicsClock(self.space, 1 / 60, 0.0)
+        self.lifecycle = EntityLifecycle(self.space, (WIDTH, HEIGHT), physics=self.physics)
+        self.index = makeHitIndex(INDEXES[backend], self.space, toSpace=lambda point: (point[0], HEIGHT - point[1]))
+        self.fruits = [self.spawn(BenchFruit(self.space)) for _ in range(count)]
+        self.now = 0.0
+        self.frame = 0
+
+    def spawn(self, fruit):
+        # Like Nose Fruit: from the bottom edge, thrown up and inwards
+        x = random.randint(0, WIDTH)
+        fruit.body.position = x, random.uniform(100, 600)
+        fruit.body.velocity = 0, 0
+        self.lifecycle.spawn(fruit)
+        randX = random.randint(100, 300) if x < WIDTH // 2 else random.randint(-300, -100)
+        fruit.body.apply_impulse_at_local_point((randX, random.randint(900, 1100)), (0, 0))
+        return fruit
+
+    def step(self):
+        self.frame += 1
+        self.now += 1 / self.fps
+        self.physics.update(self.now)
+        angle = self.frame * 0.2
+        nose = (WIDTH / 2 + 300 * math.cos(angle), HEIGHT / 2 + 200 * math.sin(angle))
+        path = [self.previousNose, nose] if self.frame > 1 else [nose]
+        self.previousNose = nose
+        self.index.update()
+        nearby = self.index.nearby(path, 80)
+        hits = 0
+        for fruit in self.fruits:
+            x, y = self.physics.position(fruit.body)
+            if self.draw:
+                self.draw(int(x) - 30, HEIGHT - int(y) - 30)
+            hits += fruit.body in nearby
+        self.fruits, culled = self.lifecycle.cull(self.fruits)
+        self.fruits.extend(self.spawn(fruit) for fruit in culled)
+        return hits
+
+
+def frameMs(backend, count, fps, frames, draw=None):
+    scene = Scene(backend, count, fps, draw)
+    for _ in range(20):
+        scene.step()
+    start = time.perf_counter()
+    for _ in range(frames):
+        scene.step()
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def mostFruits(backend, fps, budgetMs, frames, draw=None, limit=100000):
+    # Double until the frame no longer fits, then bisect
+    low, high = 0, 25
+    while high <= limit and frameMs(backend, high, fps, frames, draw) <= budgetMs:
+        low, high = high, high * 2
+    while high - low > max(5, low // 20):
+        middle = (low + high) // 2
+        if frameMs(backend, middle, fps, frames, draw) <= budgetMs:
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fruits per frame, pymunk vs the NumPy physics backend")
+    parser.add_argument("--counts", type=int, nargs="+", default=[50, 200, 800, 3200])
+    parser.add_argument("--fps", type=float, nargs="+", default=[23, 60])
+    parser.add_argument("--share", type=float, default=0.5,
+                        help="part of the frame time the fruits may use (the rest is camera, inference, drawing)")
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--draw", action="store_true", help="also blit a 60x60 sprite per fruit")
+    args = parser.parse_args()
+
+    draw = None
+    if args.draw:
+        pygame.init()
+        window = pygame.display.set_mode((WIDTH, HEIGHT))
+        sprite = pygame.Surface((60, 60), pygame.SRCALPHA)
+        pygame.draw.circle(sprite, (0, 200, 0, 255), (30, 30), 30)
+        draw = lambda x, y: window.blit(sprite, (x, y))
+
+    columns = [(backend, fps) for fps in args.fps for backend in PHYSICS_BACKENDS]
+    print("ms per frame" + (" (with drawing)" if draw else ""))
+    print(f"{'fruits':>7}" + "".join(f"{f'{backend} {fps:g}fps':>16}" for backend, fps in columns))
+    for count in args.counts:
+        print(f"{count:>7}" + "".join(f"{frameMs(backend, count, fps, args.frames, draw):>16.2f}"
+                                      for backend, fps in columns))
+
+    print(f"\nMost fruits per frame within {args.share:.0%} of the frame time:")
+    for fps in args.fps:
+        budget = 1000 / fps * args.share
+        counts = {backend: mostFruits(backend, fps, budget, args.frames, draw) for backend in PHYSICS_BACKENDS}
+        print(f"  {fps:g} fps ({budget:.1f} ms): " + ", ".join(f"{backend} {count}" for backend, count in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# Micro-benchmark: Nose Fruit's low-lives tint (full-frame overlay + addWeighted
+# vs the ScreenTint lookup table) and a static game over screen with the debug
+# overlay on top (redrawn and updated whole vs LayeredDisplay). Both renderers
+# are checked to give the same pixels.
+# Run from the Fruit folder: python benchmarks/bench_renderer.py
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+import pygame
+
+from hud import TextRenderer
+from renderer import LayeredDisplay, ScreenTint
+
+
+def legacyTint(img):
+    h, w = img.shape[:2]
+    cv2.rectangle(img, (0, 0), (w - 1, h - 1), (0, 0, 255), 10)
+    overlay = np.full((h, w, 3), (0, 0, 255), dtype=np.uint8)
+    cv2.addWeighted(img, 0.7, overlay, 0.3, 0.0, dst=img)
+
+
+def measure(fn, frames):
+    fn(0)  # warm-up
+    start = time.perf_counter()
+    for i in range(frames):
+        fn(i)
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Low-lives tint and static screen micro-benchmark")
+    parser.add_argument("--width", type=int, default=1200)
+    parser.add_argument("--height", type=int, default=686)
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+
+    camera = np.random.randint(0, 256, (args.height, args.width, 3), dtype=np.uint8)
+    img = np.empty_like(camera)
+    tint = ScreenTint((0, 0, 255), weight=0.3, border=10)
+
+    def before(i):
+        np.copyto(img, camera)
+        legacyTint(img)
+
+    def after(i):
+        np.copyto(img, camera)
+        tint.apply(img)
+
+    before(0)
+    expected = img.copy()
+    after(0)
+    same = np.array_equal(img, expected)
+    copyMs = measure(lambda i: np.copyto(img, camera), args.frames)
+    print(f"Low-lives tint {args.width}x{args.height}: addWeighted {measure(before, args.frames) - copyMs:.2f} ms, "
+          f"lookup table {measure(after, args.frames) - copyMs:.2f} ms, identical: {same}")
+
+    pygame.init()
+    window = pygame.display.set_mode((args.width, args.height))
+    background = pygame.surfarray.make_surface(np.random.randint(0, 256, (args.width, args.height, 3),
+                                                                 dtype=np.uint8)).convert()
+    hud = TextRenderer()
+
+    def drawGameOver(surface):
+        surface.blit(background, (0, 0))
+        for text, pos in [("You Win!", (400, 143)), ("Your Score:", (350, 243)), ("42", (600, 343))]:
+            hud.draw(surface, text, pos, 150, (0, 0, 0))
+
+    def drawOverlay(i):
+        # Changes every few frames, like the debug overlay
+        return [hud.draw(window, f"FPS {i // 10}", (10, 150), 26, (255, 255, 255), outline=(0, 0, 0))]
+
+    def full(i):
+        drawGameOver(window)
+        drawOverlay(i)
+        pygame.display.update()
+
+    layers = LayeredDisplay(window)
+
+    def layered(i):
+        layers.showStatic("game over", drawGameOver)
+        layers.update(drawOverlay(i))
+
+    fullMs = measure(full, args.frames)
+    fullPixels = pygame.surfarray.array3d(window)
+    layeredMs = measure(layered, args.frames)
+    same = np.array_equal(pygame.surfarray.array3d(window), fullPixels)
+    print(f"Game over screen: full redraw {fullMs:.2f} ms, layered {layeredMs:.2f} ms, identical: {same}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# Time to first frame: cold start (a fresh Python process per launch, what
+# app.py used to do) against a warm game host (game_host.py) that already has
+# the imports, MediaPipe graphs and sprite sheets loaded, and against a cold
+# start that reads camera and landmarks from landmark_service.py. Also breaks
+# each launch down into the startup pipeline's phases (startup.py): models,
+# camera and images loading in parallel, split into import and init time.
+# Run from the Fruit folder: python benchmarks/bench_startup.py [--rounds 3] [--camera]
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FRUIT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, FRUIT_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from game_host import GAMES, playGame, startHost, stopHost
+from landmark_service import serviceRunning
+from session_result import readResult
+from synthetic import writeInputs
+
+
+def gameArgs(inputs, camera, frames, service=None):
+    # The synthetic video runs the real MediaPipe model, like a webcam would
+    if service:
+        source = ["--service", service]
+    else:
+        source = [] if camera else ["--video", inputs["video"], "--loop"]
+    return [*source, "--headless", "--max-frames", str(frames)]
+
+
+def startService(inputs, camera, name, timeout=120):
+    source = [] if camera else ["--video", inputs["video"]]
+    process = subprocess.Popen([sys.executable, os.path.join(FRUIT_DIR, "landmark_service.py"), "--name", name,
+                                *source], cwd=FRUIT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while not serviceRunning(name):
+        if process.poll() is not None or time.monotonic() > deadline:
+            process.terminate()
+            raise RuntimeError("Landmark service did not start")
+        time.sleep(0.2)
+    return process
+
+
+def coldStart(game, args, startups):
+    fd, resultFile = tempfile.mkstemp(suffix=".json", prefix="fruit_bench_")
+    os.close(fd)
+    try:
+        sentAt = time.time()
+        result = subprocess.run([sys.executable, os.path.join(FRUIT_DIR, "game_host.py"), "--headless",
+                                 "--once", game, "--", *args, "--result-file", resultFile],
+                                cwd=FRUIT_DIR, capture_output=True, text=True, check=True)
+        startups.append(readResult(resultFile)["startup"])
+    finally:
+        os.remove(resultFile)
+    line = [line for line in result.stdout.splitlines() if line.startswith("First frame at")][-1]
+    return float(line.split()[-1]) - sentAt
+
+
+def phaseTable(startups):
+    # Median seconds per startup phase over all launches of one mode
+    rows = {}
+    for startup in startups:
+        for name, phase in startup["phases"].items():
+            if not phase["background"]:
+                rows.setdefault(name, []).append(phase)
+    lines = []
+    for name, phases in rows.items():
+        median = lambda key: statistics.median(phase[key] for phase in phases)
+        total = median("end") - median("start")
+        lines.append(f"  {name:<8}{total:>8.2f}{median('import'):>8.2f}{median('init'):>8.2f}")
+    ready = statistics.median(startup["ready"] for startup in startups)
+    lines.append(f"  {'ready':<8}{ready:>8.2f}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold vs warm time to first frame")
+    parser.add_argument("--rounds", type=int, default=3, help="launches per game and mode")
+    parser.add_argument("--frames", type=int, default=10, help="frames per launch")
+    parser.add_argument("--camera", action="store_true", help="use the webcam instead of the synthetic video")
+    parser.add_argument("--port", type=int, default=6151, help="port for the benchmark's own host")
+    args = parser.parse_args()
+
+    inputs = writeInputs(os.path.join(tempfile.gettempdir(), "fruit_bench_inputs"))
+    launchArgs = gameArgs(inputs, args.camera, args.frames)
+    address = ("127.0.0.1", args.port)
+
+    startups = {"cold": [], "service": [], "warm": []}
+    cold = {game: [coldStart(game, launchArgs, startups["cold"]) for _ in range(args.rounds)] for game in GAMES}
+
+    # Cold processes again, but the camera and models live in the landmark service
+    service = startService(inputs, args.camera, "fruit_bench_tracking")
+    try:
+        serviceArgs = gameArgs(inputs, args.camera, args.frames, service="fruit_bench_tracking")
+        served = {game: [coldStart(game, serviceArgs, startups["service"]) for _ in range(args.rounds)]
+                  for game in GAMES}
+    finally:
+        service.terminate()
+        service.wait()
+
+    start = time.perf_counter()
+    hostArgs = ["--headless"] + ([] if args.camera else ["--no-camera"])
+    host = startHost(hostArgs, address=address, timeout=300, log=subprocess.DEVNULL)
+    hostStartup = time.perf_counter() - start
+    warm = {}
+    try:
+        for game in GAMES:
+            warm[game] = []
+            for _ in range(args.rounds):
+                reply = playGame(game, launchArgs, address=address)
+                if not reply["ok"]:
+                    raise RuntimeError(reply["error"])
+                warm[game].append(reply["firstFrameSeconds"])
+                startups["warm"].append(reply["result"]["startup"])
+    finally:
+        stopHost(address)
+        host.wait()
+
+    print(f"Time to first frame in seconds, median of {args.rounds} "
+          f"(host startup once: {hostStartup:.2f} s)")
+    print(f"{'game':<16}{'cold':>8}{'service':>9}{'warm':>8}{'speedup':>9}")
+    for game in GAMES:
+        c, w = statistics.median(cold[game]), statistics.median(warm[game])
+        print(f"{game:<16}{c:>8.2f}{statistics.median(served[game]):>9.2f}{w:>8.2f}{c / w:>8.1f}x")
+
+    print("\nStartup phases from Game() on, median seconds (phases run in parallel behind the loading screen)")
+    for mode, launches in startups.items():
+        print(f"{mode + ':':<10}{'total':>8}{'import':>8}{'init':>8}")
+        for line in phaseTable(launches):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
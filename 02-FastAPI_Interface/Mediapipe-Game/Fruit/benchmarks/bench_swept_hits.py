@@ -0,0 +1,123 @@
+# Missed-hit benchmark: point vs swept hit tests on fast landmark motion.
+# Fruits appear as Nose Fruit hitboxes for a short life; the dense trace is the
+# ground truth path, the game only sees it at its frame rate. Also times the
+# spatial indexes (uniform grid, pymunk's tree) against testing every fruit.
+# Run from the Fruit folder: python benchmarks/bench_swept_hits.py [--trace fast.npz]
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pymunk
+
+from hit_test import HIT_INDEXES, makeHitIndex, pathHitsBox
+from input_source import loadTrace
+from synthetic import noseTrace
+
+SIZE = (1200, 686)  # Nose Fruit window
+
+
+def hitbox(center, scale):
+    # Nose Fruit: 512 px animation frame at `scale`, 70% of it counts
+    side = 512 * scale * 0.7
+    return (center[0] - side // 2, center[1] - side // 2, center[0] + side // 2, center[1] + side // 2)
+
+
+def tracePoints(times, frames, landmark):
+    points = [None if landmark not in frame else (frame[landmark][0] * SIZE[0], frame[landmark][1] * SIZE[1])
+              for frame in frames]
+    return np.asarray(times, dtype=float), points
+
+
+def missedHits(times, points, fps, fruitLife=1.5, spawnEvery=0.3, seed=0):
+    rng = random.Random(seed)
+    fruits = [(t, hitbox((rng.uniform(0, SIZE[0]), rng.uniform(0, SIZE[1])), rng.uniform(0.6, 0.8)))
+              for t in np.arange(times[0], times[-1] - fruitLife, spawnEvery)]
+    # Frame i sees the latest trace sample at or before its time, like LandmarkTraceSource
+    frameTimes = np.arange(times[0], times[-1], 1 / fps)
+    frameIndex = np.searchsorted(times, frameTimes, side="right") - 1
+    truth = point = swept = 0
+    for spawn, box in fruits:
+        alive = (times >= spawn) & (times < spawn + fruitLife)
+        dense = [points[i] for i in np.flatnonzero(alive) if points[i] is not None]
+        if not dense or not pathHitsBox(dense, box):
+            continue
+        truth += 1
+        seen = [points[i] for i, t in zip(frameIndex, frameTimes) if spawn <= t < spawn + fruitLife]
+        seen = [p for p in seen if p is not None]
+        point += any(pathHitsBox([p], box) for p in seen)
+        swept += bool(seen) and pathHitsBox(seen, box)
+    return truth, truth - point, truth - swept
+
+
+def broadPhase(counts, frames=500, seed=0):
+    # Per-frame cost of update() + nearby() + exact tests, for each index kind
+    rng = random.Random(seed)
+    rows = []
+    for count in counts:
+        space = pymunk.Space()
+        boxes = {}
+        for _ in range(count):
+            body = pymunk.Body(1, 1)
+            body.position = rng.uniform(0, SIZE[0]), rng.uniform(0, SIZE[1])
+            space.add(body, pymunk.Circle(body, 30))
+            boxes[body] = hitbox(body.position, rng.uniform(0.6, 0.8))
+        reach = 512 * 0.8 * 0.7 * 0.5 * 2 ** 0.5  # half the diagonal of the largest hitbox
+        paths = []
+        for _ in range(frames):
+            a = (rng.uniform(0, SIZE[0]), rng.uniform(0, SIZE[1]))
+            paths.append([a, (a[0] + rng.uniform(-150, 150), a[1] + rng.uniform(-150, 150))])
+
+        timings = {}
+        hits = set()
+        for kind in HIT_INDEXES:
+            index = makeHitIndex(kind, space)
+            start = time.perf_counter()
+            found = 0
+            for path in paths:
+                index.update()
+                found += sum(pathHitsBox(path, boxes[body]) for body in index.nearby(path, reach))
+            timings[kind] = (time.perf_counter() - start) * 1000 / frames
+            hits.add(found)
+        assert len(hits) == 1, hits  # every index finds the same hits
+        rows.append((count, timings))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Point vs swept hit tests on fast motion")
+    parser.add_argument("--trace", action="append", default=[], help="recorded trace (.json/.npz), repeatable")
+    parser.add_argument("--landmark", default="nose", help="landmark to follow in --trace files")
+    parser.add_argument("--fps", type=float, default=23, help="game frame rate")
+    parser.add_argument("--fruits", type=int, nargs="+", default=[5, 50, 200, 1000],
+                        help="fruit counts for the broad phase timing")
+    args = parser.parse_args()
+
+    traces = [(path, *tracePoints(*loadTrace(path), args.landmark)) for path in args.trace]
+    if not traces:
+        # Synthetic sweeps sampled at 240 Hz, from normal play to frantic swiping
+        for speed in (1, 3, 6, 10):
+            traces.append((f"synthetic x{speed}", *tracePoints(*noseTrace(duration=60, fps=240, speed=speed), "nose")))
+
+    print(f"Missed hits at {args.fps:g} fps (fruit hitboxes of Nose Fruit, 1.5 s life)")
+    print(f"{'trace':<24}{'px/frame':>10}{'hits':>7}{'point missed':>15}{'swept missed':>15}")
+    for name, times, points in traces:
+        moving = np.array([p for p in points if p is not None])
+        step = np.hypot(*np.diff(moving, axis=0).T).mean() * len(times) / max(times[-1] - times[0], 1e-9) / args.fps
+        truth, pointMissed, sweptMissed = missedHits(times, points, args.fps)
+        rate = lambda missed: f"{missed} ({missed / truth:.1%})" if truth else "-"
+        print(f"{name:<24}{step:>10.1f}{truth:>7}{rate(pointMissed):>15}{rate(sweptMissed):>15}")
+
+    print()
+    print("Hit test cost per frame in ms (2-point path, index update included)")
+    print(f"{'fruits':>7}" + "".join(f"{kind:>10}" for kind in HIT_INDEXES))
+    for count, timings in broadPhase(args.fruits):
+        print(f"{count:>7}" + "".join(f"{timings[kind]:>10.3f}" for kind in HIT_INDEXES))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# Per-stage frame cost benchmarks for Nose Fruit, Fruit Eater and Fruit Catcher.
+# Each scenario drives a game headless from recorded input in its own process
+# and reports p50/p95/p99 per stage, achieved FPS and peak RSS.
+#
+# Run from the Fruit folder:
+#   python benchmarks/run_benchmarks.py --out bench.json
+#   python benchmarks/run_benchmarks.py --scenarios nose_fruit_200_fruits --compare bench.json
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FRUIT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, FRUIT_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+# input: synthetic trace name, or "video" to run the real MediaPipe model
+SCENARIOS = {
+    "nose_fruit": dict(game="nose_fruit", input="nose", frames=1500),
+    "nose_fruit_final_phase": dict(game="nose_fruit", input="nose", frames=460, startAt=120),
+    "nose_fruit_200_fruits": dict(game="nose_fruit", input="nose", frames=600, minFruits=200, endless=True),
+    "nose_fruit_pose": dict(game="nose_fruit", input="video", frames=200),
+    "fruit_eater": dict(game="fruit_eater", input="mouth", frames=1380),
+    "fruit_eater_200_fruits": dict(game="fruit_eater", input="mouth", frames=600, minFruits=200, endless=True),
+    "fruit_eater_face_mesh": dict(game="fruit_eater", input="video", frames=200),
+    "fruit_catcher": dict(game="fruit_catcher", input="wrist", frames=1500),
+    "fruit_catcher_200_fruits": dict(game="fruit_catcher", input="wrist", frames=600, minFruits=200, endless=True),
+    # The same stress scenes on the experimental NumPy physics backend (--physics array)
+    "nose_fruit_200_array": dict(game="nose_fruit", input="nose", frames=600, minFruits=200, endless=True,
+                                 physics="array"),
+    "fruit_eater_200_array": dict(game="fruit_eater", input="mouth", frames=600, minFruits=200, endless=True,
+                                  physics="array"),
+    "fruit_catcher_200_array": dict(game="fruit_catcher", input="wrist", frames=600, minFruits=200, endless=True,
+                                    physics="array"),
+}
+
+
+def runScenario(name, dataDir):
+    # Runs inside the worker process
+    from options import GameOptions
+    from profiler import FrameProfiler
+    from synthetic import writeInputs
+
+    scenario = SCENARIOS[name]
+    inputs = writeInputs(dataDir)
+    profiler = FrameProfiler()
+    options = GameOptions(headless=True, maxFrames=scenario["frames"], profiler=profiler,
+                          startAt=scenario.get("startAt", 0), minFruits=scenario.get("minFruits", 0),
+                          endless=scenario.get("endless", False), physics=scenario.get("physics", "pymunk"),
+                          loop=True)
+    if scenario["input"] == "video":
+        options.video = inputs["video"]
+    else:
+        options.trace = inputs[scenario["input"]]
+
+    random.seed(0)
+    os.chdir(FRUIT_DIR)
+    game = __import__(scenario["game"])
+    start = time.perf_counter()
+    game.Game(options)
+    result = profiler.summary()
+    result["wallSeconds"] = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    result["peakRssMb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    return result
+
+
+def gitCommit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=FRUIT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def printTable(results, baseline=None):
+    print(f"{'scenario':26s} {'frames':>6s} {'fps':>8s} {'p50':>7s} {'p95':>7s} {'p99':>7s} {'rss MB':>7s}  slowest stages (p95 ms)")
+    for name, result in results.items():
+        frame = result["stages"].get("frame", {})
+        stages = sorted(((stats["p95"], stage) for stage, stats in result["stages"].items()
+                         if stage not in ("frame", "tick")), reverse=True)[:3]
+        line = (f"{name:26s} {result['frames']:6d} {result['fps']:8.1f} {frame.get('p50', 0):7.2f} "
+                f"{frame.get('p95', 0):7.2f} {frame.get('p99', 0):7.2f} {result['peakRssMb']:7.1f}  "
+                + ", ".join(f"{stage} {p95:.2f}" for p95, stage in stages))
+        old = (baseline or {}).get(name)
+        if old and old["stages"].get("frame"):
+            delta = frame.get("p95", 0) / old["stages"]["frame"]["p95"] - 1
+            line += f"  [p95 {delta:+.0%} vs baseline]"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage frame cost benchmarks")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), help="default: all")
+    parser.add_argument("--out", help="write machine-readable results to this JSON file")
+    parser.add_argument("--compare", help="previous results JSON to compare frame p95 against")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "fruit_bench_inputs"),
+                        help="where synthetic traces and video are generated")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        with open(args.result_file, "w") as f:
+            json.dump(runScenario(args.worker, args.data_dir), f)
+        return
+
+    results = {}
+    for name in args.scenarios or list(SCENARIOS):
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+            resultFile = f.name
+        try:
+            # One process per scenario so peak RSS is not shared between them
+            worker = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", name,
+                                     "--result-file", resultFile, "--data-dir", args.data_dir],
+                                    capture_output=True, text=True)
+            if worker.returncode != 0:
+                print(f"{name}: failed\n{worker.stderr[-2000:]}", file=sys.stderr)
+                continue
+            with open(resultFile) as f:
+                results[name] = json.load(f)
+        finally:
+            os.remove(resultFile)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["scenarios"]
+    printTable(results, baseline)
+
+    if args.out:
+        report = {"commit": gitCommit(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                  "python": platform.python_version(), "machine": platform.machine(),
+                  "scenarios": results}
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Deterministic synthetic inputs for the benchmarks: landmark traces that
+# sweep across the playfield and a small video for the MediaPipe stages.
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from input_source import saveTrace
+
+
+def noseTrace(duration=150, fps=30, speed=1.0):
+    times = [i / fps for i in range(int(duration * fps))]
+    frames = [{"nose": (0.5 + 0.4 * math.sin(1.3 * speed * t), 0.5 + 0.35 * math.sin(2.1 * speed * t), 0.99)}
+              for t in times]
+    return times, frames
+
+
+def mouthTrace(duration=70, fps=30, speed=1.0):
+    times = [i / fps for i in range(int(duration * fps))]
+    frames = []
+    for t in times:
+        x = 0.5 + 0.35 * math.sin(0.9 * speed * t)
+        y = 0.6 + 0.2 * math.sin(0.5 * speed * t)
+        opening = 0.05 if math.sin(3 * t) > 0 else 0.01  # mouth opens and closes
+        frames.append({"upper_lip": (x, y, 1.0), "lower_lip": (x, y + opening, 1.0)})
+    return times, frames
+
+
+def wristTrace(duration=70, fps=30, speed=1.0):
+    times = [i / fps for i in range(int(duration * fps))]
+    frames = []
+    for t in times:
+        x = 0.5 + 0.4 * math.sin(0.8 * speed * t)
+        y = 0.55 + 0.25 * math.sin(1.7 * speed * t)
+        frames.append({"right_wrist": (x - 0.02, y, 0.9), "left_wrist": (x + 0.02, y, 0.9)})
+    return times, frames
+
+
+def writeVideo(path, frames=200, size=(640, 480), fps=30):
+    width, height = size
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, size)
+    xs = np.linspace(0, 255, width, dtype=np.float32)
+    for i in range(frames):
+        img = np.empty((height, width, 3), dtype=np.uint8)
+        img[:] = ((xs + i * 4) % 256).astype(np.uint8)[None, :, None]
+        cv2.circle(img, (width // 2 + int(150 * math.sin(i / 10)), height // 2), 60, (40, 160, 220), -1)
+        writer.write(img)
+    writer.release()
+    return path
+
+
+def writeInputs(directory):
+    # Returns {"nose": path, "mouth": path, "wrist": path, "video": path}
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for name, make in [("nose", noseTrace), ("mouth", mouthTrace), ("wrist", wristTrace)]:
+        paths[name] = os.path.join(directory, f"{name}.npz")
+        if not os.path.exists(paths[name]):
+            saveTrace(paths[name], *make())
+    paths["video"] = os.path.join(directory, "synthetic.avi")
+    if not os.path.exists(paths["video"]):
+        writeVideo(paths["video"])
+    return paths
@@ -0,0 +1,316 @@
+import math
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+# Single-slot buffer: a new item replaces the old one, so readers always get
+# the newest value and a slow consumer never builds up a queue of stale frames.
+class LatestSlot:
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.item = None
+        self.seq = 0
+
+    def put(self, item):
+        with self.condition:
+            self.item = item
+            self.seq += 1
+            self.condition.notify_all()
+
+    def get(self):
+        with self.condition:
+            return self.seq, self.item
+
+    def waitNewer(self, seq, timeout=None):
+        with self.condition:
+            self.condition.wait_for(lambda: self.seq > seq, timeout)
+            return self.seq, self.item
+
+
+class FramePacket:
+    __slots__ = ("seq", "image", "captureTime", "landmarks", "publishTime", "sampleTime", "captureMs", "inferenceMs")
+
+    def __init__(self, seq, image, captureTime, landmarks, publishTime, sampleTime=None,
+                 captureMs=0.0, inferenceMs=0.0):
+        self.seq = seq
+        self.image = image  # BGR frame the landmarks were computed on
+        self.captureTime = captureTime  # perf_counter, for latency stats
+        self.landmarks = landmarks
+        self.publishTime = publishTime
+        self.sampleTime = captureTime if sampleTime is None else sampleTime  # game clock at capture
+        # Stage costs of this frame, so per-frame telemetry works with the threaded pipeline too
+        self.captureMs = captureMs
+        self.inferenceMs = inferenceMs  # 0 when inference was skipped (decimated or recorded)
+
+
+# Rolling per-stage latency samples in milliseconds
+class StageStats:
+    def __init__(self, window=120):
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def add(self, stage, ms):
+        with self.lock:
+            if stage not in self.samples:
+                self.samples[stage] = deque(maxlen=self.window)
+            self.samples[stage].append(ms)
+
+    def recentMean(self, stage, count):
+        with self.lock:
+            values = list(self.samples.get(stage, ()))[-count:] if count > 0 else []
+        return float(np.mean(values)) if values else None
+
+    def summary(self):
+        with self.lock:
+            samples = {stage: list(values) for stage, values in self.samples.items()}
+        return {stage: {"mean": float(np.mean(values)),
+                        "p95": float(np.percentile(values, 95)),
+                        "count": len(values)}
+                for stage, values in samples.items() if values}
+
+
+# Decides which captured frames get inference. Every `every`th frame at least
+# (or every `qualityEvery`th, set by adaptive quality, if larger); with a
+# budget, inference may only use that share of the frame time, so N is
+# recomputed from the measured inference and frame times (capped at maxEvery).
+# Frames in between reuse the last landmarks object, which LandmarkFilter
+# extrapolates from. Budget decisions follow real timings, use a fixed N for
+# reproducible runs.
+class InferenceScheduler:
+    def __init__(self, every=1, budget=None, maxEvery=8, window=10):
+        self.every = every
+        self.qualityEvery = 1
+        self.budget = budget
+        self.maxEvery = maxEvery
+        self.inferenceTimes = deque(maxlen=window)  # seconds
+        self.frameTimes = deque(maxlen=window)  # seconds between captured frames
+        self.lastFrame = None
+        self.framesSince = None  # None until the first inference
+        self.currentEvery = every
+
+    @property
+    def decimating(self):
+        return self.every > 1 or self.budget is not None
+
+    def shouldInfer(self, now):
+        if self.lastFrame is not None:
+            self.frameTimes.append(now - self.lastFrame)
+        self.lastFrame = now
+        self.currentEvery = max(self.every, self.qualityEvery, self._budgetEvery())
+        if self.framesSince is not None:
+            self.framesSince += 1
+            if self.framesSince < self.currentEvery:
+                return False
+        self.framesSince = 0
+        return True
+
+    def record(self, seconds):
+        self.inferenceTimes.append(seconds)
+
+    def _budgetEvery(self):
+        if self.budget is None or not self.inferenceTimes or not self.frameTimes:
+            return 1
+        inference = sum(self.inferenceTimes) / len(self.inferenceTimes)
+        frame = max(sum(self.frameTimes) / len(self.frameTimes), 1e-6)
+        return min(self.maxEvery, max(1, math.ceil(inference / (self.budget * frame))))
+
+
+# Landmark counterpart of a `prepare` that mirrors the frame (cv2.flip(img, 1)):
+# normalized x runs the other way, y and visibility stay
+def mirrorLandmarks(landmarks, shape):
+    return {name: (1 - x, y, visibility) for name, (x, y, visibility) in landmarks.items()}
+
+
+# Producer/consumer pipeline: a capture thread keeps only the newest webcam
+# frame, an inference thread runs the tracker on it and publishes timestamped
+# landmarks, and the render loop picks up the latest result without blocking.
+# With threaded=False both stages run inline in latest(), one frame per call,
+# which keeps headless runs deterministic. Packets are also stamped with
+# `timeSource` (the game clock) so landmark filters see game time.
+#
+# Recorded traces hand over landmarks already in the game's coordinates. A
+# source with `cameraLandmarks` set (landmark_service.py) found them on the raw
+# camera frame instead, so they go through `prepareLandmarks(landmarks, shape
+# of the raw frame)`, which has to move them the way `prepare` moves the
+# pixels. A game that changes the frame's geometry without one cannot use such
+# a source: its controls would come out mirrored or rotated.
+class CapturePipeline:
+    def __init__(self, cap, tracker, prepare=None, stopOnFailure=True, threaded=True, profiler=None,
+                 timeSource=None, scheduler=None, prepareLandmarks=None):
+        if prepare is not None and prepareLandmarks is None and getattr(cap, "cameraLandmarks", False):
+            raise ValueError("this game flips or rotates the camera frame and cannot use "
+                             "landmarks from the landmark service")
+        self.cap = cap
+        self.tracker = tracker  # may be None when the source provides recorded landmarks
+        self.prepare = prepare  # optional BGR -> BGR step (flip, resize) run on the capture thread
+        self.prepareLandmarks = prepareLandmarks if getattr(cap, "cameraLandmarks", False) else None
+        self.stopOnFailure = stopOnFailure
+        self.threaded = threaded
+        self.frames = LatestSlot()
+        self.results = LatestSlot()
+        self.stats = StageStats()
+        self.profiler = profiler  # gets per-frame capture/inference times in synchronous mode
+        self.timeSource = timeSource or time.perf_counter
+        self.stopEvent = threading.Event()
+        self.failed = False
+        self.droppedFrames = 0
+        self.lastSeq = 0
+        self.threads = []
+
+        # Quality knobs, changed through configure() and applied by the thread that owns them
+        self.inputScale = 1.0  # resize factor for the tracker input
+        self.scheduler = scheduler or InferenceScheduler()  # which frames run the tracker
+        self.settingsLock = threading.Lock()
+        self.pendingCapture = {}
+        self.pendingInference = {}
+        self.inferenceCount = 0
+        self.lastLandmarks = {}
+
+    def start(self):
+        if not self.threaded:
+            return self
+        self.threads = [threading.Thread(target=self._captureLoop, name="capture", daemon=True),
+                        threading.Thread(target=self._inferenceLoop, name="inference", daemon=True)]
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    @property
+    def inferEvery(self):
+        # Frames per inference right now (quality floor or budget, whichever is larger)
+        return self.scheduler.currentEvery
+
+    def isRunning(self):
+        return not self.failed and not self.stopEvent.is_set()
+
+    def latest(self):
+        if not self.threaded and self.isRunning():
+            frame = self._capture()
+            if frame is not None:
+                self.frames.put(frame)
+                self.results.put(self._infer(self.frames.seq, frame))
+        seq, packet = self.results.get()
+        if packet is not None and seq != self.lastSeq:
+            self.lastSeq = seq
+            self.stats.add("endToEnd", (time.perf_counter() - packet.captureTime) * 1000)
+        return packet
+
+    def configure(self, inputScale=None, inferEvery=None, modelComplexity=None, cameraSize=None):
+        with self.settingsLock:
+            if cameraSize is not None:
+                self.pendingCapture["cameraSize"] = cameraSize
+            for key, value in (("inputScale", inputScale), ("inferEvery", inferEvery),
+                               ("modelComplexity", modelComplexity)):
+                if value is not None:
+                    self.pendingInference[key] = value
+
+    def stop(self):
+        self.stopEvent.set()
+        for thread in self.threads:
+            thread.join(timeout=1.0)
+
+    def latencySummary(self):
+        summary = self.stats.summary()
+        summary["droppedFrames"] = self.droppedFrames
+        summary["inferences"] = self.inferenceCount
+        return summary
+
+    def _capture(self):
+        if self.pendingCapture:
+            with self.settingsLock:
+                pending, self.pendingCapture = self.pendingCapture, {}
+            if "cameraSize" in pending:
+                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, pending["cameraSize"][0])
+                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, pending["cameraSize"][1])
+        start = time.perf_counter()
+        success, img = self.cap.read()
+        if not success:
+            if self.stopOnFailure or not self.threaded:
+                print("Failed to capture image")
+                self.failed = True
+            return None
+        # Recorded traces hand their landmarks over together with the frame
+        recorded = getattr(self.cap, "lastLandmarks", None)
+        if recorded is not None and self.prepareLandmarks is not None:
+            recorded = self.prepareLandmarks(recorded, img.shape)
+        if self.prepare is not None:
+            img = self.prepare(img)
+        elif not img.flags.writeable:
+            # Zero-copy frames (landmark_service.py) are read-only, the games draw on theirs
+            img = img.copy()
+        captureTime = time.perf_counter()
+        captureMs = (captureTime - start) * 1000
+        self._record("capture", captureMs)
+        return img, captureTime, recorded, self.timeSource(), captureMs
+
+    def _infer(self, seq, frame):
+        img, captureTime, recorded, sampleTime, captureMs = frame
+        if self.pendingInference:
+            self._applyInferenceSettings()
+        if recorded is not None:
+            self.lastLandmarks = recorded
+            return FramePacket(seq, img, captureTime, recorded, time.perf_counter(), sampleTime, captureMs)
+
+        if not self.scheduler.shouldInfer(captureTime):
+            # Decimated frame: new image, landmarks from the last inference
+            return FramePacket(seq, img, captureTime, self.lastLandmarks, time.perf_counter(), sampleTime, captureMs)
+
+        start = time.perf_counter()
+        imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        if self.inputScale != 1:
+            imgRGB = cv2.resize(imgRGB, None, fx=self.inputScale, fy=self.inputScale,
+                                interpolation=cv2.INTER_AREA)
+        landmarks = self.tracker.process(imgRGB)
+        publishTime = time.perf_counter()
+        inferenceMs = (publishTime - start) * 1000
+        self.scheduler.record(publishTime - start)
+        self._record("inference", inferenceMs)
+        self.inferenceCount += 1
+        self.lastLandmarks = landmarks
+        return FramePacket(seq, img, captureTime, landmarks, publishTime, sampleTime, captureMs, inferenceMs)
+
+    def _applyInferenceSettings(self):
+        with self.settingsLock:
+            pending, self.pendingInference = self.pendingInference, {}
+        self.inputScale = pending.get("inputScale", self.inputScale)
+        self.scheduler.qualityEvery = pending.get("inferEvery", self.scheduler.qualityEvery)
+        if "modelComplexity" in pending and hasattr(self.tracker, "setModelComplexity"):
+            self.tracker.setModelComplexity(pending["modelComplexity"])
+
+    def _record(self, stage, ms):
+        self.stats.add(stage, ms)
+        if self.profiler is not None and not self.threaded:
+            self.profiler.record(stage, ms)
+
+    def _captureLoop(self):
+        while not self.stopEvent.is_set():
+            frame = self._capture()
+            if frame is not None:
+                self.frames.put(frame)
+            elif self.failed:
+                return
+            else:
+                time.sleep(0.01)
+
+    def _inferenceLoop(self):
+        seq = 0
+        while not self.stopEvent.is_set():
+            newSeq, frame = self.frames.waitNewer(seq, timeout=0.1)
+            if newSeq == seq:
+                continue
+            self.droppedFrames += newSeq - seq - 1
+            seq = newSeq
+            self.results.put(self._infer(seq, frame))
+
+
+def formatLatency(summary):
+    parts = [f"{stage} {values['mean']:.1f}/{values['p95']:.1f} ms"
+             for stage, values in summary.items() if isinstance(values, dict)]
+    parts.append(f"dropped {summary.get('droppedFrames', 0)}")
+    parts.append(f"inferences {summary.get('inferences', 0)}")
+    return "Pipeline latency (mean/p95): " + ", ".join(parts)
@@ -0,0 +1,87 @@
+# Tracks the physics entities a game spawns (anything with `body`, `shape` and a
+# width/height or image) and takes them out of the pymunk space once they are
+# done: sliced, eaten or caught by the game, or culled here after leaving the
+# playfield. Released entities are handed to `onRelease` so they can be reused.
+# With a PhysicsClock, a (re)spawned body is not interpolated from where it was
+# before it got reused. On an array_physics.ArraySpace the sprite extents are
+# stored with the bodies and cull() tests all entities in one array operation.
+class EntityLifecycle:
+    def __init__(self, space, size, margin=0, onRelease=None, physics=None):
+        self.space = space
+        self.physics = physics
+        self.width, self.height = size  # playfield in physics units
+        self.margin = margin  # extra distance past the edge, on top of half the sprite size
+        self.onRelease = onRelease
+        self.spawned = 0
+        self.released = {}
+        self.peakLive = 0
+        self.bulk = hasattr(space, "offscreen")
+
+    def spawn(self, entity):
+        if entity.body.space is None:
+            self.space.add(entity.body, entity.shape)
+        if self.bulk:
+            self.space.setExtent(entity.body, *self._extent(entity))
+        if self.physics:
+            self.physics.forget(entity.body)
+        self.spawned += 1
+        return entity
+
+    def release(self, entity, reason):
+        if entity.body.space is not None:
+            self.space.remove(entity.body, entity.shape)
+        self.released[reason] = self.released.get(reason, 0) + 1
+        if self.onRelease:
+            self.onRelease(entity)
+
+    def isOffscreen(self, entity):
+        # Gone when past a side edge moving outward, or past the edge gravity pulls
+        # towards. Past the opposite edge gravity still brings the entity back.
+        x, y = entity.body.position
+        vx, vy = entity.body.velocity
+        halfW, halfH = self._extent(entity)
+        if (x < -halfW - self.margin and vx <= 0) or (x > self.width + halfW + self.margin and vx >= 0):
+            return True
+        gravity = self.space.gravity[1]
+        if gravity < 0:
+            return y < -halfH - self.margin and vy <= 0
+        if gravity > 0:
+            return y > self.height + halfH + self.margin and vy >= 0
+        return False
+
+    def cull(self, entities):
+        # Returns (still live, culled); culled entities are already released
+        live, culled = [], []
+        entities = [entity for entity in entities if entity is not None]
+        if self.bulk and all(entity.body.space is self.space for entity in entities):
+            offscreen = self.space.offscreen([entity.body for entity in entities],
+                                             (self.width, self.height), self.margin)
+        else:
+            offscreen = [self.isOffscreen(entity) for entity in entities]
+        for entity, gone in zip(entities, offscreen):
+            if gone:
+                self.release(entity, "offscreen")
+                culled.append(entity)
+            else:
+                live.append(entity)
+        self.peakLive = max(self.peakLive, len(live))
+        return live, culled
+
+    def liveBodies(self):
+        return len(self.space.bodies)
+
+    def stats(self):
+        return {"spawned": self.spawned, "released": dict(self.released),
+                "liveBodies": self.liveBodies(), "peakLive": self.peakLive}
+
+    def _extent(self, entity):
+        if hasattr(entity, "width"):
+            return entity.width / 2, entity.height / 2
+        w, h = entity.image.get_size()
+        return w / 2, h / 2
+
+
+def formatLifecycle(stats):
+    released = ", ".join(f"{reason} {count}" for reason, count in sorted(stats["released"].items()))
+    return (f"Entities: spawned {stats['spawned']}, released ({released or 'none'}), "
+            f"live bodies {stats['liveBodies']}, peak live {stats['peakLive']}")
@@ -0,0 +1,35 @@
+# Free list of game entities. acquire() resets a released entity when one is
+# available and only builds a new one (body, shape and all) when the pool is
+# empty, so spawn bursts do not allocate. Entities need a factory that builds a
+# blank one and a reset(**spawn) that brings it back to a fresh spawn state.
+class EntityPool:
+    def __init__(self, factory, prewarm=0):
+        self.factory = factory
+        self.free = [factory() for _ in range(prewarm)]
+        self.prewarmed = prewarm
+        self.hits = 0
+        self.allocations = 0
+
+    def acquire(self, **spawn):
+        if self.free:
+            entity = self.free.pop()
+            self.hits += 1
+        else:
+            entity = self.factory()
+            self.allocations += 1
+        entity.reset(**spawn)
+        return entity
+
+    def release(self, entity):
+        self.free.append(entity)
+
+    def stats(self):
+        total = self.hits + self.allocations
+        return {"hits": self.hits, "allocations": self.allocations,
+                "hitRate": self.hits / total if total else 0.0,
+                "free": len(self.free), "prewarmed": self.prewarmed}
+
+
+def formatPool(stats):
+    return (f"Pool: {stats['hits']} reused, {stats['allocations']} allocated "
+            f"(hit rate {stats['hitRate']:.0%}), {stats['free']} free, {stats['prewarmed']} prewarmed")
@@ -0,0 +1,51 @@
+import cv2
+import numpy as np
+import pygame
+
+
+# Owns one preallocated BGR buffer wrapped by a pygame surface (no copy), so a
+# camera frame reaches the window with at most one transform and no per-frame
+# surface allocation. OpenCV can still draw on `buffer` before blitting.
+class FramePresenter:
+    def __init__(self, size=None, mirror=False, keepSize=False):
+        self.size = size  # None: keep the camera frame size, else scale to (width, height)
+        self.mirror = mirror
+        self.keepSize = keepSize  # with size None: lock to the first frame's size, scale later frames to it
+        self.buffer = None
+        self.surface = None
+        self.scratch = None
+
+    def _allocate(self, width, height):
+        self.buffer = np.empty((height, width, 3), dtype=np.uint8)
+        self.surface = pygame.image.frombuffer(self.buffer, (width, height), "BGR")
+
+    def load(self, img):
+        h, w = img.shape[:2]
+        if self.size is None and self.keepSize:
+            self.size = (w, h)
+        width, height = self.size or (w, h)
+        if self.buffer is None or self.buffer.shape[:2] != (height, width):
+            self._allocate(width, height)
+
+        if (w, h) == (width, height):
+            if self.mirror:
+                cv2.flip(img, 1, dst=self.buffer)
+            else:
+                np.copyto(self.buffer, img)
+        elif not self.mirror:
+            cv2.resize(img, (width, height), dst=self.buffer, interpolation=cv2.INTER_NEAREST)
+        else:
+            # Scaling and mirroring cannot be fused: mirror at camera size first so
+            # nearest-neighbour sampling matches pygame.transform.scale exactly
+            if self.scratch is None or self.scratch.shape != img.shape:
+                self.scratch = np.empty_like(img)
+            cv2.flip(img, 1, dst=self.scratch)
+            cv2.resize(self.scratch, (width, height), dst=self.buffer, interpolation=cv2.INTER_NEAREST)
+        return self.buffer
+
+    def blit(self, window, pos=(0, 0)):
+        window.blit(self.surface, pos)
+
+    def present(self, img, window, pos=(0, 0)):
+        self.load(img)
+        self.blit(window, pos)
@@ -1,177 +1,338 @@
-import cv2
 import pygame
-import mediapipe as mp
 import random
-import pymunk
-import time
 import math
 import sys
+import time
+from entity_lifecycle import EntityLifecycle, formatLifecycle
+from entity_pool import EntityPool, formatPool
+from game_clock import PhysicsClock
+from hit_test import makeHitIndex, pathDistance
+from hud import TextRenderer
+from multiplayer import Player, playerAt
+from options import GameOptions, parseOptions
+from quality import QualityController
+from session_result import formatResult
+from trackers import wristTracker
 
-# Setup
-pygame.init()
+# Ukuran layar
 width, height = 1280, 720
-screen = pygame.display.set_mode((width, height))
-pygame.display.set_caption("Permainan Tangkap Buah")
-clock = pygame.time.Clock()
-
-cap = cv2.VideoCapture(0)
-mp_pose = mp.solutions.pose
-pose = mp_pose.Pose()
-
-space = pymunk.Space()
-space.gravity = (0, 900)
-
-# Load gambar
-buah_imgs = [pygame.image.load("semangka.png"), pygame.image.load("apel.png")]
-bom_img = pygame.image.load("bom.png")
-keranjang_img = pygame.image.load("keranjang.png")
-
-# Scaling ukuran
-for i in range(len(buah_imgs)):
-    buah_imgs[i] = pygame.transform.scale(buah_imgs[i], (130, 130))
-bom_img = pygame.transform.scale(bom_img, (120, 120))
-keranjang_img = pygame.transform.scale(keranjang_img, (500, 400))
-
-# Font & warna
-font = pygame.font.SysFont(None, 60)
-big_font = pygame.font.SysFont(None, 120)
-black = (0, 0, 0)
-
-# Variabel game
-skor = 0
-nyawa = 3
-durasi = 60
-start_time = time.time()
-game_over = False
-buah_list = []
-next_spawn_time = 0
+
+
+def siapkan_frame(frame):
+    import cv2  # sudah dimuat oleh tahap kamera
+    frame = cv2.flip(frame, 1)
+    h, w = frame.shape[:2]
+    if h > w:
+        frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
+    return cv2.resize(frame, (width, height))
+
+
+def siapkan_landmark(landmarks, shape):
+    # Landmark dari landmark service dihitung pada frame kamera mentah: dicerminkan
+    # dan diputar seperti siapkan_frame (resize tidak mengubah koordinat ternormalisasi)
+    h, w = shape[:2]
+    hasil = {}
+    for nama, (x, y, visibility) in landmarks.items():
+        x = 1 - x
+        if h > w:
+            x, y = 1 - y, x
+        hasil[nama] = (x, y, visibility)
+    return hasil
+
 
 class Objek:
-    def __init__(self, is_bom=False):
-        self.image = bom_img if is_bom else random.choice(buah_imgs)
+    # Atribut tetap: objek dipakai ulang lewat pool, tidak dibuat ulang
+    __slots__ = ("space", "image", "body", "shape", "is_bom")
+
+    def __init__(self, space, image=None, is_bom=False):
+        self.space = space
+        # pymunk dimuat oleh tahap fisika saat startup, bukan sebelum Game()
+        import pymunk
+        from array_physics import makeBody, makeCircle
         mass = 1
         radius = 75
         inertia = pymunk.moment_for_circle(mass, 0, radius)
-        self.body = pymunk.Body(mass, inertia)
-        self.body.position = random.randint(100, width - 100), 0
-        self.shape = pymunk.Circle(self.body, radius)
+        self.body = makeBody(space, mass, inertia)
+        self.shape = makeCircle(self.body, radius)
         self.shape.elasticity = 0.6
+        if image is not None:
+            self.reset(image, is_bom)
+
+    def reset(self, image, is_bom=False):
+        self.image = image
         self.is_bom = is_bom
-        space.add(self.body, self.shape)
+        self.body.position = random.randint(100, width - 100), 0
+        self.body.velocity = 0, 0
+        self.body.angular_velocity = 0
+        self.body.angle = 0
+        if self.body.space is None:
+            self.space.add(self.body, self.shape)
+        return self
 
-    def draw(self, surface):
-        x, y = self.body.position
+    def draw(self, surface, posisi=None):
+        # Posisi hasil interpolasi fisika, default posisi body saat ini
+        x, y = posisi if posisi is not None else self.body.position
         img_rect = self.image.get_rect(center=(int(x), int(y)))
         surface.blit(self.image, img_rect)
 
-running = True
-while running:
-    screen.fill((255, 255, 255))
-    ret, frame = cap.read()
-    if not ret:
-        break
 
-    frame = cv2.flip(frame, 1)
-    h, w = frame.shape[:2]
-    if h > w:
-        frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
-    frame = cv2.resize(frame, (width, height))
-
-    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    hasil = pose.process(rgb)
-
-    tangan_kanan = tangan_kiri = None
-    keranjang_pos = None
-
-    if hasil.pose_landmarks:
-        h_img, w_img, _ = frame.shape
-        tangan_kanan = (
-            int(hasil.pose_landmarks.landmark[mp_pose.PoseLandmark.RIGHT_WRIST].x * w_img),
-            int(hasil.pose_landmarks.landmark[mp_pose.PoseLandmark.RIGHT_WRIST].y * h_img)
-        )
-        tangan_kiri = (
-            int(hasil.pose_landmarks.landmark[mp_pose.PoseLandmark.LEFT_WRIST].x * w_img),
-            int(hasil.pose_landmarks.landmark[mp_pose.PoseLandmark.LEFT_WRIST].y * h_img)
-        )
-
-        if tangan_kanan and tangan_kiri:
-            jarak = math.hypot(tangan_kanan[0] - tangan_kiri[0], tangan_kanan[1] - tangan_kiri[1])
-            if jarak < 100:
-                keranjang_pos = ((tangan_kanan[0] + tangan_kiri[0]) // 2, (tangan_kanan[1] + tangan_kiri[1]) // 2)
-
-    # Tampilkan kamera di layar pygame
-    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    frame = pygame.surfarray.make_surface(frame)
-    frame = pygame.transform.rotate(frame, -90)
-    frame = pygame.transform.flip(frame, True, False)
-    screen.blit(frame, (0, 0))
-
-    if not game_over:
-        if time.time() > next_spawn_time:
-            is_bom = random.random() < 0.2
-            buah_list.append(Objek(is_bom))
-            next_spawn_time = time.time() + 1.5
-
-        for obj in buah_list[:]:
-            obj.draw(screen)
-            x, y = obj.body.position
-
-            if keranjang_pos:
-                jarak_ke_keranjang = math.hypot(x - keranjang_pos[0], y - keranjang_pos[1])
-                if jarak_ke_keranjang < 120:
-                    buah_list.remove(obj)
-                    space.remove(obj.body, obj.shape)
-                    if obj.is_bom:
-                        nyawa -= 1
-                    else:
-                        skor += 1
-                    continue
-
-            if y > height + 100:
-                buah_list.remove(obj)
-                space.remove(obj.body, obj.shape)
-                nyawa -= 1
-
-        if nyawa <= 0:
-            game_over = True
-
-        space.step(1 / 60)
-
-        if keranjang_pos:
-            keranjang_rect = keranjang_img.get_rect(center=keranjang_pos)
-            screen.blit(keranjang_img, keranjang_rect)
-
-        screen.blit(font.render(f"Skor: {skor}", True, (255, 102, 0)), (20, 20))
-        screen.blit(font.render(f"Nyawa: {nyawa}", True, (255, 102, 0)), (20, 80))
-
-        waktu_sisa = max(0, int(durasi - (time.time() - start_time)))
-        screen.blit(font.render(f"Waktu: {waktu_sisa}", True, (255, 102, 0)), (1050, 20))
-
-        if waktu_sisa == 0:
-            game_over = True
-
-    else:
-        screen.fill((0, 200, 100))
-        screen.blit(big_font.render("GAME OVER!!!", True, black), (350, 200))
-        screen.blit(big_font.render(f"Score: {skor}", True, black), (420, 300))
-    
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-        if game_over and event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_r:
-                # Restart
-                skor = 0
-                nyawa = 3
-                start_time = time.time()
-                buah_list.clear()
-                game_over = False
-            elif event.key == pygame.K_q:
+def Game(options=None):
+    options = options or GameOptions()
+
+    # Setup
+    options.setupDisplay()
+    pygame.init()
+    screen = pygame.display.set_mode((width, height))
+    pygame.display.set_caption("Permainan Tangkap Buah")
+    clock = options.makeClock()
+
+    # Gambar dimuat di thread tersendiri, paralel dengan model pose, kamera, dan fisika
+    def muat_gambar(phase):
+        buah_imgs = [pygame.image.load("semangka.png"), pygame.image.load("apel.png")]
+        bom_img = pygame.image.load("bom.png")
+        keranjang_img = pygame.image.load("keranjang.png")
+
+        # Scaling ukuran
+        for i in range(len(buah_imgs)):
+            buah_imgs[i] = pygame.transform.scale(buah_imgs[i], (130, 130))
+        bom_img = pygame.transform.scale(bom_img, (120, 120))
+        keranjang_img = pygame.transform.scale(keranjang_img, (500, 400))
+        if options.players > 1:
+            # Keranjang selebar bagian layar tiap pemain
+            lebar = min(500, width // options.players)
+            keranjang_img = pygame.transform.scale(keranjang_img, (lebar, lebar * 4 // 5))
+        return buah_imgs, bom_img, keranjang_img
+
+    # Layar loading tampil langsung selama model, kamera, dan gambar disiapkan
+    startup = options.makeStartup(screen, clock, wristTracker)
+    startup.add("assets", muat_gambar)
+    startup.add("physics", lambda phase: options.loadSpace((0, 900), phase))
+    tracker, cap, (buah_imgs, bom_img, keranjang_img), space = startup.wait()
+    from capture_pipeline import CapturePipeline, formatLatency
+    from frame_presenter import FramePresenter
+
+    # Kamera dan pose berjalan di thread terpisah
+    profiler = options.makeProfiler()
+    pipeline = CapturePipeline(cap, tracker, prepare=siapkan_frame, prepareLandmarks=siapkan_landmark,
+                               threaded=options.threaded, profiler=profiler, timeSource=clock.now,
+                               scheduler=options.makeScheduler()).start()
+    # Direkam atau diputar ulang dengan --record/--replay
+    pipeline = options.wrapPipeline(pipeline)
+    # Penghalusan One Euro dan prediksi (opsional), ekstrapolasi di antara inferensi yang dilewati
+    landmarkFilter = options.makeLandmarkFilter()
+    presenter = FramePresenter()
+    quality = QualityController(options.targetFps, pipeline, cameraSize=(width, height))
+    # Overlay debug: FPS dan waktu per tahap (--debug-overlay)
+    overlay = options.makeOverlay()
+    # Layar statis disusun sekali dan hanya diperbarui di bagian yang berubah
+    lapisan = options.makeDisplay(screen)
+
+    # Fisika maju dengan langkah tetap 1/60 detik mengikuti waktu game
+    physics = PhysicsClock(space, 1 / 60, clock.now())
+    # Objek yang jatuh keluar layar dikeluarkan dari space (batas lama: height + 100 untuk buah 130 px)
+    # Objek yang dilepas kembali ke pool untuk spawn berikutnya
+    pool = EntityPool(lambda: Objek(space), prewarm=options.poolPrewarm)
+    lifecycle = EntityLifecycle(space, (width, height), margin=35, onRelease=pool.release, physics=physics)
+    # Satu pemain, atau --players pemain berdampingan dengan skor dan nyawa masing-masing.
+    # Tangkapan diuji sepanjang gerakan keranjang sejak frame sebelumnya
+    pemain_list = [Player(i, options.players, lives=3, trail=options.hitTrail) for i in range(options.players)]
+    multiplayer = len(pemain_list) > 1
+    indeks = makeHitIndex(options.hitIndex, space)
+    jarak_tangkap = 120
+
+    # Font & warna (teks di-cache, hanya dirender ulang saat nilainya berubah)
+    hud = TextRenderer()
+    oranye = (255, 102, 0)
+    black = (0, 0, 0)
+
+    # Variabel game
+    durasi = 60
+    start_time = clock.now() - options.startAt
+    game_over = False
+    buah_list = []
+    next_spawn_time = 0
+
+    bom_tertangkap = 0
+    running = True
+    frame_count = 0
+    options.startSession("fruit_catcher", clock)
+    while running and pipeline.isRunning():
+        frame_count += 1
+        if options.maxFrames and frame_count > options.maxFrames:
+            break
+        if game_over and options.exitOnGameOver:
+            break
+
+        # Frame + landmark terbaru dari pipeline, tidak menunggu inferensi. Frame baru
+        # dimulai setelah ada paket, jadi jeda kamera tidak mengacaukan pengukuran
+        awal_frame = time.perf_counter()
+        paket = pipeline.latest()
+        if paket is None:
+            # Kamera belum siap: jendela tetap bisa ditutup
+            if any(event.type == pygame.QUIT for event in options.events()):
+                break
+            clock.tick(60)
+            continue
+        profiler.beginFrame(awal_frame)
+        quality.beginFrame(awal_frame)
+        profiler.lap("pipeline")
+        frame = paket.image
+
+        # Posisi keranjang tiap pemain yang masih bermain (point), None jika tangan berjauhan
+        landmark = landmarkFilter.apply(paket, clock.now())
+        for pemain in pemain_list:
+            pemain.point = None
+            tangan = pemain.landmarks(landmark) if pemain.lives > 0 or options.endless else {}
+            if tangan:
+                h_img, w_img, _ = frame.shape
+                kanan = tangan["right_wrist"]
+                kiri = tangan["left_wrist"]
+                tangan_kanan = (int(kanan[0] * w_img), int(kanan[1] * h_img))
+                tangan_kiri = (int(kiri[0] * w_img), int(kiri[1] * h_img))
+
+                jarak = math.hypot(tangan_kanan[0] - tangan_kiri[0], tangan_kanan[1] - tangan_kiri[1])
+                if jarak < 100:
+                    pemain.point = ((tangan_kanan[0] + tangan_kiri[0]) // 2, (tangan_kanan[1] + tangan_kiri[1]) // 2)
+
+        if not game_over:
+            # Tampilkan kamera di layar pygame
+            screen.fill((255, 255, 255))
+            presenter.present(frame, screen)
+            if multiplayer:
+                for pemain in pemain_list[1:]:
+                    x0, _ = pemain.pixelRegion(width)
+                    pygame.draw.line(screen, (255, 255, 255), (x0, 0), (x0, height), 2)
+            profiler.lap("present")
+
+            if clock.now() > next_spawn_time:
+                is_bom = random.random() < 0.2
+                buah_list.append(lifecycle.spawn(pool.acquire(image=bom_img if is_bom else random.choice(buah_imgs),
+                                                              is_bom=is_bom)))
+                next_spawn_time = clock.now() + 1.5
+            while len(buah_list) < options.minFruits:
+                is_bom = random.random() < 0.2
+                buah_list.append(lifecycle.spawn(pool.acquire(image=bom_img if is_bom else random.choice(buah_imgs),
+                                                              is_bom=is_bom)))
+            profiler.lap("spawn")
+
+            # Saring dulu lewat indeks spasial, uji jarak hanya untuk objek di dekat jejak
+            indeks.update()
+            for pemain in pemain_list:
+                pemain.trail.push(pemain.point)
+                pemain.nearby = indeks.nearby(pemain.trail.path(), jarak_tangkap) if pemain.point else set()
+            # Posisi semua buah dibaca sekali per frame
+            keadaan = physics.snapshot()
+            for obj in buah_list[:]:
+                obj.draw(screen, keadaan.drawPosition(obj.body))
+
+                for pemain in pemain_list:
+                    jejak = pemain.trail.path()
+                    if obj.body in pemain.nearby and pathDistance(jejak, keadaan.position(obj.body)) < jarak_tangkap:
+                        buah_list.remove(obj)
+                        lifecycle.release(obj, "tertangkap")
+                        if obj.is_bom:
+                            pemain.lives -= 1
+                            bom_tertangkap += 1
+                        else:
+                            pemain.score += 1
+                        break
+
+            # Buah yang lolos keluar layar mengurangi nyawa pemain di bagian layar tempat buah itu keluar
+            buah_list, lolos = lifecycle.cull(buah_list)
+            for obj in lolos:
+                pemain = playerAt(pemain_list, obj.body.position.x, width)
+                if pemain.lives > 0 or not multiplayer:
+                    pemain.lives -= 1
+
+            if all(pemain.lives <= 0 for pemain in pemain_list) and not options.endless:
+                game_over = True
+            profiler.lap("fruits")
+
+            physics.update(clock.now())
+            profiler.lap("physics")
+
+            for pemain in pemain_list:
+                if pemain.point:
+                    keranjang_rect = keranjang_img.get_rect(center=pemain.point)
+                    screen.blit(keranjang_img, keranjang_rect)
+
+            waktu_sisa = max(0, int(durasi - (clock.now() - start_time)))
+            if not multiplayer:
+                hud.draw(screen, f"Skor: {pemain_list[0].score}", (20, 20), 60, oranye)
+                hud.draw(screen, f"Nyawa: {pemain_list[0].lives}", (20, 80), 60, oranye)
+                hud.draw(screen, f"Waktu: {waktu_sisa}", (1050, 20), 60, oranye)
+            else:
+                # Skor dan nyawa tiap pemain di atas bagian layarnya
+                for pemain in pemain_list:
+                    x0, _ = pemain.pixelRegion(width)
+                    hud.draw(screen, f"{pemain.name} Skor: {pemain.score}", (x0 + 20, 20), 48, oranye)
+                    hud.draw(screen, f"Nyawa: {pemain.lives}", (x0 + 20, 65), 48, oranye)
+                hud.draw(screen, f"Waktu: {waktu_sisa}", (width // 2, height - 40), 60, oranye, center=True)
+
+            if waktu_sisa == 0:
+                game_over = True
+            profiler.lap("hud")
+
+        else:
+            skor = tuple(pemain.score for pemain in pemain_list)
+
+            def gambar_game_over(surface):
+                surface.fill((0, 200, 100))
+                hud.draw(surface, "GAME OVER!!!", (350, 200), 120, black)
+                if not multiplayer:
+                    hud.draw(surface, f"Score: {skor[0]}", (420, 300), 120, black)
+                else:
+                    for i, pemain in enumerate(pemain_list):
+                        hud.draw(surface, f"{pemain.name}: {pemain.score}", (450, 300 + 80 * i), 80, black)
+
+            # Disusun sekali, frame berikutnya hanya menggambar ulang overlay debug
+            lapisan.showStatic(skor, gambar_game_over)
+            profiler.lap("hud")
+
+        for event in options.events():
+            if event.type == pygame.QUIT:
                 running = False
 
-    pygame.display.update()
-    clock.tick(60)
+            if game_over and event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_r:
+                    # Restart
+                    for pemain in pemain_list:
+                        pemain.score = 0
+                        pemain.lives = 3
+                    start_time = clock.now()
+                    physics.reset(clock.now())
+                    for obj in buah_list:
+                        lifecycle.release(obj, "restart")
+                    buah_list.clear()
+                    game_over = False
+                elif event.key == pygame.K_q:
+                    running = False
+
+        profiler.sample(paket, len(buah_list))
+        lapisan.update(overlay.draw(screen))
+        options.frameShown()
+        profiler.lap("display")
+        quality.endFrame()
+        clock.tick(60)
+        profiler.lap("tick")
+        profiler.endFrame()
+
+    pipeline.stop()
+    print(formatLatency(pipeline.latencySummary()))
+    print(formatLifecycle(lifecycle.stats()))
+    print(formatPool(pool.stats()))
+    # Skor dan nyawa dari permainan terakhir (setelah restart), hitungan dari seluruh sesi
+    result = options.finishSession(score=sum(pemain.score for pemain in pemain_list),
+                                   lives=sum(pemain.lives for pemain in pemain_list), lifecycle=lifecycle,
+                                   sliced=lifecycle.released.get("tertangkap", 0) - bom_tertangkap,
+                                   bombs=bom_tertangkap, players=pemain_list if multiplayer else None)
+    print(formatResult(result))
+    if tracker:
+        tracker.close()
+    cap.release()
+    options.closeDisplay()
+    return result
+
 
-cap.release()
-pygame.quit()
+if __name__ == "__main__":
+    Game(parseOptions(description="Fruit Catcher"))
@@ -1,70 +1,76 @@
 import pygame
-import pymunk
 import random
 import os
-import cv2
-import numpy as np
-import mediapipe as mp
+import math
 import time
+from asset_cache import getCache, preloadFruits
+from entity_lifecycle import EntityLifecycle, formatLifecycle
+from entity_pool import EntityPool, formatPool
+from game_clock import PhysicsClock
+from hit_test import makeHitIndex
+from hud import TextRenderer
+from options import GameOptions, parseOptions
+from quality import QualityController
+from session_result import formatResult
+from trackers import mouthTracker
 
 class Fruit:
-    def __init__(self, space, path, scale=1, grid=(2, 4),
-                 animationFrames=None, speedAnimation=1, speed=3, pathSoundSlice=None):
-        # Loading Main Image
+    # Fixed attribute set: fruits are pooled and reset, never grown
+    __slots__ = ("scale", "imgList", "img", "rectImg", "path", "animationCount", "speedAnimation",
+                 "isAnimating", "speed", "pathSoundSlice", "soundSlice", "slice", "widthWindow",
+                 "heightWindow", "pos", "mass", "moment", "body", "shape", "space", "isStartingFrame",
+                 "width", "height", "isBomb")
+
+    def __init__(self, space, path=None, **spawn):
+        self.widthWindow, self.heightWindow = pygame.display.get_surface().get_size()
+        self.rectImg = pygame.Rect(0, 0, 0, 0)
+
+        # Physics (body and shape live as long as the fruit and are reused on reset)
+        # (pymunk was imported by the physics startup phase, not before Game())
+        import pymunk
+        from array_physics import makeBody, makeCircle
+        self.mass = 1
+        self.moment = pymunk.moment_for_circle(self.mass, 0, 30)
+        self.body = makeBody(space, self.mass, self.moment)
+        self.shape = makeCircle(self.body, 30)
+        self.space = space
+        if path:
+            self.reset(path, **spawn)
+
+    def reset(self, path, scale=1, grid=(2, 4),
+              animationFrames=None, speedAnimation=1, speed=3, pathSoundSlice=None):
+        # Frames come from the shared cache, so fruits of one type share one list
         self.scale = scale
-        img = pygame.image.load(path).convert_alpha()
-        width, height = img.get_size()
-        img = pygame.transform.smoothscale(img, (int(width * self.scale), (int(height * self.scale))))
-        width, height = img.get_size()
-
-        # Split image to get all frames
-        if animationFrames is None:  # When animation frames is not defined then use all frames
-            animationFrames = grid[0] * grid[1]
-        widthSingleFrame = width / grid[1]
-        heightSingleFrame = height / grid[0]
-        self.imgList = []
-        counter = 0
-        for row in range(grid[0]):
-            for col in range(grid[1]):
-                counter += 1
-                if counter <= animationFrames:
-                    imgCrop = img.subsurface(col * widthSingleFrame, row * heightSingleFrame,
-                                              widthSingleFrame, heightSingleFrame)
-                    self.imgList.append(imgCrop)
+        self.imgList = getCache().getFrames(path, scale, grid, animationFrames)
 
         self.img = self.imgList[0]
-        self.rectImg = self.img.get_rect()
+        self.rectImg.size = self.img.get_size()
         self.path = path
         self.animationCount = 0
         self.speedAnimation = speedAnimation
         self.isAnimating = False
         self.speed = speed
         self.pathSoundSlice = pathSoundSlice
-        if self.pathSoundSlice:
-            self.soundSlice = pygame.mixer.Sound(self.pathSoundSlice)
+        self.soundSlice = getCache().getSound(self.pathSoundSlice) if self.pathSoundSlice else None
         self.slice = False
 
-        self.widthWindow, self.heightWindow = pygame.display.get_surface().get_size()
         self.pos = random.randint(0, self.widthWindow), 100
 
         # Physics
-        self.mass = 1
-        self.moment = pymunk.moment_for_circle(self.mass, 0, 30)
-        self.body = pymunk.Body(self.mass, self.moment)
-        self.shape = pymunk.Circle(self.body, 30)
-        self.shape.body.position = self.pos
-        self.space = space
-        self.space.add(self.body, self.shape)
+        self.body.position = self.pos
+        self.body.velocity = 0, 0
+        self.body.angular_velocity = 0
+        self.body.angle = 0
+        if self.body.space is None:
+            self.space.add(self.body, self.shape)
 
         self.isStartingFrame = True
         self.width, self.height = self.img.get_size()
 
-        if "bomb" in path:
-            self.isBomb = True
-        else:
-            self.isBomb = False
+        self.isBomb = "bomb" in path
+        return self
 
-    def draw(self, window):
+    def draw(self, window, position=None):
         if self.isStartingFrame:
             if self.pos[0] < self.widthWindow // 2:
                 randX = random.randint(-200, 200)
@@ -74,16 +80,27 @@ class Fruit:
             self.shape.body.apply_impulse_at_local_point((randX, -randY), (0, 0))  # Negative for downward
             self.isStartingFrame = False
 
-        # Draw
-        x, y = int(self.body.position[0]), self.heightWindow - int(self.body.position[1])
+        # Draw (at the interpolated physics position when one is given)
+        if position is None:
+            position = self.body.position
+        x, y = int(position[0]), self.heightWindow - int(position[1])
         self.rectImg.x, self.rectImg.y = x - self.width // 2, y - self.height // 2
         window.blit(self.img, self.rectImg)
 
+    def hitReach(self):
+        # Farthest the sprite rect reaches from the fruit centre
+        return math.hypot(self.width, self.height) * 0.5
+
     def get_rect(self):
         return self.rectImg 
 
-def Game():
+def Game(options=None):
+    options = options or GameOptions()
+    if options.players > 1:
+        raise ValueError("Fruit Eater is single-player, --players works in Nose Fruit and Fruit Catcher")
+
     # Initialize
+    options.setupDisplay()
     pygame.init()
     pygame.mixer.init()
     pygame.event.clear()
@@ -95,43 +112,73 @@ def Game():
 
     # Clock
     fps = 23
-    clock = pygame.time.Clock()
-
-    # Images
+    clock = options.makeClock()
+    hud = TextRenderer()
+
+    # Face mesh (for mouth), webcam, physics and sprites load in parallel behind a loading screen
+    def loadImages(phase):
+        return pygame.image.load("./fru.jpg").convert()
+
+    startup = options.makeStartup(window, clock, mouthTracker, cameraSize=(width, height))
+    startup.add("assets", loadImages)
+    # Standard gravity for natural falling
+    startup.add("physics", lambda phase: options.loadSpace((0.0, -100.0), phase))
+    # Fruit sprite sheets keep decoding after the first frame, a spawn that needs one first decodes it itself
+    startup.add("sprites", lambda phase: preloadFruits(stopped=phase.stopped), background=True)
     try:
-        imgGameOver = pygame.image.load("./fru.jpg").convert()
-    except FileNotFoundError:
-        print("File 'fru.jpg' not found. Please check the path.")
-        pygame.quit()
+        tracker, cap, imgGameOver, space = startup.wait()
+    except FileNotFoundError as e:
+        print(f"{e}. Please check the path.")
+        options.closeDisplay()
         return
-
-    # MediaPipe Face Mesh (for mouth)
-    mp_face_mesh = mp.solutions.face_mesh
-    face_mesh = mp_face_mesh.FaceMesh(max_num_faces=1, refine_landmarks=True, min_detection_confidence=0.7)
-
-    # Webcam
-    cap = cv2.VideoCapture(0)
     if not cap.isOpened():
         print("Error: Could not open webcam.")
-        pygame.quit()
+        options.closeDisplay()
         return
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    # Frame handling needs cv2, which the camera phase has imported by now
+    import cv2
+    from array_physics import attract
+    from capture_pipeline import CapturePipeline, formatLatency
+    from frame_presenter import FramePresenter
+
+    # Capture and face mesh inference run on background threads
+    profiler = options.makeProfiler()
+    pipeline = CapturePipeline(cap, tracker, stopOnFailure=not options.live,
+                               threaded=options.threaded, profiler=profiler, timeSource=clock.now,
+                               scheduler=options.makeScheduler()).start()
+    # Recorded or replayed with --record/--replay
+    pipeline = options.wrapPipeline(pipeline)
+    # Optional One Euro smoothing and prediction, extrapolation between decimated inferences
+    landmarkFilter = options.makeLandmarkFilter()
+    presenter = FramePresenter((width, height), mirror=True)
+    quality = QualityController(options.targetFps, pipeline, cameraSize=(width, height))
+    # Rolling FPS and stage timings on screen (--debug-overlay)
+    overlay = options.makeOverlay()
+    # Static screens are composited once and updated only where they change
+    layers = options.makeDisplay(window)
 
     # Physics
-    space = pymunk.Space()
-    space.gravity = (0.0, -100.0)  # Standard gravity for natural falling
+    # Fixed 1/fps sub-steps follow the game clock, not the number of rendered frames
+    physics = PhysicsClock(space, 1 / fps, clock.now())
+    # Released fruits go back to the pool for the next spawn
+    pool = EntityPool(lambda: Fruit(space), prewarm=options.poolPrewarm)
+    # Uneaten fruits leave the space once they fall out of the window
+    lifecycle = EntityLifecycle(space, (width, height), onRelease=pool.release, physics=physics)
+    # Only fruits near the mouth get the collision test
+    hitIndex = makeHitIndex(options.hitIndex, space, toSpace=lambda point: (point[0], height - point[1]))
+    hitReach = 0  # largest sprite reach of any spawned fruit
 
     # Parameters
     timeTotal = 60
     fruits_eaten = 0
+    bombs_eaten = 0
     mouth_open_threshold = 0.03
     attraction_threshold = 100  # Distance threshold for mouth attraction
 
     # Variables
     fruitList = []
-    timeGenerator = time.time()
-    timeStart = time.time()
+    timeGenerator = clock.now()
+    timeStart = clock.now() - options.startAt
     gameOver = False
     score = 0
 
@@ -144,38 +191,44 @@ def Game():
     pathFruitFolder = "./Fruits"
     if not os.path.exists(pathFruitFolder):
         print(f"Fruit folder '{pathFruitFolder}' not found.")
-        pygame.quit()
+        options.closeDisplay()
         return
         
-    pathListFruit = os.listdir(pathFruitFolder)
+    pathListFruit = sorted(os.listdir(pathFruitFolder))  # same order on every machine, for replays
 
     def generateFruit():
+        nonlocal hitReach
         randomScale = round(random.uniform(0.6, 0.8), 2)
         randomFruitPath = pathListFruit[random.randint(0, len(pathListFruit) - 1)]
         pathSoundSlice = './explosion.wav' if "bomb" in randomFruitPath else './slice.wav'
-        fruit = Fruit(space, path=os.path.join(pathFruitFolder, randomFruitPath),
-                      grid=(4, 4), animationFrames=14, scale=randomScale,
-                      pathSoundSlice=pathSoundSlice)
+        fruit = pool.acquire(path=os.path.join(pathFruitFolder, randomFruitPath),
+                             grid=(4, 4), animationFrames=14, scale=randomScale,
+                             pathSoundSlice=pathSoundSlice)
         fruit.body.position = (random.randint(100, width - 100), height + 50)  # Start from top
-        fruitList.append(fruit)
+        space.reindex_shapes_for_body(fruit.body)  # moved outside a step, keep pymunk's index in sync
+        hitReach = max(hitReach, fruit.hitReach())
+        fruitList.append(lifecycle.spawn(fruit))
 
     def is_mouth_open(landmarks, img_w, img_h):
-        upper_lip = landmarks[13]
-        lower_lip = landmarks[14]
-        mouth_height = abs(lower_lip.y * img_h - upper_lip.y * img_h) / img_h
+        upper_lip = landmarks["upper_lip"]
+        lower_lip = landmarks["lower_lip"]
+        mouth_height = abs(lower_lip[1] * img_h - upper_lip[1] * img_h) / img_h
         return mouth_height > mouth_open_threshold
 
     def get_mouth_position(landmarks, img_w, img_h):
-        upper_lip = landmarks[13]
-        lower_lip = landmarks[14]
-        mouth_x = int((upper_lip.x + lower_lip.x) / 2 * img_w)
-        mouth_y = int((upper_lip.y + lower_lip.y) / 2 * img_h)
+        upper_lip = landmarks["upper_lip"]
+        lower_lip = landmarks["lower_lip"]
+        mouth_x = int((upper_lip[0] + lower_lip[0]) / 2 * img_w)
+        mouth_y = int((upper_lip[1] + lower_lip[1]) / 2 * img_h)
         return mouth_x, mouth_y
 
     # Main Loop
     running = True
-    while cap.isOpened() and running:
-        for event in pygame.event.get():
+    frameCount = 0
+    packet = None
+    options.startSession("fruit_eater", clock)
+    while pipeline.isRunning() and running:
+        for event in options.events():
             if event.type == pygame.QUIT:
                 running = False
                 break
@@ -183,99 +236,133 @@ def Game():
         if not running:
             break
 
-        if not gameOver and running:
-            success, img = cap.read()
-            if not success:
+        frameCount += 1
+        if options.maxFrames and frameCount > options.maxFrames:
+            break
+        if gameOver and options.exitOnGameOver:
+            break
+
+        # Latest frame + mouth landmarks from the pipeline, never blocks. The frame
+        # is only begun once there is a packet, so stalls do not skew the timings
+        frameStart = time.perf_counter()
+        if not gameOver:
+            packet = pipeline.latest()
+            if packet is None:
+                clock.tick(fps)
                 continue
+        profiler.beginFrame(frameStart)
+        quality.beginFrame(frameStart)
+        if not gameOver and running:
+            profiler.lap("pipeline")
+            img = packet.image
             h, w = img.shape[:2]
 
-            # Process Face Mesh (mouth)
-            img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-            results = face_mesh.process(img_rgb)
             mouth_open = False
             mouth_pos = (w // 2, h // 2)
-            if results.multi_face_landmarks:
-                for face_landmarks in results.multi_face_landmarks:
-                    landmarks = face_landmarks.landmark
-                    mouth_open = is_mouth_open(landmarks, w, h)
-                    mouth_pos = get_mouth_position(landmarks, w, h)
-                    cv2.circle(img, mouth_pos, 10, yellow, -1)
-
-            # Display webcam feed
-            frame = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-            frame = np.rot90(frame)
-            frame = pygame.surfarray.make_surface(frame)
-            frame = pygame.transform.scale(frame, (width, height))
-            window.blit(frame, (0, 0))
+            landmarks = landmarkFilter.apply(packet, clock.now())
+            if landmarks:
+                mouth_open = is_mouth_open(landmarks, w, h)
+                mouth_pos = get_mouth_position(landmarks, w, h)
+
+            # Display webcam feed (mirrored and scaled to the window). The mouth
+            # marker goes on the presenter's copy: the pipeline hands out the same
+            # frame until the next capture, markers drawn on it would pile up
+            buffer = presenter.load(img)
+            if landmarks:
+                scaleX, scaleY = width / w, height / h
+                markerPos = (int((w - 1 - mouth_pos[0]) * scaleX), int(mouth_pos[1] * scaleY))
+                cv2.circle(buffer, markerPos, max(1, round(10 * scaleX)), yellow, -1)
+            presenter.blit(window)
+            profiler.lap("present")
 
             # Generate fruits
-            if time.time() - timeGenerator > 1:
+            if clock.now() - timeGenerator > 1:
+                generateFruit()
+                timeGenerator = clock.now()
+            while len(fruitList) < options.minFruits:
                 generateFruit()
-                timeGenerator = time.time()
+            profiler.lap("spawn")
 
             # Update fruits
+            mouth_rect = pygame.Rect(mouth_pos[0] - 20, height - (mouth_pos[1] + 20), 40, 40)
+            nearby = set()
+            if mouth_open:
+                # Reach covers the sprite, the mouth box and the interpolated draw position
+                hitIndex.update()
+                nearby = hitIndex.nearby([mouth_rect.center], hitReach + 30 + 50)
+                # Only attract to mouth if close enough, elsewhere gravity works
+                # (every fruit in the space at once, see array_physics.attract)
+                attract(space, (mouth_pos[0], height - mouth_pos[1]), attraction_threshold, 300)
+            snapshot = physics.snapshot()
             for i, fruit in enumerate(fruitList):
                 if fruit:
-                    fruit_pos = fruit.body.position
-                    target_x, target_y = mouth_pos
-                    target_x = target_x
-                    target_y = height - target_y
-                    dx = target_x - fruit_pos.x
-                    dy = target_y - fruit_pos.y
-                    distance = (dx**2 + dy**2)**0.5
-
-                    # Only attract to mouth if close enough
-                    if distance < attraction_threshold and mouth_open:
-                        if distance > 0:
-                            speed = 300
-                            fruit.body.velocity = (dx / distance * speed, dy / distance * speed)
-                    else:
-                        # Let gravity work
-                        pass
-
-                    fruit.draw(window)
+                    fruit.draw(window, snapshot.drawPosition(fruit.body))
 
                     fruit_rect = fruit.get_rect()
-                    mouth_rect = pygame.Rect(mouth_pos[0] - 20, height - (mouth_pos[1] + 20), 40, 40)
-                    if mouth_open and fruit_rect.colliderect(mouth_rect):
+                    if fruit.body in nearby and fruit_rect.colliderect(mouth_rect):
                         if fruit.isBomb:
-                            gameOver = True
-                            pygame.mixer.music.stop()
+                            bombs_eaten += 1
+                            if options.endless:
+                                lifecycle.release(fruit, "bomb")
+                                fruitList[i] = None
+                            else:
+                                gameOver = True
+                                pygame.mixer.music.stop()
                         else:
+                            lifecycle.release(fruit, "eaten")
                             fruitList[i] = None
                             fruits_eaten += 1
                             score += 1
-                            pygame.mixer.Sound('./slice.wav').play()
+                            getCache().getSound('./slice.wav').play()
 
-            fruitList = [f for f in fruitList if f is not None]
+            fruitList, _ = lifecycle.cull(fruitList)
+            profiler.lap("fruits")
 
             # Time and score
-            timeLeft = int(timeTotal - (time.time() - timeStart))
+            timeLeft = int(timeTotal - (clock.now() - timeStart))
             if timeLeft <= 0:
                 gameOver = True
                 pygame.mixer.music.stop()
 
-            font = pygame.font.Font(None, 60)
-            textScore = font.render(f"Score: {score}", True, blue)
-            textTime = font.render(f"Time: {timeLeft}", True, blue)
-            window.blit(textScore, (225, 35))
-            window.blit(textTime, (1100, 38))
+            hud.draw(window, f"Score: {score}", (225, 35), 60, blue)
+            hud.draw(window, f"Time: {timeLeft}", (1100, 38), 60, blue)
+            profiler.lap("hud")
 
         elif running:
-            window.blit(imgGameOver, (0, 0))
-            font = pygame.font.Font(None, 150)
-            textLose = font.render("Game Over!", True, black)
-            textScore = font.render(f"Score: {score}", True, black)
-            window.blit(textLose, (400, 143))
-            window.blit(textScore, (350, 243))
-
-        pygame.display.update()
+            def drawGameOver(surface):
+                surface.blit(imgGameOver, (0, 0))
+                hud.draw(surface, "Game Over!", (400, 143), 150, black)
+                hud.draw(surface, f"Score: {score}", (350, 243), 150, black)
+
+            # Composited once, later frames only redraw the debug overlay
+            layers.showStatic(score, drawGameOver)
+            profiler.lap("hud")
+
+        profiler.sample(packet, len(fruitList))
+        layers.update(overlay.draw(window))
+        options.frameShown()
+        profiler.lap("display")
+        quality.endFrame()
         clock.tick(fps)
-        space.step(1 / fps)
+        profiler.lap("tick")
+        physics.update(clock.now())
+        profiler.lap("physics")
+        profiler.endFrame()
 
     # Clean up
+    pipeline.stop()
+    print(formatLatency(pipeline.latencySummary()))
+    print(formatLifecycle(lifecycle.stats()))
+    print(formatPool(pool.stats()))
+    # Fruit Eater has no lives, a bomb ends the game
+    result = options.finishSession(score=score, lives=None, lifecycle=lifecycle,
+                                   sliced=fruits_eaten, bombs=bombs_eaten)
+    print(formatResult(result))
+    if tracker:
+        tracker.close()
     cap.release()
-    pygame.quit()
+    options.closeDisplay()
+    return result
 
 if __name__ == "__main__":
-    Game()
\ No newline at end of file
+    Game(parseOptions(description="Fruit Eater"))
\ No newline at end of file
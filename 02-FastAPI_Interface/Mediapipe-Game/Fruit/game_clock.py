@@ -0,0 +1,121 @@
+import time
+
+import pygame
+
+
+# Wall-clock timing: now() is time.time() and tick() sleeps like pygame's Clock
+class RealClock:
+    def __init__(self):
+        self.clock = pygame.time.Clock()
+
+    def now(self):
+        return time.time()
+
+    def tick(self, fps=0):
+        return self.clock.tick(fps)
+
+
+# Simulated timing for headless runs: every tick advances exactly 1/fps
+# seconds without sleeping, so a session runs as fast as the machine allows
+# and produces the same timeline on every run.
+class SimulatedClock:
+    def __init__(self, start=0.0, defaultFps=60):
+        self.time = start
+        self.defaultFps = defaultFps
+
+    def now(self):
+        return self.time
+
+    def tick(self, fps=0):
+        step = 1 / (fps or self.defaultFps)
+        self.time += step
+        return int(step * 1000)
+
+
+# Fixed-timestep physics driven by elapsed game time. Time accumulates and the
+# space is stepped in fixed sub-steps of `dt`, so fruit motion follows the same
+# clock as the timers whatever the frame rate. At most `maxSteps` sub-steps run
+# per update; time beyond that is dropped instead of spiralling. Drawing uses
+# position(), which interpolates between the last two physics states. A space
+# that keeps its own position snapshot (array_physics.ArraySpace) is asked for
+# it instead of copying every body's position into a dict.
+class PhysicsClock:
+    def __init__(self, space, dt, start, maxSteps=5):
+        self.space = space
+        self.dt = dt
+        self.maxSteps = maxSteps
+        self.lastTime = start
+        self.accumulator = 0.0
+        self.alpha = 0.0
+        self.previous = {}
+        self.bulk = hasattr(space, "savePositions")
+        self.steps = 0
+        self.droppedTime = 0.0
+
+    def update(self, now):
+        self.accumulator += max(0.0, now - self.lastTime)
+        self.lastTime = now
+        # The epsilon keeps float drift from turning one due step into 0 then 2
+        steps = int(self.accumulator / self.dt + 1e-6)
+        if steps > self.maxSteps:
+            self.droppedTime += (steps - self.maxSteps) * self.dt
+            self.accumulator -= (steps - self.maxSteps) * self.dt
+            steps = self.maxSteps
+        for i in range(steps):
+            if i == steps - 1:
+                # Only the state before the last sub-step is needed to interpolate
+                if self.bulk:
+                    self.space.savePositions()
+                else:
+                    self.previous = {body: body.position for body in self.space.bodies}
+            self.space.step(self.dt)
+        self.accumulator = max(0.0, self.accumulator - steps * self.dt)
+        self.steps += steps
+        self.alpha = self.accumulator / self.dt
+        return steps
+
+    def reset(self, now):
+        # Forget time that passed while the simulation was paused
+        self.lastTime = now
+        self.accumulator = 0.0
+
+    def forget(self, body):
+        # The body was placed, not moved: draw it where it is
+        if self.bulk:
+            self.space.forgetPrevious(body)
+        else:
+            self.previous.pop(body, None)
+
+    def position(self, body):
+        if self.bulk:
+            return self.space.interpolated(body, self.alpha)
+        previous = self.previous.get(body)
+        if previous is None:
+            return body.position
+        return previous + (body.position - previous) * self.alpha
+
+    def snapshot(self):
+        return PhysicsSnapshot(self)
+
+
+# One frame's read of the bodies, taken after spawning and before the fruits
+# are drawn and hit-tested. On a bulk space every position (current and
+# interpolated) comes out of the arrays at once instead of as one Vec2d per
+# body and call; under pymunk each body is still read when asked. A body the
+# snapshot does not know (added later) is read from the space.
+class PhysicsSnapshot:
+    def __init__(self, clock):
+        self.clock = clock
+        self.current = self.drawn = {}
+        if clock.bulk:
+            bodies, current, drawn = clock.space.snapshot(clock.alpha)
+            self.current = dict(zip(bodies, current.tolist()))
+            self.drawn = dict(zip(bodies, drawn.tolist()))
+
+    def position(self, body):
+        position = self.current.get(body)
+        return body.position if position is None else position
+
+    def drawPosition(self, body):
+        position = self.drawn.get(body)
+        return self.clock.position(body) if position is None else position
@@ -0,0 +1,420 @@
+# Long-lived game host. Starting a game as a fresh `python nose_fruit.py`
+# pays for the interpreter, the cv2/MediaPipe/pygame imports, building the
+# MediaPipe graph, decoding the sprite sheets and opening the camera on every
+# launch. The host does all of that once, keeps it warm, and runs the games in
+# its own process when the front end (app.py) asks over a local socket.
+#
+#   python game_host.py                 # serve on 127.0.0.1:6150 (FRUIT_HOST_PORT)
+#   python game_host.py --once nose_fruit.py -- --headless --max-frames 50
+#
+# Requests and replies are dicts over multiprocessing.connection:
+#   {"command": "play", "game": "nose_fruit.py", "args": [...], "sentAt": time.time(), "token": ...}
+#   -> {"ok": True, "result": session result (session_result.py), "firstFrameSeconds": ...}
+#   {"command": "cancel", "token": ...} ends that game (token None: whichever is running)
+#   {"command": "ping"} / {"command": "stop"}
+# One game runs at a time, on the main thread (pygame wants it); play requests
+# that come in meanwhile wait for it to finish. Connections are accepted on a
+# thread of their own, so ping and cancel are answered during a game: a
+# cancelled game gets a quit event, like a closed window, and the host stays
+# up. A play request whose token was cancelled before it arrived never starts.
+# Requests are pickles, so only holders of the host's key may connect: a random
+# key per run, handed to the host in FRUIT_HOST_KEY and kept for clients in a
+# file only this user can read (hostKeyPath), removed when the host stops.
+import argparse
+import importlib
+import os
+import queue
+import secrets
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+FRUIT_DIR = os.path.dirname(os.path.abspath(__file__))
+GAMES = ("nose_fruit.py", "fruit_eater.py", "fruit_catcher.py")
+# Imported by the games' startup phases rather than with the games themselves
+WARM_MODULES = ("cv2", "pymunk", "array_physics", "input_source", "capture_pipeline", "frame_presenter",
+                "renderer", "telemetry")
+ADDRESS = ("127.0.0.1", int(os.environ.get("FRUIT_HOST_PORT", 6150)))
+KEY_DIR = os.environ.get("FRUIT_HOST_KEY_DIR", os.path.join(os.path.expanduser("~"), ".fruit_game"))
+
+
+def hostKeyPath(address=ADDRESS):
+    return os.path.join(KEY_DIR, f"host_{address[1]}.key")
+
+
+def writeHostKey(key, address=ADDRESS):
+    # Readable by this user only, written next to the target and renamed
+    os.makedirs(KEY_DIR, mode=0o700, exist_ok=True)
+    path = hostKeyPath(address)
+    temp = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(key.hex())
+    os.replace(temp, path)
+
+
+def readHostKey(address=ADDRESS):
+    # FileNotFoundError (an OSError) when no host has written one for this port
+    with open(hostKeyPath(address)) as f:
+        return bytes.fromhex(f.read().strip())
+
+
+# Camera kept open between games. While no game uses it a reader thread keeps
+# grabbing, so auto exposure stays settled and the driver buffer does not hand
+# the next game a frame from the last one. Every game gets the camera at the
+# resolution it was opened with, whatever the last game's adaptive quality
+# left it at.
+class WarmCamera:
+    def __init__(self, index):
+        import cv2
+        from input_source import openCamera
+        self.index = index
+        self.cap = openCamera(index)
+        self.size = (self.cap.get(cv2.CAP_PROP_FRAME_WIDTH), self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.stopEvent = threading.Event()
+        self.thread = None
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def idle(self):
+        if self.thread or not self.isOpened():
+            return
+        self.stopEvent.clear()
+        self.thread = threading.Thread(target=self._drain, daemon=True)
+        self.thread.start()
+
+    def lend(self):
+        import cv2
+        from input_source import SharedCapture
+        self._stopDrain()
+        if self.isOpened():
+            width, height = self.size
+            if (self.cap.get(cv2.CAP_PROP_FRAME_WIDTH), self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) != self.size:
+                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        return SharedCapture(self.cap)
+
+    def _stopDrain(self):
+        if self.thread:
+            self.stopEvent.set()
+            self.thread.join()
+            self.thread = None
+
+    def _drain(self):
+        while not self.stopEvent.is_set():
+            if not self.cap.grab():
+                self.stopEvent.wait(0.1)
+
+    def release(self):
+        self._stopDrain()
+        self.cap.release()
+
+
+class GameHost:
+    def __init__(self):
+        self.trackers = {}  # tracker factory -> warm tracker, see GameOptions.makeTracker
+        self.complexity = {}  # pose model the tracker was built with, restored before each game
+        self.cameras = {}
+        self.modules = {}
+        self.warmup = {}  # seconds per prewarm stage
+        self.sessions = 0
+        self.firstFrameAt = None
+        self.lock = threading.Lock()
+        self.playing = None  # (token, game) of the game on the main thread
+        self.cancelled = set()  # tokens cancelled before their game started
+        self.quitEvent = threading.Event()
+        self.stopping = threading.Event()
+
+    def prewarm(self, camera=None):
+        start = time.perf_counter()
+        for game in GAMES:
+            self.module(game)
+        for name in WARM_MODULES:
+            importlib.import_module(name)
+        self.warmup["imports"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self._loadTrackers()
+        self.warmup["trackers"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self._loadAssets()
+        self.warmup["assets"] = time.perf_counter() - start
+
+        if camera is not None:
+            start = time.perf_counter()
+            self.camera(camera)
+            self.idle()
+            self.warmup["camera"] = time.perf_counter() - start
+        print("Game host warm: " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in self.warmup.items()))
+
+    def module(self, game):
+        if game not in GAMES:
+            raise ValueError(f"Unknown game: {game}")
+        if game not in self.modules:
+            self.modules[game] = importlib.import_module(os.path.splitext(game)[0])
+        return self.modules[game]
+
+    def camera(self, index):
+        # Called by GameOptions.openSource for live games
+        warm = self.cameras.get(index)
+        if warm is None or not warm.isOpened():
+            warm = WarmCamera(index)
+            if not warm.isOpened():
+                print(f"Game host: cannot open camera {index}")
+            self.cameras[index] = warm
+        return warm.lend()
+
+    def idle(self):
+        for warm in self.cameras.values():
+            warm.idle()
+
+    def frameShown(self):
+        if self.firstFrameAt is None:
+            self.firstFrameAt = time.time()
+
+    def play(self, game, args=(), sentAt=None, token=None):
+        from options import parseOptions
+
+        sentAt = sentAt or time.time()
+        module = self.module(game)
+        options = parseOptions(list(args), description=game)
+        options.host = self
+        with self.lock:
+            if token is not None and token in self.cancelled:
+                self.cancelled.discard(token)
+                return {"ok": False, "game": game, "result": None, "error": "Cancelled before it started",
+                        "cancelled": True, "firstFrameSeconds": None, "session": self.sessions}
+            self.playing = (token, game)
+            self.quitEvent.clear()
+        for factory, tracker in self.trackers.items():
+            if factory in self.complexity:
+                tracker.setModelComplexity(self.complexity[factory])  # undo the last game's quality ladder
+        self.firstFrameAt = None
+        result = error = None
+        try:
+            result = module.Game(options)
+        except Exception:
+            error = traceback.format_exc()
+            sys.stderr.write(error)
+        finally:
+            with self.lock:
+                self.playing = None
+        self.sessions += 1
+        self.idle()
+        firstFrame = self.firstFrameAt - sentAt if self.firstFrameAt is not None else None
+        return {"ok": error is None, "game": game, "result": result, "error": error,
+                "cancelled": self.quitEvent.is_set(), "firstFrameSeconds": firstFrame, "session": self.sessions}
+
+    def cancel(self, token=None):
+        # From the connection thread: the running game (with this token) quits
+        # at its next frame; a token not playing yet is remembered for play()
+        with self.lock:
+            if self.playing is not None and token in (None, self.playing[0]):
+                self.quitEvent.set()
+                return {"ok": True, "game": self.playing[1]}
+            if token is None:
+                return {"ok": False, "error": "No game is running"}
+            self.cancelled.add(token)
+            return {"ok": True, "game": None}
+
+    def quitRequested(self):
+        # Polled by GameOptions.events() in the game loop
+        return self.quitEvent.is_set()
+
+    def status(self):
+        return {"ok": True, "sessions": self.sessions, "warmup": dict(self.warmup),
+                "trackers": sorted(factory.__name__ for factory in self.trackers),
+                "cameras": sorted(index for index, warm in self.cameras.items() if warm.isOpened())}
+
+    def handle(self, request):
+        command = request.get("command")
+        if command == "play":
+            return self.play(request["game"], request.get("args", ()), request.get("sentAt"), request.get("token"))
+        if command == "cancel":
+            return self.cancel(request.get("token"))
+        if command in ("ping", "stop"):
+            return self.status()
+        return {"ok": False, "error": f"Unknown command: {command}"}
+
+    def serve(self, authkey, address=ADDRESS):
+        writeHostKey(authkey, address)
+        try:
+            self._serve(authkey, address)
+        finally:
+            # Unless another host has taken the port since
+            try:
+                if readHostKey(address) == authkey:
+                    os.remove(hostKeyPath(address))
+            except (OSError, ValueError):
+                pass
+        self.close()
+
+    def _serve(self, authkey, address):
+        # play and stop go to the main thread, in the order they came
+        requests = queue.Queue()
+        with Listener(address, authkey=authkey) as listener:
+            print(f"Game host listening on {address[0]}:{address[1]}")
+            threading.Thread(target=self._accept, args=(listener, requests), name="game-host-accept",
+                             daemon=True).start()
+            while True:
+                conn, message = requests.get()
+                with conn:
+                    self._reply(conn, message)
+                if message.get("command") == "stop":
+                    self.stopping.set()
+                    break
+
+    def _accept(self, listener, requests):
+        while not self.stopping.is_set():
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, EOFError, OSError) as e:
+                if self.stopping.is_set():
+                    break
+                print(f"Game host: rejected connection ({e})")
+                continue
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                conn.close()
+                continue
+            if message.get("command") in ("play", "stop"):
+                requests.put((conn, message))
+            else:
+                with conn:
+                    self._reply(conn, message)
+
+    def _reply(self, conn, message):
+        try:
+            reply = self.handle(message)
+        except (KeyError, ValueError) as e:
+            reply = {"ok": False, "error": str(e)}
+        try:
+            conn.send(reply)
+        except OSError:
+            pass  # the client gave up waiting
+
+    def close(self):
+        for tracker in self.trackers.values():
+            tracker.close()
+        for warm in self.cameras.values():
+            warm.release()
+
+    def _loadTrackers(self):
+        import numpy as np
+        from trackers import mouthTracker, noseTracker, wristTracker
+
+        # One inference on a blank frame finishes MediaPipe's lazy graph setup
+        blank = np.zeros((480, 640, 3), dtype=np.uint8)
+        for factory in (noseTracker, mouthTracker, wristTracker):
+            tracker = factory()
+            tracker.process(blank)
+            self.trackers[factory] = tracker
+            if hasattr(tracker, "poseOptions"):
+                self.complexity[factory] = tracker.poseOptions.get("model_complexity", 1)
+
+    def _loadAssets(self):
+        import pygame
+        from asset_cache import preloadFruits
+
+        # convert_alpha needs a display, a hidden one will do
+        pygame.init()
+        pygame.display.set_mode((1, 1), pygame.HIDDEN)
+        preloadFruits()
+        pygame.display.quit()
+
+
+# Client side, used by app.py and benchmarks/bench_startup.py
+
+def request(command, address=ADDRESS, **fields):
+    with Client(address, authkey=readHostKey(address)) as conn:
+        conn.send(dict(command=command, **fields))
+        return conn.recv()
+
+
+def hostRunning(address=ADDRESS):
+    try:
+        request("ping", address)
+        return True
+    except (OSError, AuthenticationError):
+        return False
+
+
+def startHost(args=(), address=ADDRESS, timeout=120, log=None):
+    # Starts `python game_host.py` in the background and waits until it answers.
+    # `log` takes the host's stdout and stderr (file, subprocess.DEVNULL, or
+    # subprocess.PIPE for both on process.stdout).
+    key = secrets.token_bytes(32)
+    writeHostKey(key, address)
+    process = subprocess.Popen([sys.executable, os.path.join(FRUIT_DIR, "game_host.py"),
+                                "--port", str(address[1]), *args], cwd=FRUIT_DIR, stdout=log,
+                               stderr=subprocess.STDOUT if log == subprocess.PIPE else log,
+                               env=dict(os.environ, FRUIT_HOST_KEY=key.hex()))
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Game host exited with code {process.returncode}")
+        if hostRunning(address):
+            return process
+        time.sleep(0.2)
+    process.terminate()
+    raise TimeoutError(f"Game host did not answer within {timeout} s")
+
+
+def playGame(game, args=(), address=ADDRESS, token=None):
+    # `token` names the game for cancelGame()
+    return request("play", address, game=game, args=list(args), sentAt=time.time(), token=token)
+
+
+def cancelGame(token=None, address=ADDRESS):
+    return request("cancel", address, token=token)
+
+
+def stopHost(address=ADDRESS):
+    return request("stop", address)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep the games warm and run them on request")
+    parser.add_argument("--port", type=int, default=ADDRESS[1], help="local port to listen on")
+    parser.add_argument("--camera", type=int, default=0, help="webcam to keep open")
+    parser.add_argument("--no-camera", action="store_true", help="do not open the webcam until a game needs it")
+    parser.add_argument("--headless", action="store_true", help="dummy SDL drivers for the host")
+    parser.add_argument("--no-prewarm", action="store_true", help="load nothing up front")
+    parser.add_argument("--once", choices=GAMES, help="run this game once in this process and exit")
+    parser.add_argument("gameArgs", nargs=argparse.REMAINDER, help="game options for --once, after --")
+    args = parser.parse_args()
+    # The key startHost() made, or our own when started by hand; games started
+    # from here (and their worker processes) do not inherit it
+    key = os.environ.pop("FRUIT_HOST_KEY", None)
+    key = bytes.fromhex(key) if key else secrets.token_bytes(32)
+
+    os.chdir(FRUIT_DIR)  # the games load their assets by relative path
+    sys.path.insert(0, FRUIT_DIR)
+    if args.headless:
+        from options import setupHeadless
+        setupHeadless()
+
+    host = GameHost()
+    if args.once:
+        # Cold start in a fresh process, for comparison with a warm host
+        gameArgs = args.gameArgs[1:] if args.gameArgs[:1] == ["--"] else args.gameArgs
+        reply = host.play(args.once, gameArgs)
+        if reply["firstFrameSeconds"] is not None:
+            print(f"First frame at {host.firstFrameAt:.6f}")
+        host.close()
+        sys.exit(0 if reply["ok"] else 1)
+
+    if not args.no_prewarm:
+        host.prewarm(camera=None if args.no_camera else args.camera)
+    host.serve(key, (ADDRESS[0], args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+# Games launched by the front end (app.py) without waiting for them. A launch
+# returns at once with a GameSession; a background thread runs the game, in the
+# warm game host (game_host.py) or as its own Python process, and keeps the
+# session's state, bounded log and result up to date for the page to poll.
+# The registry is shared by every browser session of one Streamlit instance,
+# so several kiosks (each a camera on the same machine) can be started and
+# watched from one page. Rules:
+#   - one running game per camera (or per landmark service, which owns one)
+#   - the host runs one game at a time and only for its own camera; anything
+#     else gets a process of its own
+#   - a game can be cancelled: its process is terminated, then killed. The
+#     host is asked to end just its game and stays warm; only a game that does
+#     not stop within killAfter takes a host this registry started down with it
+import itertools
+import os
+import secrets
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from multiprocessing import AuthenticationError
+
+from game_host import FRUIT_DIR, GAMES, cancelGame, hostRunning, playGame, startHost
+from session_result import readResult
+
+STARTING, RUNNING, FINISHED, FAILED, CANCELLED = "starting", "running", "finished", "failed", "cancelled"
+ACTIVE = (STARTING, RUNNING)
+SOURCE_OPTIONS = {"--camera", "--video", "--trace", "--replay", "--service"}  # args that replace the camera
+
+
+# Last lines of a game's output. Long lines are cut and old lines dropped, so a
+# chatty or runaway game costs the launcher a fixed amount of memory.
+class LogBuffer:
+    def __init__(self, maxLines=200, maxLineLength=500):
+        self.lines = deque(maxlen=maxLines)
+        self.maxLineLength = maxLineLength
+        self.total = 0
+        self.lock = threading.Lock()
+
+    def append(self, line):
+        line = line.rstrip("\r\n")
+        if len(line) > self.maxLineLength:
+            line = line[:self.maxLineLength] + " ..."
+        with self.lock:
+            self.lines.append(line)
+            self.total += 1
+
+    @property
+    def dropped(self):
+        return self.total - len(self.lines)
+
+    def tail(self, count=None):
+        with self.lock:
+            lines = list(self.lines)
+        return lines if count is None else lines[-count:]
+
+    def text(self, count=None):
+        lines = self.tail(count)
+        if self.dropped and (count is None or count >= len(self.lines)):
+            lines.insert(0, f"... {self.dropped} earlier lines dropped")
+        return "\n".join(lines)
+
+
+class GameSession:
+    def __init__(self, sessionId, game, kiosk, camera, service, logLines):
+        self.id = sessionId
+        self.game = game
+        self.kiosk = kiosk
+        self.camera = camera
+        self.service = service
+        self.resource = "landmark service" if service else f"camera {camera}"
+        self.state = STARTING
+        self.via = None  # "host" or "process"
+        self.startedAt = time.time()
+        self.endedAt = None
+        self.result = None
+        self.error = None
+        self.firstFrameSeconds = None
+        self.log = LogBuffer(logLines)
+        self.process = None
+        self.token = secrets.token_hex(8)  # names the game in the host, see game_host.cancelGame
+        self.cancelRequested = False
+
+    @property
+    def active(self):
+        return self.state in ACTIVE
+
+    def elapsed(self):
+        return (self.endedAt or time.time()) - self.startedAt
+
+    def finish(self, state, result=None, error=None):
+        # A game that still ends cleanly when cancelled (pygame turns SIGTERM
+        # into a quit event) keeps its partial result
+        if self.cancelRequested:
+            state, error = CANCELLED, None
+        self.state = state
+        self.result = result
+        self.error = error
+        self.endedAt = time.time()
+
+
+class GameRegistry:
+    def __init__(self, hostCamera=0, useHost=True, logLines=200, keep=20, killAfter=5.0):
+        self.hostCamera = hostCamera  # the webcam a host started here keeps open
+        self.useHost = useHost
+        self.logLines = logLines
+        self.keep = keep  # finished sessions kept for the monitor
+        self.killAfter = killAfter  # seconds between terminate and kill on cancel
+        self.sessions = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.hostProcess = None  # host started by this registry
+        self.hostSession = None  # session running in the host right now
+
+    def launch(self, game, kiosk="", camera=0, service=False, args=()):
+        if game not in GAMES:
+            raise ValueError(f"Unknown game: {game}")
+        with self.lock:
+            session = GameSession(next(self.ids), game, kiosk, camera, service, self.logLines)
+            busy = self.runningOn(session.resource)
+            if busy is not None:
+                raise RuntimeError(f"{session.resource} is in use by {busy.game} ({busy.kiosk or 'session'} "
+                                   f"#{busy.id}), cancel it or wait for it to finish")
+            inHost = self.useHost and self.hostSession is None and (service or camera == self.hostCamera)
+            if inHost:
+                self.hostSession = session
+            self.sessions[session.id] = session
+            self._prune()
+        gameArgs = list(args)
+        if not SOURCE_OPTIONS.intersection(gameArgs):
+            gameArgs = (["--service"] if service else ["--camera", str(camera)]) + gameArgs
+        target = self._runInHost if inHost else self._runProcess
+        threading.Thread(target=target, args=(session, gameArgs), name=f"game-{session.id}", daemon=True).start()
+        return session
+
+    def runningOn(self, resource):
+        for session in self.sessions.values():
+            if session.active and session.resource == resource:
+                return session
+        return None
+
+    def session(self, sessionId):
+        return self.sessions.get(sessionId)
+
+    def list(self):
+        # Newest first
+        return sorted(self.sessions.values(), key=lambda session: session.id, reverse=True)
+
+    def cancel(self, sessionId):
+        # Returns False when the session is unknown or already over
+        with self.lock:
+            session = self.sessions.get(sessionId)
+            if session is None or not session.active:
+                return False
+            session.cancelRequested = True
+            session.log.append("Cancelled")
+            if session.state == STARTING:
+                # Not playing yet, the launch thread checks the flag before it starts the game
+                return True
+        if session.via == "host":
+            threading.Thread(target=self._cancelInHost, args=(session,), daemon=True).start()
+        else:
+            threading.Thread(target=self._stop, args=(session.process,), daemon=True).start()
+        return True
+
+    def _stop(self, process):
+        if process.poll() is not None:
+            return
+        process.terminate()
+        try:
+            process.wait(self.killAfter)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    def _cancelInHost(self, session):
+        # The game quits at its next frame; one that hangs instead costs the host
+        try:
+            cancelGame(session.token)
+        except (OSError, AuthenticationError) as e:
+            session.log.append(f"Cannot reach the game host ({e})")
+        deadline = time.monotonic() + self.killAfter
+        while session.active and time.monotonic() < deadline:
+            time.sleep(0.1)
+        process = self.hostProcess
+        if session.active and process is not None:
+            session.log.append("The game did not stop, stopping the game host")
+            self._stop(process)
+
+    def _prune(self):
+        done = [session for session in self.list() if not session.active]
+        for session in done[self.keep:]:
+            del self.sessions[session.id]
+
+    def _runProcess(self, session, args):
+        session.via = "process"
+        fd, resultFile = tempfile.mkstemp(suffix=".json", prefix="fruit_result_")
+        os.close(fd)
+        try:
+            if session.cancelRequested:
+                session.finish(CANCELLED)
+                return
+            try:
+                session.process = subprocess.Popen(
+                    [sys.executable, os.path.join(FRUIT_DIR, session.game), *args, "--result-file", resultFile],
+                    cwd=FRUIT_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1,
+                    env=dict(os.environ, PYTHONUNBUFFERED="1"))
+            except OSError as e:
+                session.finish(FAILED, error=f"Cannot start {session.game}: {e}")
+                return
+            with self.lock:
+                session.state = RUNNING
+                cancelled = session.cancelRequested
+            if cancelled:
+                self._stop(session.process)
+            # Output is drained as it comes, into the bounded log only
+            for line in session.process.stdout:
+                session.log.append(line)
+            code = session.process.wait()
+            if code != 0:
+                session.finish(FAILED, error=f"{session.game} exited with code {code}")
+                return
+            try:
+                session.finish(FINISHED, result=readResult(resultFile))
+            except (OSError, ValueError):
+                session.finish(FAILED, error=f"{session.game} did not write a valid result")
+        finally:
+            os.remove(resultFile)
+
+    def _runInHost(self, session, args):
+        session.via = "host"
+        try:
+            if not self._hostReady(session):
+                # No host: run it on its own instead
+                with self.lock:
+                    self.hostSession = None
+                self._runProcess(session, args)
+                return
+            # A game cancelled while the host was starting never launches
+            with self.lock:
+                if session.cancelRequested:
+                    session.finish(CANCELLED)
+                    return
+                session.state = RUNNING
+            try:
+                reply = playGame(session.game, args, token=session.token)
+            except (OSError, EOFError) as e:
+                session.finish(FAILED, error=f"Game host stopped during the game ({e})")
+                return
+            session.firstFrameSeconds = reply["firstFrameSeconds"]
+            if reply["ok"]:
+                session.finish(FINISHED, result=reply["result"])
+            else:
+                session.log.append(reply["error"])
+                session.finish(FAILED, error=reply["error"].strip().splitlines()[-1])
+        finally:
+            with self.lock:
+                if self.hostSession is session:
+                    self.hostSession = None
+
+    def _hostReady(self, session):
+        process = self.hostProcess
+        if process is not None and process.poll() is None:
+            return True
+        self.hostProcess = None
+        if hostRunning():
+            session.log.append("Playing in the game host, its output goes to the host's console")
+            return True
+        hostArgs = ["--no-camera"] if session.service else ["--camera", str(self.hostCamera)]
+        session.log.append("Starting the game host")
+        try:
+            process = startHost(hostArgs, log=subprocess.PIPE)
+        except (OSError, RuntimeError) as e:
+            session.log.append(f"Game host unavailable ({e}), starting {session.game} in a new process")
+            return False
+        self.hostProcess = process
+        threading.Thread(target=self._drainHost, args=(process,), name="game-host-log", daemon=True).start()
+        return True
+
+    def _drainHost(self, process):
+        # The host's output belongs to whichever game it is running
+        for line in process.stdout:
+            line = line.decode(errors="replace")
+            session = self.hostSession
+            if session is not None:
+                session.log.append(line)
+        process.wait()
+        if self.hostProcess is process:
+            self.hostProcess = None
@@ -0,0 +1,194 @@
+import math
+from collections import deque
+
+import numpy as np
+
+# Swept hit tests. A path is a list of (x, y) screen points, oldest first: a
+# single point is the plain "is the landmark inside" test, more points are the
+# landmark's movement since the previous frame(s), so a fast swipe that jumps
+# over a fruit between two frames still hits it. pymunk is imported by the
+# indexes that use it, so the games can import this before their physics loads.
+
+
+def segmentHitsBox(a, b, box):
+    # Liang-Barsky clip of segment a-b against box = (x0, y0, x1, y1)
+    x0, y0, x1, y1 = box
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    t0, t1 = 0.0, 1.0
+    for p, q in ((-dx, a[0] - x0), (dx, x1 - a[0]), (-dy, a[1] - y0), (dy, y1 - a[1])):
+        if p == 0:
+            if q <= 0:
+                return False
+        else:
+            t = q / p
+            if p < 0:
+                if t > t1:
+                    return False
+                t0 = max(t0, t)
+            else:
+                if t < t0:
+                    return False
+                t1 = min(t1, t)
+    return t0 < t1
+
+
+def pathHitsBox(path, box):
+    if len(path) == 1:
+        x, y = path[0]
+        return box[0] < x < box[2] and box[1] < y < box[3]
+    return any(segmentHitsBox(a, b, box) for a, b in zip(path, path[1:]))
+
+
+def segmentDistance(point, a, b):
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    lengthSq = dx * dx + dy * dy
+    t = 0.0
+    if lengthSq > 0:
+        t = min(1.0, max(0.0, ((point[0] - a[0]) * dx + (point[1] - a[1]) * dy) / lengthSq))
+    return math.hypot(point[0] - (a[0] + t * dx), point[1] - (a[1] + t * dy))
+
+
+def pathDistance(path, point):
+    if len(path) == 1:
+        return math.hypot(point[0] - path[0][0], point[1] - path[0][1])
+    return min(segmentDistance(point, a, b) for a, b in zip(path, path[1:]))
+
+
+# The last `length` positions of a landmark. A frame without the landmark breaks
+# the trail, so re-detection somewhere else does not sweep across the screen.
+class LandmarkTrail:
+    def __init__(self, length=2):
+        self.points = deque(maxlen=max(1, length))
+
+    def push(self, point):
+        if point is None:
+            self.points.clear()
+        else:
+            self.points.append(point)
+
+    def path(self):
+        return list(self.points)
+
+
+# Broad-phase indexes. nearby(path, reach) returns a superset of the bodies
+# whose position is within `reach` of the path (reach = farthest a hit can be
+# from a body's position); only those need the exact per-fruit test. update()
+# is called once per frame after spawning, before the queries. `toSpace` maps
+# screen points to space coordinates (Nose Fruit and Fruit Eater use y-up).
+def segmentBoxes(points, reach):
+    if len(points) == 1:
+        points = points * 2
+    for a, b in zip(points, points[1:]):
+        yield (min(a[0], b[0]) - reach, min(a[1], b[1]) - reach,
+               max(a[0], b[0]) + reach, max(a[1], b[1]) + reach)
+
+
+# Uniform grid keyed by cell, rebuilt from the body positions each frame. A
+# query only visits the cells under the path, so its cost follows the fruits
+# near the landmark rather than all of them. The rebuild reads every body
+# position from Python, so it is no faster than pymunk's tree (maintained in C
+# during the step): the grid is a comparison backend for
+# benchmarks/bench_swept_hits.py, never the default.
+class GridIndex:
+    def __init__(self, space, cellSize=128, toSpace=None):
+        self.space = space
+        self.cellSize = cellSize
+        self.toSpace = toSpace or (lambda point: point)
+        self.cells = {}
+
+    def update(self):
+        size = self.cellSize
+        cells = {}
+        for body in self.space.bodies:
+            x, y = body.position
+            key = (int(x // size), int(y // size))
+            cell = cells.get(key)
+            if cell is None:
+                cells[key] = [(x, y, body)]
+            else:
+                cell.append((x, y, body))
+        self.cells = cells
+
+    def nearby(self, path, reach):
+        size = self.cellSize
+        bodies = set()
+        for x0, y0, x1, y1 in segmentBoxes([self.toSpace(point) for point in path], reach):
+            for cx in range(int(x0 // size), int(x1 // size) + 1):
+                for cy in range(int(y0 // size), int(y1 // size) + 1):
+                    cell = self.cells.get((cx, cy))
+                    if cell:
+                        # Cells overhang the box, keep only positions inside it
+                        bodies.update(body for x, y, body in cell if x0 <= x <= x1 and y0 <= y <= y1)
+        return bodies
+
+
+# pymunk's own bounding-box tree (space.segment_query is not used: its tree walk
+# ignores the radius and misses shapes beside the segment)
+class PymunkIndex:
+    def __init__(self, space, toSpace=None):
+        import pymunk
+        self.space = space
+        self.toSpace = toSpace or (lambda point: point)
+        self.filter = pymunk.ShapeFilter()
+
+    def update(self):
+        pass  # pymunk reindexes shapes on every step
+
+    def nearby(self, path, reach):
+        import pymunk
+        bodies = set()
+        for box in segmentBoxes([self.toSpace(point) for point in path], reach):
+            bodies.update(shape.body for shape in self.space.bb_query(pymunk.BB(*box), self.filter))
+        return bodies
+
+
+# No index: every body is a candidate, the original test-everything behaviour
+class BruteForceIndex:
+    def __init__(self, space, toSpace=None):
+        self.space = space
+
+    def update(self):
+        pass
+
+    def nearby(self, path, reach):
+        return set(self.space.bodies) if path else set()
+
+
+# No index either, but exact: the distance from every body to the path is
+# computed as array operations over all bodies at once (pathDistance, vectorized).
+# Meant for array_physics.ArraySpace, where the positions already are one
+# array; under pymunk they are read out body by body first.
+class DistanceIndex:
+    def __init__(self, space, toSpace=None):
+        self.space = space
+        self.toSpace = toSpace or (lambda point: point)
+
+    def update(self):
+        pass
+
+    def nearby(self, path, reach):
+        from array_physics import bodyPositions
+        if not path:
+            return set()
+        bodies, positions = bodyPositions(self.space)
+        if not len(bodies):
+            return set()
+        points = np.array([self.toSpace(point) for point in path], dtype=float)
+        if len(points) == 1:
+            offset = positions - points[0]
+            distance = np.hypot(offset[:, 0], offset[:, 1])
+        else:
+            start, direction = points[:-1], points[1:] - points[:-1]
+            lengthSq = (direction ** 2).sum(axis=1)
+            offset = positions[:, None, :] - start[None, :, :]  # body x segment x 2
+            t = (offset * direction).sum(axis=2) / np.where(lengthSq > 0, lengthSq, 1.0)
+            offset -= np.clip(t, 0.0, 1.0)[:, :, None] * direction
+            distance = np.hypot(offset[:, :, 0], offset[:, :, 1]).min(axis=1)
+        return {bodies[i] for i in np.flatnonzero(distance <= reach)}
+
+
+HIT_INDEXES = {"grid": GridIndex, "pymunk": PymunkIndex, "brute": BruteForceIndex, "distance": DistanceIndex}
+
+
+def makeHitIndex(kind, space, toSpace=None):
+    return HIT_INDEXES[kind](space, toSpace=toSpace)
@@ -0,0 +1,64 @@
+import pygame
+from collections import OrderedDict
+
+# The outline is the text drawn in the outline colour at these diagonal offsets
+OUTLINE_OFFSETS = [(-2, -2), (-2, 2), (2, -2), (2, 2)]
+
+
+# Loads each font size once and caches rendered text (outline already
+# composited) keyed by (text, size, colour, outline), so a HUD line is only
+# rendered again when its value actually changes.
+class TextRenderer:
+    def __init__(self, maxEntries=256):
+        self.maxEntries = maxEntries
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def font(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    def render(self, text, size, color, outline=None):
+        # Returns (surface, offset of the plain text inside the surface)
+        key = (text, size, color, outline)
+        entry = self.surfaces.get(key)
+        if entry is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return entry
+        self.misses += 1
+
+        font = self.font(size)
+        textSurf = font.render(text, True, color)
+        if outline is None:
+            entry = (textSurf, (0, 0))
+        else:
+            textOutline = font.render(text, True, outline)
+            pad = max(max(abs(dx), abs(dy)) for dx, dy in OUTLINE_OFFSETS)
+            width, height = textSurf.get_size()
+            surf = pygame.Surface((width + 2 * pad, height + 2 * pad), pygame.SRCALPHA)
+            for dx, dy in OUTLINE_OFFSETS:
+                surf.blit(textOutline, (pad + dx, pad + dy))
+            surf.blit(textSurf, (pad, pad))
+            entry = (surf, (pad, pad))
+
+        self.surfaces[key] = entry
+        if len(self.surfaces) > self.maxEntries:
+            self.surfaces.popitem(last=False)
+        return entry
+
+    def draw(self, window, text, pos, size, color, outline=None, center=False):
+        surf, (ox, oy) = self.render(text, size, color, outline)
+        x, y = pos
+        if center:
+            x -= (surf.get_width() - 2 * ox) // 2
+            y -= (surf.get_height() - 2 * oy) // 2
+        return window.blit(surf, (x - ox, y - oy))
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses,
+                "entries": len(self.surfaces), "fonts": len(self.fonts)}
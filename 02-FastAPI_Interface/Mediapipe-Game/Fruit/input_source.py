@@ -0,0 +1,163 @@
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+
+# Input sources share the cv2.VideoCapture surface the games already use
+# (isOpened/read/set/get/release). A recorded landmark trace additionally sets
+# `lastLandmarks` on every read, which the capture pipeline uses instead of
+# running MediaPipe.
+
+def openCamera(index=0):
+    return cv2.VideoCapture(index)
+
+
+# A camera the game host keeps open between games: the game uses it like its
+# own capture, but release() leaves it open for the next one.
+class SharedCapture:
+    def __init__(self, cap):
+        self.cap = cap
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        return self.cap.read()
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def release(self):
+        pass
+
+
+class VideoFileSource:
+    def __init__(self, path, loop=False, realtime=False):
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Video file not found: {path}")
+        self.path = path
+        self.loop = loop
+        self.realtime = realtime
+        self.cap = cv2.VideoCapture(path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+        self.nextFrameTime = None
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        if self.realtime:
+            # Pace reads to the file's frame rate like a live camera would
+            now = time.perf_counter()
+            if self.nextFrameTime is not None and now < self.nextFrameTime:
+                time.sleep(self.nextFrameTime - now)
+            self.nextFrameTime = max(now, self.nextFrameTime or now) + 1 / self.fps
+        success, img = self.cap.read()
+        if not success and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, img = self.cap.read()
+        return success, img
+
+    def set(self, prop, value):
+        # Resolution requests are meaningless for a file, frames keep their size
+        return False
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def release(self):
+        self.cap.release()
+
+
+# Recorded landmarks per timestamp, e.g. a nose, wrist or lip trace.
+# JSON: {"fps": 23, "frames": [{"t": 0.0, "landmarks": {"nose": [x, y, visibility]}}, ...]}
+# NPZ:  "t" (N,) plus one (N, 3) array per landmark name, NaN rows where not detected.
+# Coordinates are normalized to [0, 1] like MediaPipe output.
+def loadTrace(path):
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            times = data["t"].astype(float)
+            arrays = {name: data[name].tolist() for name in data.files if name != "t"}
+        frames = []
+        for i in range(len(times)):
+            frames.append({name: tuple(rows[i]) for name, rows in arrays.items()
+                           if not any(np.isnan(rows[i]))})
+        return times, frames
+    with open(path) as f:
+        data = json.load(f)
+    times = np.array([frame["t"] for frame in data["frames"]], dtype=float)
+    frames = [{name: tuple(values) for name, values in frame["landmarks"].items()}
+              for frame in data["frames"]]
+    return times, frames
+
+
+def saveTrace(path, times, frames):
+    if path.endswith(".npz"):
+        names = sorted({name for landmarks in frames for name in landmarks})
+        arrays = {name: np.array([landmarks.get(name, (np.nan,) * 3) for landmarks in frames], dtype=float)
+                  for name in names}
+        np.savez_compressed(path, t=np.asarray(times, dtype=float), **arrays)
+        return
+    with open(path, "w") as f:
+        json.dump({"frames": [{"t": float(t), "landmarks": {name: list(values) for name, values in landmarks.items()}}
+                              for t, landmarks in zip(times, frames)]}, f)
+
+
+class LandmarkTraceSource:
+    def __init__(self, path, size=(1280, 720), timeSource=None, loop=False):
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Landmark trace not found: {path}")
+        self.path = path
+        self.width, self.height = size
+        self.times, self.frames = loadTrace(path)
+        self.timeSource = timeSource or time.perf_counter  # game clock in headless runs
+        self.loop = loop
+        self.startTime = None
+        self.index = 0
+        self.lastLandmarks = None
+        self.blank = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+
+    def isOpened(self):
+        return len(self.frames) > 0
+
+    def read(self):
+        now = self.timeSource()
+        if self.startTime is None:
+            self.startTime = now
+        elapsed = now - self.startTime
+        duration = self.times[-1] - self.times[0]
+        if elapsed > duration:
+            if not self.loop:
+                return False, None
+            elapsed %= duration or 1
+        # Latest recorded sample at or before the current trace time
+        self.index = max(0, int(np.searchsorted(self.times, self.times[0] + elapsed, side="right")) - 1)
+        self.lastLandmarks = self.frames[self.index]
+        # Games draw markers on the frame, so hand out a fresh copy each time
+        return True, self.blank.copy()
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            self.width = int(value)
+        elif prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            self.height = int(value)
+        else:
+            return False
+        self.blank = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        return True
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.width
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.height
+        return 0
+
+    def release(self):
+        pass
@@ -0,0 +1,97 @@
+import math
+
+
+# Smoothing/prediction policy for LandmarkFilter. Cutoffs are in Hz; beta is per
+# unit of normalized speed (frame widths per second), so it does not depend on
+# the camera resolution.
+class SmoothingConfig:
+    def __init__(self, minCutoff=1.5, beta=10.0, dCutoff=1.0, predict=False, maxLead=0.15):
+        self.minCutoff = minCutoff  # lower = smoother when still, more lag
+        self.beta = beta  # higher = less lag when moving fast, more jitter
+        self.dCutoff = dCutoff  # cutoff for the speed estimate
+        self.predict = predict  # extrapolate by the age of the sample to hide pipeline latency
+        self.maxLead = maxLead  # seconds, cap on the extrapolation
+
+
+# No smoothing (infinite cutoffs pass samples straight through), only
+# constant-velocity extrapolation from the last two measurements: fills the
+# frames between decimated inferences.
+def extrapolationOnly(maxLead=0.25):
+    return SmoothingConfig(minCutoff=math.inf, beta=0.0, dCutoff=math.inf, predict=True, maxLead=maxLead)
+
+
+def lowPassAlpha(cutoff, dt):
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+# One Euro filter (Casiez et al. 2012) for one 2D point: a low-pass filter whose
+# cutoff rises with speed, so a still landmark stops jittering and a fast one
+# is not dragged behind. Keeps a smoothed velocity for prediction.
+class OneEuroFilter:
+    def __init__(self, minCutoff, beta, dCutoff):
+        self.minCutoff = minCutoff
+        self.beta = beta
+        self.dCutoff = dCutoff
+        self.time = None
+        self.value = None
+        self.velocity = (0.0, 0.0)
+
+    def update(self, t, point):
+        if self.time is None:
+            self.time, self.value = t, point
+            return point
+        dt = t - self.time
+        if dt <= 0:
+            return self.value
+        x, y = point
+        px, py = self.value
+        a = lowPassAlpha(self.dCutoff, dt)
+        vx = self.velocity[0] + a * ((x - px) / dt - self.velocity[0])
+        vy = self.velocity[1] + a * ((y - py) / dt - self.velocity[1])
+        a = lowPassAlpha(self.minCutoff + self.beta * math.hypot(vx, vy), dt)
+        self.value = (px + a * (x - px), py + a * (y - py))
+        self.velocity = (vx, vy)
+        self.time = t
+        return self.value
+
+
+# Filter stage between the pipeline and the game logic: one One Euro filter per
+# landmark, fed once per new measurement (packet.sampleTime, game clock), and an
+# optional forward prediction by the time that has passed since the camera took
+# the last measured frame (which also covers decimated frames). Without a config
+# the landmarks pass through untouched. The game cannot tell measured from
+# predicted values; `lead` says how far the last result was extrapolated.
+class LandmarkFilter:
+    def __init__(self, config=None):
+        self.config = config
+        self.filters = {}
+        self.measured = None  # landmarks dict of the last measurement
+        self.sampleTime = None
+        self.lead = 0.0
+
+    def apply(self, packet, now):
+        if self.config is None or packet is None:
+            return packet.landmarks if packet is not None else {}
+        # Decimated frames repeat the previous landmarks object: not a new measurement
+        if packet.landmarks is not self.measured:
+            self.measured = packet.landmarks
+            self.sampleTime = packet.sampleTime
+            for name in list(self.filters):
+                if name not in packet.landmarks:
+                    del self.filters[name]  # lost: start fresh when it comes back
+            for name, (x, y, _) in packet.landmarks.items():
+                if name not in self.filters:
+                    self.filters[name] = OneEuroFilter(self.config.minCutoff, self.config.beta,
+                                                       self.config.dCutoff)
+                self.filters[name].update(self.sampleTime, (x, y))
+
+        lead = 0.0
+        if self.config.predict:
+            lead = min(max(0.0, now - self.sampleTime), self.config.maxLead)
+        self.lead = lead
+        landmarks = {}
+        for name, (_, _, visibility) in self.measured.items():
+            f = self.filters[name]
+            landmarks[name] = (f.value[0] + f.velocity[0] * lead, f.value[1] + f.velocity[1] * lead, visibility)
+        return landmarks
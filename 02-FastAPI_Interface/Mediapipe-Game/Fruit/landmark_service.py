@@ -0,0 +1,354 @@
+# Standalone tracking service. One process owns the webcam and the MediaPipe
+# models (pose and face mesh) and publishes camera frames and landmark arrays
+# through shared-memory ring buffers; games (and any other tool) attach as
+# readers, so several of them can use the camera at once and starting a game
+# pays neither for the models nor for opening the camera. Each model runs on
+# its own thread in the service process, off the game's cores.
+#
+#   python landmark_service.py [--camera 0] [--name fruit_tracking]
+#   python nose_fruit.py --service            # read frames + landmarks from it
+#
+# Segments (multiprocessing.shared_memory), NAME being --name:
+#   NAME_frames   camera frames, height x width x 3 BGR uint8
+#   NAME_pose     pose landmarks, 33 x 3 (x, y, visibility), NaN when nobody is found
+#   NAME_face     face mesh landmarks, 478 x 3 (x, y, 1.0), NaN when no face is found
+# Readers get views into the shared memory, nothing is copied. A slot is only
+# rewritten after `slots - 1` newer items, so a view stays valid for that long
+# (about a quarter second of camera frames with the default 8 slots).
+import argparse
+import signal
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import cv2
+import numpy as np
+
+DEFAULT_NAME = "fruit_tracking"
+MODEL_POINTS = {"pose": 33, "face": 478}
+DTYPES = {1: np.uint8, 2: np.float64}
+# Header fields (int64): newest sequence number, slot count, reader heartbeat
+# (time.monotonic_ns), dtype code, number of dimensions, then the item shape
+LATEST, SLOTS, HEARTBEAT, DTYPE, NDIM, SHAPE = 0, 1, 2, 3, 4, 5
+HEADER_FIELDS = 16
+META_FIELDS = 4  # float64 per item, meaning chosen by the writer
+
+
+def _attach(name):
+    # Before Python 3.13 attaching registers the segment with this process's
+    # resource tracker too, which unlinks it under the service when we exit
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+    memory = shared_memory.SharedMemory(name)
+    resource_tracker.unregister(memory._name, "shared_memory")
+    return memory
+
+
+# Fixed-size ring of arrays in one shared-memory segment, one writer and any
+# number of readers. Every slot carries the sequence number of its item: the
+# writer marks the slot negative while it writes (a seqlock), so a reader can
+# tell a finished item from one being overwritten without any locking.
+class SharedRing:
+    def __init__(self, memory, owner=False):
+        self.memory = memory
+        self.owner = owner
+        self.header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=memory.buf)
+        self.slots = int(self.header[SLOTS])
+        self.shape = tuple(int(size) for size in self.header[SHAPE:SHAPE + self.header[NDIM]])
+        dtype = np.dtype(DTYPES[int(self.header[DTYPE])])
+        offset = self.header.nbytes
+        self.seqs = np.ndarray((self.slots,), dtype=np.int64, buffer=memory.buf, offset=offset)
+        offset += self.seqs.nbytes
+        self.meta = np.ndarray((self.slots, META_FIELDS), dtype=np.float64, buffer=memory.buf, offset=offset)
+        offset += self.meta.nbytes
+        self.items = np.ndarray((self.slots, *self.shape), dtype=dtype, buffer=memory.buf, offset=offset)
+        self.writing = None
+        if not owner:
+            self.items.flags.writeable = False
+            self.meta.flags.writeable = False
+
+    @classmethod
+    def create(cls, name, shape, dtype, slots=8):
+        code = next(code for code, known in DTYPES.items() if np.dtype(known) == np.dtype(dtype))
+        size = ((HEADER_FIELDS + slots + slots * META_FIELDS) * 8
+                + slots * int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        try:
+            memory = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a service that did not shut down cleanly
+            stale = _attach(name)
+            stale.close()
+            stale.unlink()
+            memory = shared_memory.SharedMemory(name, create=True, size=size)
+        header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=memory.buf)
+        header[:] = 0
+        header[SLOTS], header[DTYPE], header[NDIM] = slots, code, len(shape)
+        header[SHAPE:SHAPE + len(shape)] = shape
+        ring = cls(memory, owner=True)
+        ring.seqs[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name):
+        return cls(_attach(name))
+
+    @property
+    def latestSeq(self):
+        return int(self.header[LATEST])
+
+    def begin(self):
+        # Writer: returns the next slot's (item, meta) to fill in place, then commit()
+        seq = self.latestSeq + 1
+        slot = seq % self.slots
+        self.seqs[slot] = -seq
+        self.writing = seq
+        return self.items[slot], self.meta[slot]
+
+    def commit(self):
+        seq, self.writing = self.writing, None
+        self.seqs[seq % self.slots] = seq
+        self.header[LATEST] = seq
+        return seq
+
+    def get(self, seq):
+        # Reader: (item, meta) views of item `seq`, None once it has been overwritten
+        slot = seq % self.slots
+        if seq <= 0 or self.seqs[slot] != seq:
+            return None
+        return self.items[slot], self.meta[slot]
+
+    def latest(self):
+        # Newest finished item as (seq, item, meta), (0, None, None) while empty
+        for _ in range(3):
+            seq = self.latestSeq
+            views = self.get(seq)
+            if views is not None:
+                return (seq, *views)
+            if seq == 0:
+                break
+        return 0, None, None
+
+    def valid(self, seq):
+        # Whether views handed out for `seq` still show that item
+        return self.seqs[seq % self.slots] == seq
+
+    def heartbeat(self):
+        self.header[HEARTBEAT] = time.monotonic_ns()
+
+    def idleSeconds(self):
+        last = int(self.header[HEARTBEAT])
+        return (time.monotonic_ns() - last) / 1e9 if last else float("inf")
+
+    def close(self):
+        self.header = self.seqs = self.meta = self.items = None
+        try:
+            self.memory.close()
+        except BufferError:
+            pass  # views still held by frame packets, the mapping goes when they do
+        if self.owner:
+            self.memory.unlink()
+
+
+class LandmarkService:
+    def __init__(self, cap, name=DEFAULT_NAME, models=("pose", "face"), size=(1280, 720),
+                 slots=8, idleAfter=2.0):
+        from trackers import SERVICE_MODELS
+
+        self.name = name
+        self.idleAfter = idleAfter  # seconds without readers before a model stops running
+        self.cap = cap  # webcam, or a video file (input_source.VideoFileSource)
+        if not self.cap.isOpened():
+            raise RuntimeError("Cannot open the camera")
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, size[0])
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, size[1])
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or size[0]
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or size[1]
+        # One inference on a blank frame finishes MediaPipe's lazy graph setup
+        blank = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        self.trackers = {model: SERVICE_MODELS[model]() for model in models}
+        for tracker in self.trackers.values():
+            tracker.detect(blank)
+        # Readers can attach once the segments exist, so they come last
+        self.frames = SharedRing.create(f"{name}_frames", (self.height, self.width, 3), np.uint8, slots)
+        self.rings = {model: SharedRing.create(f"{name}_{model}", (MODEL_POINTS[model], 3), np.float64, slots)
+                      for model in models}
+        self.newFrame = threading.Condition()
+        self.stopEvent = threading.Event()
+        self.threads = []
+        self.inferences = {model: 0 for model in models}
+
+    def start(self):
+        self.threads = [threading.Thread(target=self._captureLoop, name="capture", daemon=True)]
+        self.threads += [threading.Thread(target=self._modelLoop, args=(model,), name=model, daemon=True)
+                         for model in self.rings]
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self.stopEvent.set()
+        with self.newFrame:
+            self.newFrame.notify_all()
+        for thread in self.threads:
+            thread.join(timeout=2.0)
+        for tracker in self.trackers.values():
+            tracker.close()
+        self.cap.release()
+        for ring in (self.frames, *self.rings.values()):
+            ring.close()
+
+    def _captureLoop(self):
+        while not self.stopEvent.is_set():
+            start = time.perf_counter()
+            success, img = self.cap.read()
+            if not success:
+                time.sleep(0.01)
+                continue
+            item, meta = self.frames.begin()
+            if img.shape == item.shape:
+                np.copyto(item, img)
+            else:
+                cv2.resize(img, (self.width, self.height), dst=item)
+            captureTime = time.perf_counter()
+            meta[:] = (captureTime, (captureTime - start) * 1000, 0, 0)
+            with self.newFrame:
+                self.frames.commit()
+                self.newFrame.notify_all()
+
+    def _modelLoop(self, model):
+        ring, tracker = self.rings[model], self.trackers[model]
+        seq = 0
+        while not self.stopEvent.is_set():
+            if ring.idleSeconds() > self.idleAfter:
+                self.stopEvent.wait(0.05)  # no reader, leave the core alone
+                continue
+            with self.newFrame:
+                self.newFrame.wait_for(lambda: self.frames.latestSeq > seq or self.stopEvent.is_set(), 0.1)
+            seq, img, frameMeta = self.frames.latest()
+            if img is None:
+                continue
+            captureTime = frameMeta[0]
+            start = time.perf_counter()
+            points = tracker.detect(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+            inferenceMs = (time.perf_counter() - start) * 1000
+            item, meta = ring.begin()
+            if points is None:
+                item[:] = np.nan
+            else:
+                item[:len(points)] = points
+                item[len(points):] = np.nan
+            # Which frame the landmarks belong to, so readers can show that frame
+            meta[:] = (seq, captureTime, inferenceMs, points is not None)
+            ring.commit()
+            self.inferences[model] += 1
+
+
+# Reader side: a capture source for the games. read() hands over the frame
+# the newest landmarks were computed on (the newest frame if that one has
+# been overwritten already), and sets `lastLandmarks` like a recorded trace
+# does, so the capture pipeline runs no tracker of its own. Unlike a trace's,
+# the landmarks belong to the raw camera frame: `cameraLandmarks` makes the
+# pipeline map them through the game's prepareLandmarks. Frames are
+# read-only views into the shared memory.
+class LandmarkServiceSource:
+    cameraLandmarks = True
+
+    def __init__(self, model, landmarks, name=DEFAULT_NAME, timeout=1.0):
+        self.model = model
+        self.landmarks = landmarks  # name -> landmark index, see trackers.SERVICE_LANDMARKS
+        self.timeout = timeout
+        self.frames = self.ring = None
+        try:
+            self.frames = SharedRing.attach(f"{name}_frames")
+            self.ring = SharedRing.attach(f"{name}_{model}")
+        except FileNotFoundError:
+            print(f"Landmark service '{name}' with the {model} model is not running, "
+                  f"start it with: python landmark_service.py --name {name}")
+            return
+        self.ring.heartbeat()  # wakes the model up
+        self.lastSeq = 0
+        self.lastLandmarks = None
+
+    def isOpened(self):
+        return self.ring is not None
+
+    def read(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            self.ring.heartbeat()
+            seq, points, meta = self.ring.latest()
+            if seq > self.lastSeq:
+                break
+            if time.monotonic() > deadline:
+                return False, None
+            time.sleep(0.002)
+        self.lastSeq = seq
+        frameSeq, _, _, detected = meta.tolist()
+        views = self.frames.get(int(frameSeq))
+        frame = views[0] if views is not None else self.frames.latest()[1]
+        landmarks = {}
+        if detected:
+            landmarks = {name: tuple(points[index].tolist()) for name, index in self.landmarks.items()}
+        if not self.ring.valid(seq):
+            return self.read()  # overwritten while we copied the landmarks out
+        self.lastLandmarks = landmarks
+        return True, frame
+
+    def set(self, prop, value):
+        # The service owns the camera, its resolution is fixed
+        return False
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.frames.shape[1]
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.frames.shape[0]
+        return 0
+
+    def release(self):
+        for ring in (self.frames, self.ring):
+            if ring is not None:
+                ring.close()
+        self.frames = self.ring = None
+
+
+def serviceRunning(name=DEFAULT_NAME):
+    try:
+        SharedRing.attach(f"{name}_frames").close()
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Own the webcam and MediaPipe models, publish landmarks "
+                                                 "to games through shared memory")
+    parser.add_argument("--camera", type=int, default=0, help="webcam index (default 0)")
+    parser.add_argument("--video", help="serve a video file (looped, at its frame rate) instead of the webcam")
+    parser.add_argument("--name", default=DEFAULT_NAME, help="shared-memory name prefix, games use --service NAME")
+    parser.add_argument("--models", nargs="+", choices=sorted(MODEL_POINTS), default=["face", "pose"],
+                        help="models to run")
+    parser.add_argument("--width", type=int, default=1280, help="requested camera width")
+    parser.add_argument("--height", type=int, default=720, help="requested camera height")
+    parser.add_argument("--slots", type=int, default=8, help="ring buffer slots per segment")
+    args = parser.parse_args()
+
+    from input_source import VideoFileSource, openCamera
+    cap = VideoFileSource(args.video, loop=True, realtime=True) if args.video else openCamera(args.camera)
+    service = LandmarkService(cap, args.name, args.models, (args.width, args.height), args.slots).start()
+    print(f"Landmark service '{args.name}': {service.width}x{service.height}, models {', '.join(args.models)}")
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # unlink the segments on terminate too
+    try:
+        while True:
+            time.sleep(5)
+            counts = ", ".join(f"{model} {count}" for model, count in service.inferences.items())
+            print(f"Landmark service: {service.frames.latestSeq} frames, inferences {counts}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
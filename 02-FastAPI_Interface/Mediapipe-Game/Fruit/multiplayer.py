@@ -0,0 +1,139 @@
+import os
+
+import numpy as np
+
+from hit_test import LandmarkTrail
+
+# Booth mode (--players N): two to four players stand side by side and the
+# camera picture is split into N equal vertical strips, player 1 on the left
+# of the (mirrored) screen. Each player's landmarks come from their own strip
+# and go through the pipeline under prefixed names ("p2_nose"), so landmark
+# filters, recordings and traces handle them like any other landmark. With
+# one player nothing is prefixed.
+
+PLAYER_COLORS = [(0, 255, 255), (255, 255, 0), (255, 0, 255), (0, 255, 0)]  # BGR, one per player
+
+
+def playerKey(name, player):
+    return f"p{player + 1}_{name}"
+
+
+def playerRegion(player, players):
+    # (x0, x1) of the player's strip as fractions of the frame width
+    return player / players, (player + 1) / players
+
+
+# Score, lives and landmark trail of one player
+class Player:
+    def __init__(self, index, players, lives, trail=2):
+        self.index = index
+        self.players = players
+        self.name = f"P{index + 1}"
+        self.region = playerRegion(index, players)
+        self.color = PLAYER_COLORS[index % len(PLAYER_COLORS)]
+        self.score = 0
+        self.lives = lives
+        self.trail = LandmarkTrail(trail)
+        self.point = None  # landmark position on screen this frame, None when not found
+        self.nearby = set()  # bodies near the trail this frame (hit_test index)
+
+    def landmarks(self, landmarks):
+        if self.players == 1:
+            return landmarks
+        prefix = playerKey("", self.index)
+        return {name[len(prefix):]: value for name, value in landmarks.items() if name.startswith(prefix)}
+
+    def pixelRegion(self, width):
+        x0, x1 = self.region
+        return int(x0 * width), int(x1 * width)
+
+
+def playerAt(players, x, width):
+    # The player whose strip contains screen x (clamped to the screen)
+    return players[min(len(players) - 1, max(0, int(x * len(players) // width)))]
+
+
+# Worker side: every player gets a process of their own that keeps one tracker
+# (and its tracking state) for the whole game
+
+_tracker = None
+
+
+def _startWorker(factory, roi):
+    global _tracker
+    _tracker = factory(roi=roi)
+
+
+def _process(imgRGB):
+    return _tracker.process(imgRGB)
+
+
+def _setModelComplexity(complexity):
+    if hasattr(_tracker, "setModelComplexity"):
+        _tracker.setModelComplexity(complexity)
+
+
+def _ready():
+    return os.getpid()
+
+
+# Runs the game's tracker once per player strip, each in a process of its own
+# so the players' inference runs on separate cores, and merges the results
+# back into full-frame coordinates under prefixed names. With parallel=False
+# (default on a single core, where the processes only add copying) the
+# trackers run one after the other in this process.
+class MultiPlayerTracker:
+    def __init__(self, factory, players, roi=None, parallel=None):
+        self.players = players
+        self.parallel = (os.cpu_count() or 1) > 1 if parallel is None else parallel
+        self.lastPoints = None
+        self.workers = []
+        self.trackers = []
+        if self.parallel:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # spawn: the game process already runs capture threads and SDL
+            context = multiprocessing.get_context("spawn")
+            self.workers = [ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=_startWorker,
+                                                initargs=(factory, roi)) for _ in range(players)]
+            # Start (and load the models) in parallel, before the first frame
+            for future in [worker.submit(_ready) for worker in self.workers]:
+                future.result()
+        else:
+            self.trackers = [factory(roi=roi) for _ in range(players)]
+
+    def process(self, imgRGB):
+        width = imgRGB.shape[1]
+        strips = []
+        for player in range(self.players):
+            x0, x1 = playerRegion(player, self.players)
+            strips.append((int(x0 * width), int(x1 * width)))
+        if self.parallel:
+            futures = [worker.submit(_process, imgRGB[:, x0:x1].copy())
+                       for worker, (x0, x1) in zip(self.workers, strips)]
+            results = [future.result() for future in futures]
+        else:
+            results = [tracker.process(np.ascontiguousarray(imgRGB[:, x0:x1]))
+                       for tracker, (x0, x1) in zip(self.trackers, strips)]
+
+        # Strip-normalized -> frame-normalized
+        landmarks = {}
+        for player, ((x0, x1), found) in enumerate(zip(strips, results)):
+            for name, (x, y, visibility) in found.items():
+                landmarks[playerKey(name, player)] = ((x0 + x * (x1 - x0)) / width, y, visibility)
+        return landmarks
+
+    def setModelComplexity(self, complexity):
+        if self.parallel:
+            for future in [worker.submit(_setModelComplexity, complexity) for worker in self.workers]:
+                future.result()
+        else:
+            for tracker in self.trackers:
+                if hasattr(tracker, "setModelComplexity"):
+                    tracker.setModelComplexity(complexity)
+
+    def close(self):
+        for worker in self.workers:
+            worker.shutdown(cancel_futures=True)
+        for tracker in self.trackers:
+            tracker.close()
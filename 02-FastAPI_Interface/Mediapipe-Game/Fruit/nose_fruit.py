@@ -1,76 +1,81 @@
 import pygame
-import pymunk
 import random
 import os
-import mediapipe as mp
-import cv2
-import numpy as np
+import math
 import time
+from asset_cache import getCache, preloadFruits
+from entity_lifecycle import EntityLifecycle, formatLifecycle
+from entity_pool import EntityPool, formatPool
+from game_clock import PhysicsClock
+from hit_test import makeHitIndex, pathHitsBox
+from hud import TextRenderer
+from multiplayer import Player
+from options import GameOptions, parseOptions
+from quality import QualityController
+from session_result import formatResult
+from trackers import noseTracker
 
 # Fruit Class
 class Fruit:
-    def __init__(self, space, path, scale=1, grid=(2, 4),
-                 animationFrames=None, speedAnimation=1, speed=3, pathSoundSlice=None):
-        # Loading Main Image
+    # Fixed attribute set: fruits are pooled and reset, never grown
+    __slots__ = ("scale", "imgList", "img", "rectImg", "path", "animationCount", "speedAnimation",
+                 "isAnimating", "speed", "pathSoundSlice", "soundSlice", "slice", "widthWindow",
+                 "heightWindow", "pos", "mass", "moment", "body", "shape", "space", "isStartingFrame",
+                 "width", "height", "isBomb", "slicedBy")
+
+    def __init__(self, space, path=None, **spawn):
+        self.widthWindow, self.heightWindow = pygame.display.get_surface().get_size()
+        self.rectImg = pygame.Rect(0, 0, 0, 0)
+
+        # Physics (body and shape live as long as the fruit and are reused on reset)
+        # (pymunk was imported by the physics startup phase, not before Game())
+        import pymunk
+        from array_physics import makeBody, makeCircle
+        self.mass = 1
+        self.moment = pymunk.moment_for_circle(self.mass, 0, 30)
+        self.body = makeBody(space, self.mass, self.moment)
+        self.shape = makeCircle(self.body, 30)
+        self.space = space
+        if path:
+            self.reset(path, **spawn)
+
+    def reset(self, path, scale=1, grid=(2, 4),
+              animationFrames=None, speedAnimation=1, speed=3, pathSoundSlice=None):
+        # Frames come from the shared cache, so fruits of one type share one list
         self.scale = scale
-        try:
-            img = pygame.image.load(path).convert_alpha()
-        except pygame.error:
-            raise FileNotFoundError(f"Image file not found: {path}")
-        width, height = img.get_size()
-        img = pygame.transform.smoothscale(img, (int(width * self.scale), int(height * self.scale)))
-        width, height = img.get_size()
-
-        # Split image to get all frames
-        if animationFrames is None:
-            animationFrames = grid[0] * grid[1]
-        widthSingleFrame = width / grid[1]
-        heightSingleFrame = height / grid[0]
-        self.imgList = []
-        counter = 0
-        for row in range(grid[0]):
-            for col in range(grid[1]):
-                counter += 1
-                if counter <= animationFrames:
-                    imgCrop = img.subsurface((col * widthSingleFrame, row * heightSingleFrame,
-                                              widthSingleFrame, heightSingleFrame))
-                    self.imgList.append(imgCrop)
+        self.imgList = getCache().getFrames(path, scale, grid, animationFrames)
 
         self.img = self.imgList[0]
-        self.rectImg = self.img.get_rect()
+        self.rectImg.size = self.img.get_size()
         self.path = path
         self.animationCount = 0
         self.speedAnimation = speedAnimation
         self.isAnimating = False
         self.speed = speed
         self.pathSoundSlice = pathSoundSlice
-        if self.pathSoundSlice:
-            try:
-                self.soundSlice = pygame.mixer.Sound(self.pathSoundSlice)
-            except pygame.error:
-                raise FileNotFoundError(f"Sound file not found: {pathSoundSlice}")
+        self.soundSlice = getCache().getSound(self.pathSoundSlice) if self.pathSoundSlice else None
         self.slice = False
+        self.slicedBy = None
 
-        self.widthWindow, self.heightWindow = pygame.display.get_surface().get_size()
         self.pos = random.randint(0, self.widthWindow), 100
 
         # Physics
-        self.mass = 1
-        self.moment = pymunk.moment_for_circle(self.mass, 0, 30)
-        self.body = pymunk.Body(self.mass, self.moment)
-        self.shape = pymunk.Circle(self.body, 30)
-        self.shape.body.position = self.pos
+        self.body.position = self.pos
+        self.body.velocity = 0, 0
+        self.body.angular_velocity = 0
+        self.body.angle = 0
 
         # Add to Space
-        self.space = space
-        self.space.add(self.body, self.shape)
+        if self.body.space is None:
+            self.space.add(self.body, self.shape)
 
         self.isStartingFrame = True
         self.width, self.height = self.img.get_size()
 
         self.isBomb = "bomb" in path.lower()
+        return self
 
-    def draw(self, window):
+    def draw(self, window, position=None):
         if self.isStartingFrame:
             if self.pos[0] < self.widthWindow // 2:
                 randX = random.randint(100, 300)
@@ -80,20 +85,33 @@ class Fruit:
             self.shape.body.apply_impulse_at_local_point((randX, randY), (0, 0))
             self.isStartingFrame = False
 
-        # Draw
-        x, y = int(self.body.position[0]), self.heightWindow - int(self.body.position[1])
+        # Draw (at the interpolated physics position when one is given)
+        if position is None:
+            position = self.body.position
+        x, y = int(position[0]), self.heightWindow - int(position[1])
         self.rectImg.x, self.rectImg.y = x - self.width // 2, y - self.height // 2
         window.blit(self.img, self.rectImg)
 
-    def checkSlice(self, x, y):
+    def hitReach(self):
+        # Farthest a hit can be from the fruit centre (half the hitbox diagonal)
+        return math.hypot(self.width, self.height) * 0.35
+
+    def checkSlice(self, paths):
+        # `paths` has each player's nose trail (see hit_test), None for a player whose
+        # nose is nowhere near; slicedBy is the player who hit the fruit first
         # Adjusted hitbox
         fx, fy = self.rectImg.x + self.width // 2, self.rectImg.y + self.height // 2
         fw, fh = self.width * 0.7, self.height * 0.7
-
-        if fx - fw // 2 < x < fx + fw // 2 and fy - fh // 2 < y < fy + fh // 2 and not self.isAnimating:
-            self.isAnimating = True
-            if self.pathSoundSlice:
-                self.soundSlice.play()
+        box = (fx - fw // 2, fy - fh // 2, fx + fw // 2, fy + fh // 2)
+
+        if not self.isAnimating:
+            for player, path in enumerate(paths):
+                if path and pathHitsBox(path, box):
+                    self.isAnimating = True
+                    self.slicedBy = player
+                    if self.pathSoundSlice:
+                        self.soundSlice.play()
+                    break
 
         if self.isAnimating:
             if self.animationCount < len(self.imgList) - 1:
@@ -108,8 +126,11 @@ class Fruit:
         return None
 
 # Game Function
-def Game():
+def Game(options=None):
+    options = options or GameOptions()
+
     # Initialize
+    options.setupDisplay()
     pygame.init()
     pygame.event.clear()
 
@@ -120,35 +141,66 @@ def Game():
 
     # Initialize Clock for FPS
     fps = 23
-    clock = pygame.time.Clock()
+    clock = options.makeClock()
+    hud = TextRenderer()
 
-    # Images
-    try:
-        imgGameOver = pygame.image.load("./fru.jpg").convert()
-    except pygame.error:
-        raise FileNotFoundError("Game over image not found: ./fru.jpg")
-
-    # Initialize mediapipe pose
-    mp_pose = mp.solutions.pose
-    pose = mp_pose.Pose(
-        min_detection_confidence=0.5,
-        min_tracking_confidence=0.5,
-        model_complexity=1
-    )
-
-    # Webcam
-    cap = cv2.VideoCapture(0)
+    # Pose model (nose only, not needed when replaying a trace), webcam (or video
+    # file / landmark trace), physics and sprites load in parallel behind a loading screen
+    def loadImages(phase):
+        try:
+            return pygame.image.load("./fru.jpg").convert()
+        except pygame.error:
+            raise FileNotFoundError("Game over image not found: ./fru.jpg")
+
+    startup = options.makeStartup(window, clock, noseTracker, cameraSize=(width, height))
+    startup.add("assets", loadImages)
+    startup.add("physics", lambda phase: options.loadSpace((0.0, -1000.0), phase))
+    # Fruit sprite sheets keep decoding after the first frame, a spawn that needs one first decodes it itself
+    startup.add("sprites", lambda phase: preloadFruits(stopped=phase.stopped), background=True)
+    tracker, cap, imgGameOver, space = startup.wait()
+    # Frame handling needs cv2, which the camera phase has imported by now
+    import cv2
+    from capture_pipeline import CapturePipeline, formatLatency, mirrorLandmarks
+    from frame_presenter import FramePresenter
+    from renderer import ScreenTint
     if not cap.isOpened():
         raise RuntimeError("Error: Cannot open webcam")
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
     actual_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     actual_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     print(f"Webcam resolution: {actual_width}x{actual_height}")
 
+    # Capture and pose inference run on background threads
+    profiler = options.makeProfiler()
+    # Landmarks from the landmark service are mirrored along with the frame
+    pipeline = CapturePipeline(cap, tracker, prepare=lambda img: cv2.flip(img, 1),
+                               prepareLandmarks=mirrorLandmarks,
+                               threaded=options.threaded, profiler=profiler, timeSource=clock.now,
+                               scheduler=options.makeScheduler()).start()
+    # Recorded or replayed with --record/--replay
+    pipeline = options.wrapPipeline(pipeline)
+    # Optional One Euro smoothing and prediction, extrapolation between decimated inferences
+    landmarkFilter = options.makeLandmarkFilter()
+    # Camera resolution may drop under adaptive quality, keep displaying at the first frame's size
+    presenter = FramePresenter(keepSize=True)
+    quality = QualityController(options.targetFps, pipeline, cameraSize=(width, height))
+    # Rolling FPS and stage timings on screen (--debug-overlay)
+    overlay = options.makeOverlay()
+    # Static screens are composited once and updated only where they change
+    layers = options.makeDisplay(window)
+
     # Physics
-    space = pymunk.Space()
-    space.gravity = 0.0, -1000.0
+    # Fixed 1/fps sub-steps follow the game clock, not the number of rendered frames
+    physics = PhysicsClock(space, 1 / fps, clock.now())
+    # Released fruits go back to the pool for the next spawn
+    pool = EntityPool(lambda: Fruit(space), prewarm=options.poolPrewarm)
+    # Missed fruits leave the space once they fall out of the window
+    lifecycle = EntityLifecycle(space, (width, height), onRelease=pool.release, physics=physics)
+    # One player, or --players side by side with their own score and lives. Swept
+    # slicing: each nose path since the last frame is tested, not just where it is now
+    players = [Player(i, options.players, lives=5, trail=options.hitTrail) for i in range(options.players)]
+    multiplayer = len(players) > 1
+    hitIndex = makeHitIndex(options.hitIndex, space, toSpace=lambda point: (point[0], height - point[1]))
+    hitReach = 0  # largest hitbox reach of any spawned fruit
 
     # Parameters
     timeTotal = 140  # Changed to 140 seconds
@@ -156,103 +208,118 @@ def Game():
     min_spawn_interval = 0.3
     initial_fruit_speed = 3
     max_fruit_speed = 5
-    lives = 5
     max_lives = 3  # Max lives from point conversion
 
     # Variables
     fruitList = []
-    timeGenerator = time.time()
-    timeStart = time.time()
+    timeGenerator = clock.now()
+    timeStart = clock.now() - options.startAt
     gameOver = False
-    score = 0
     popup_message = None
     popup_time = 0
 
     # Colors
     white = (255, 255, 255)
-    yellow = (0, 255, 255)
     black = (0, 0, 0)
     red = (0, 0, 255)
+    # Low-lives border and red tint, the tint precomputed as a lookup table
+    lowLives = ScreenTint(red, weight=0.3, border=10)
 
     # Fruit Path List
     pathFruitFolder = "./Fruits"
     if not os.path.exists(pathFruitFolder):
         raise FileNotFoundError(f"Fruits folder not found: {pathFruitFolder}")
-    pathListFruit = os.listdir(pathFruitFolder)
+    pathListFruit = sorted(os.listdir(pathFruitFolder))  # same order on every machine, for replays
 
     # Fruit Generation Function
     def generateFruit():
+        nonlocal hitReach
         randomScale = round(random.uniform(0.6, 0.8), 2)
         randomFruitPath = pathListFruit[random.randint(0, len(pathListFruit) - 1)]
         pathSoundSlice = './explosion.wav' if "bomb" in randomFruitPath.lower() else './slice.wav'
-        elapsed_time = time.time() - timeStart
+        elapsed_time = clock.now() - timeStart
         speed = initial_fruit_speed + (max_fruit_speed - initial_fruit_speed) * min((elapsed_time - 60) / 60, 1) if elapsed_time > 60 else initial_fruit_speed
-        fruitList.append(Fruit(space, path=os.path.join(pathFruitFolder, randomFruitPath),
-                               grid=(4, 4), animationFrames=14, scale=randomScale,
-                               pathSoundSlice=pathSoundSlice, speed=speed))
+        fruit = pool.acquire(path=os.path.join(pathFruitFolder, randomFruitPath),
+                             grid=(4, 4), animationFrames=14, scale=randomScale,
+                             pathSoundSlice=pathSoundSlice, speed=speed)
+        hitReach = max(hitReach, fruit.hitReach())
+        fruitList.append(lifecycle.spawn(fruit))
 
     # Check Life Bonus
-    def check_life_bonus():
-        nonlocal lives, score, popup_message, popup_time
-        if lives == 1 and score >= 15 and lives < max_lives:  # Changed to 15 points
-            score -= 15
-            lives += 1
-            popup_message = "Bonus: Poinmu ditukar untuk 1 life!"
-            popup_time = time.time()
-        elif lives == 2 and score >= 15 and lives < max_lives:  # Changed to 15 points
-            score -= 15
-            lives += 1
-            popup_message = "Bonus: Poinmu ditukar untuk 1 life!"
-            popup_time = time.time()
+    def check_life_bonus(player):
+        nonlocal popup_message, popup_time
+        if player.lives == 1 and player.score >= 15 and player.lives < max_lives:  # Changed to 15 points
+            player.score -= 15
+            player.lives += 1
+            popup_message = bonus_message(player)
+            popup_time = clock.now()
+        elif player.lives == 2 and player.score >= 15 and player.lives < max_lives:  # Changed to 15 points
+            player.score -= 15
+            player.lives += 1
+            popup_message = bonus_message(player)
+            popup_time = clock.now()
+
+    def bonus_message(player):
+        message = "Bonus: Poinmu ditukar untuk 1 life!"
+        return f"{player.name} {message}" if multiplayer else message
 
     # Main loop
+    frameCount = 0
+    packet = None
+    options.startSession("nose_fruit", clock)
     try:
-        while cap.isOpened():
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    return
-
+        while pipeline.isRunning():
+            if any(event.type == pygame.QUIT for event in options.events()):
+                break
+
+            frameCount += 1
+            if options.maxFrames and frameCount > options.maxFrames:
+                break
+            if gameOver and options.exitOnGameOver:
+                break
+
+            # Latest frame + landmarks from the pipeline, never blocks. The frame is
+            # only begun once there is a packet, so stalls do not skew the timings
+            frameStart = time.perf_counter()
             if not gameOver:
-                success, img = cap.read()
-                if not success:
-                    print("Failed to capture image")
-                    break
-                img = cv2.flip(img, 1)
+                packet = pipeline.latest()
+                if packet is None:
+                    clock.tick(fps)
+                    continue
+            profiler.beginFrame(frameStart)
+            quality.beginFrame(frameStart)
+            if not gameOver:
+                profiler.lap("pipeline")
+                # Camera pixels go straight into the presenter's display buffer
+                img = presenter.load(packet.image)
                 h, w = img.shape[:2]
 
-                # Process pose
-                imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-                keypoints = pose.process(imgRGB)
-                img = cv2.cvtColor(imgRGB, cv2.COLOR_RGB2BGR)
-
-                # Get nose position
-                nose_x, nose_y = None, None
-                if keypoints.pose_landmarks:
-                    lm = keypoints.pose_landmarks
-                    lmPose = mp_pose.PoseLandmark
-                    try:
-                        nose_x = int(lm.landmark[lmPose.NOSE].x * w)
-                        nose_y = int(lm.landmark[lmPose.NOSE].y * h)
-                        cv2.circle(img, (nose_x, nose_y), 20, yellow, -1)
-                    except AttributeError:
-                        pass
-
-                # Critical effects only when lives <= 2
-                if lives <= 2:
-                    border_thickness = 10
-                    cv2.rectangle(img, (0, 0), (w-1, h-1), red, border_thickness)
-                    overlay = np.full((h, w, 3), (0, 0, 255), dtype=np.uint8)
-                    img = cv2.addWeighted(img, 0.7, overlay, 0.3, 0.0)
-
-                # Convert to Pygame surface
-                imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-                imgRGB = np.rot90(imgRGB)
-                frame = pygame.surfarray.make_surface(imgRGB).convert()
-                frame = pygame.transform.flip(frame, True, False)
-                window.blit(frame, (0, 0))
+                # Get nose position of every player still in the game
+                landmarks = landmarkFilter.apply(packet, clock.now())
+                for player in players:
+                    player.point = None
+                    nose = player.landmarks(landmarks).get("nose") if player.lives > 0 or options.endless else None
+                    if nose:
+                        player.point = int(nose[0] * w), int(nose[1] * h)
+                        cv2.circle(img, player.point, 20, player.color, -1)
+                    player.trail.push(player.point)
+
+                # Critical effects only when lives <= 2 (the tint goes first under adaptive quality),
+                # over the player's own part of the screen
+                for player in players:
+                    if player.lives <= 2:
+                        x0, x1 = player.pixelRegion(w)
+                        lowLives.apply(img[:, x0:x1], tint=quality.effects)
+                if multiplayer:
+                    for player in players[1:]:
+                        x0, _ = player.pixelRegion(w)
+                        cv2.line(img, (x0, 0), (x0, h), white, 2)
+
+                presenter.blit(window)
+                profiler.lap("present")
 
                 # Dynamic spawn interval for 140 seconds
-                elapsed_time = time.time() - timeStart
+                elapsed_time = clock.now() - timeStart
                 if elapsed_time > 120:
                     spawn_interval = max(min_spawn_interval, initial_spawn_interval - (elapsed_time - 120) * 0.035)  # Last 20s
                 elif elapsed_time > 100:
@@ -260,81 +327,125 @@ def Game():
                 else:
                     spawn_interval = initial_spawn_interval
 
-                if time.time() - timeGenerator > spawn_interval:
+                if clock.now() - timeGenerator > spawn_interval:
+                    generateFruit()
+                    timeGenerator = clock.now()
+                while len(fruitList) < options.minFruits:
                     generateFruit()
-                    timeGenerator = time.time()
 
                 # Check life bonus
-                check_life_bonus()
+                for player in players:
+                    check_life_bonus(player)
+                profiler.lap("spawn")
 
                 # Process fruits
-                if nose_x is not None and nose_y is not None:
+                present = [player for player in players if player.point is not None]
+                if present:
+                    # Broad phase, with slack for the interpolated draw position (under one step of travel)
+                    hitIndex.update()
+                    for player in players:
+                        player.nearby = hitIndex.nearby(player.trail.path(), hitReach + 50) if player.point else set()
+                    snapshot = physics.snapshot()
                     for i, fruit in enumerate(fruitList):
                         if fruit:
-                            fruit.draw(window)
-                            checkSlice = fruit.checkSlice(nose_x, nose_y)
+                            fruit.draw(window, snapshot.drawPosition(fruit.body))
+                            checkSlice = fruit.checkSlice([player.trail.path() if fruit.body in player.nearby else None
+                                                           for player in players])
                             if checkSlice == 2:  # Bomb
-                                lives -= 1
+                                players[fruit.slicedBy].lives -= 1
+                                lifecycle.release(fruit, "bomb")
                                 fruitList[i] = None
-                                if lives <= 0:
+                                if all(player.lives <= 0 for player in players) and not options.endless:
                                     gameOver = True
                                     pygame.mixer.music.stop()
                             elif checkSlice == 1:  # Fruit
+                                lifecycle.release(fruit, "sliced")
                                 fruitList[i] = None
-                                score += 1
+                                players[fruit.slicedBy].score += 1
 
-                fruitList = [fruit for fruit in fruitList if fruit]
+                fruitList, _ = lifecycle.cull(fruitList)
                 timeLeft = int(timeTotal - elapsed_time)
                 if timeLeft <= 0:
                     gameOver = True
                     pygame.mixer.music.stop()
-
-                # Render HUD
-                font = pygame.font.Font(None, 60)
-                for text, pos in [
-                    (f"Score: {score}", (50, 35)),
-                    (f"Time: {timeLeft}", (1000, 35)),
-                    (f"Lives: {lives}", (10, 100))
-                ]:
-                    text_color = red if text.startswith("Lives") and lives <= 2 else white
-                    textSurf = font.render(text, True, text_color)
-                    textOutline = font.render(text, True, black)
-                    for dx, dy in [(-2, -2), (-2, 2), (2, -2), (2, 2)]:
-                        window.blit(textOutline, (pos[0] + dx, pos[1] + dy))
-                    window.blit(textSurf, pos)
+                profiler.lap("fruits")
+
+                # Render HUD (cached, re-rendered only when a value changes)
+                if not multiplayer:
+                    player = players[0]
+                    for text, pos in [
+                        (f"Score: {player.score}", (50, 35)),
+                        (f"Time: {timeLeft}", (1000, 35)),
+                        (f"Lives: {player.lives}", (10, 100))
+                    ]:
+                        text_color = red if text.startswith("Lives") and player.lives <= 2 else white
+                        hud.draw(window, text, pos, 60, text_color, outline=black)
+                else:
+                    # Every player's score and lives at the top of their part of the screen
+                    for player in players:
+                        x0, _ = player.pixelRegion(width)
+                        hud.draw(window, f"{player.name}: {player.score}", (x0 + 20, 35), 60, white, outline=black)
+                        hud.draw(window, f"Lives: {player.lives}", (x0 + 20, 90), 48,
+                                 red if player.lives <= 2 else white, outline=black)
+                    hud.draw(window, f"Time: {timeLeft}", (width // 2, height - 40), 60, white, outline=black,
+                             center=True)
 
                 # Render pop-up
-                if popup_message and time.time() - popup_time < 2:
-                    font_popup = pygame.font.Font(None, 80)
-                    popup_surf = font_popup.render(popup_message, True, white)
-                    popup_outline = font_popup.render(popup_message, True, black)
-                    popup_rect = popup_surf.get_rect(center=(width // 2, height // 2))
-                    for dx, dy in [(-2, -2), (-2, 2), (2, -2), (2, 2)]:
-                        window.blit(popup_outline, (popup_rect.x + dx, popup_rect.y + dy))
-                    window.blit(popup_surf, popup_rect)
-                elif time.time() - popup_time >= 2:
+                if popup_message and clock.now() - popup_time < 2:
+                    hud.draw(window, popup_message, (width // 2, height // 2), 80, white,
+                             outline=black, center=True)
+                elif clock.now() - popup_time >= 2:
                     popup_message = None
+                profiler.lap("hud")
 
             else:
-                window.blit(imgGameOver, (0, 0))
-                font = pygame.font.Font(None, 150)
                 # Display "You Win!" if time runs out
                 win_text = "You Win!" if timeLeft <= 0 else "You Lose!"
-                for text, pos in [
-                    (win_text, (400, 143)),
-                    ("Your Score:", (350, 243)),
-                    (str(score), (600, 343))
-                ]:
-                    textSurf = font.render(text, True, black)
-                    window.blit(textSurf, pos)
-
-            pygame.display.update()
+
+                scores = tuple(player.score for player in players)
+
+                def drawGameOver(surface):
+                    surface.blit(imgGameOver, (0, 0))
+                    lines = [(win_text, (400, 143), 150)]
+                    if not multiplayer:
+                        lines += [("Your Score:", (350, 243), 150), (str(scores[0]), (600, 343), 150)]
+                    else:
+                        lines += [(f"{player.name}: {player.score}", (450, 243 + 100 * i), 100)
+                                  for i, player in enumerate(players)]
+                    for text, pos, size in lines:
+                        hud.draw(surface, text, pos, size, black)
+
+                # Composited once, later frames only redraw the debug overlay
+                layers.showStatic((win_text, scores), drawGameOver)
+                profiler.lap("hud")
+
+            profiler.sample(packet, len(fruitList))
+            layers.update(overlay.draw(window))
+            options.frameShown()
+            profiler.lap("display")
+            quality.endFrame()
             clock.tick(fps)
-            space.step(1 / fps)
+            profiler.lap("tick")
+            physics.update(clock.now())
+            profiler.lap("physics")
+            profiler.endFrame()
     finally:
+        pipeline.stop()
+        print(formatLatency(pipeline.latencySummary()))
+        print(formatLifecycle(lifecycle.stats()))
+        print(formatPool(pool.stats()))
+        result = options.finishSession(score=sum(player.score for player in players),
+                                       lives=sum(player.lives for player in players), lifecycle=lifecycle,
+                                       sliced=lifecycle.released.get("sliced", 0),
+                                       bombs=lifecycle.released.get("bomb", 0),
+                                       players=players if multiplayer else None)
+        print(formatResult(result))
+        if tracker:
+            tracker.close()
         cap.release()
         cv2.destroyAllWindows()
-        pygame.quit()
+        options.closeDisplay()
+    return result
 
 if __name__ == "__main__":
-    Game()
\ No newline at end of file
+    Game(parseOptions(description="Nose Fruit"))
\ No newline at end of file
@@ -0,0 +1,428 @@
+import argparse
+import os
+import random
+import time
+
+import pygame
+
+from game_clock import RealClock, SimulatedClock
+from hit_test import HIT_INDEXES
+from landmark_filter import LandmarkFilter, SmoothingConfig, extrapolationOnly
+from profiler import NullProfiler
+from session_result import SessionRecorder, writeResult
+from startup import StartupPipeline, processAge
+from trackers import SERVICE_LANDMARKS, RoiConfig, SharedTracker, withRoi
+
+# Only what parsing the options and every game needs is imported here. cv2,
+# pymunk and the optional features (replay, landmark service, multiplayer,
+# telemetry, layered display, array physics) are imported by the make*/load*
+# method that uses them, most of them on a startup thread behind the loading
+# screen, so they are not part of the imports before Game().
+
+# array_physics.PHYSICS_BACKENDS; named here so parsing does not import pymunk
+PHYSICS_BACKENDS = ("array", "pymunk")
+
+
+def setupHeadless():
+    # Must run before pygame.init(): SDL picks its drivers at init time
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+
+# Run-time options shared by the three games. The defaults reproduce the
+# original behaviour: live webcam, real window, wall-clock timing.
+class GameOptions:
+    def __init__(self, camera=0, video=None, trace=None, headless=False, realtime=None,
+                 loop=False, maxFrames=None, profiler=None, startAt=0, minFruits=0, endless=False,
+                 roi=None, targetFps=None, poolPrewarm=16, hitTrail=2,
+                 hitIndex=None, physics="pymunk", smoothing=None, inferEvery=1, inferBudget=None, inferMaxEvery=8,
+                 resultFile=None, telemetry=None, debugOverlay=False, record=None, replay=None, seed=None,
+                 fullRedraw=False, service=None, players=1):
+        self.camera = camera
+        self.video = video
+        self.trace = trace
+        self.headless = headless
+        # Headless runs default to simulated time (faster than real time, deterministic)
+        self.realtime = (not headless) if realtime is None else realtime
+        self.loop = loop
+        self.maxFrames = maxFrames
+        # Benchmark hooks: per-stage timer, start this many seconds into the
+        # session, keep at least this many fruits alive, and ignore losing all
+        # lives so stress scenarios run for their whole frame budget
+        self.profiler = profiler or NullProfiler()
+        self.startAt = startAt
+        self.minFruits = minFruits
+        self.endless = endless
+        # trackers.RoiConfig: crop inference to a box around the player, None = full frame
+        self.roi = roi
+        # Adaptive quality: trade inference/render quality for this frame rate, None = fixed quality
+        self.targetFps = targetFps
+        # Fruits built up front for the entity pool, so early spawns reuse instead of allocating
+        self.poolPrewarm = poolPrewarm
+        # Landmark positions swept for hits: 2 tests the move since the last frame, 1 only the current point
+        self.hitTrail = hitTrail
+        # Physics backend (array_physics.PHYSICS_BACKENDS): pymunk, or array for NumPy arrays
+        # of positions/velocities integrated in bulk (no fruit-fruit collisions; experimental,
+        # not faster in game so far: drawing the sprites dominates, see run_benchmarks.py)
+        self.physics = physics
+        # Broad phase for hit tests (hit_test.HIT_INDEXES): pymunk (the default), distance
+        # (vectorized, the default with array physics); grid and brute (test every fruit)
+        # are comparison backends for the benchmarks
+        self.hitIndex = hitIndex
+        # landmark_filter.SmoothingConfig: One Euro smoothing (+ prediction), None = raw landmarks
+        self.smoothing = smoothing
+        # Inference decimation: run the tracker on every Nth frame, or within a share of
+        # the frame time (N adapts to the measured inference time, up to inferMaxEvery)
+        self.inferEvery = inferEvery
+        self.inferBudget = inferBudget
+        self.inferMaxEvery = inferMaxEvery
+        # JSON file the session result is written to at the end of the game (see session_result)
+        self.resultFile = resultFile
+        self.session = None
+        # Per-frame telemetry saved to this .npz/.csv at the end, and/or shown live in a debug overlay
+        self.telemetry = telemetry
+        self.debugOverlay = debugOverlay
+        self.recorder = None
+        # startup.StartupPipeline of this game: loading screen, parallel loading, time to first frame
+        self.startup = None
+        self.startedAt = None
+        # Send every frame to the display whole, also static screens (renderer.LayeredDisplay)
+        self.fullRedraw = fullRedraw
+        # game_host.GameHost when the game runs inside the long-lived host process:
+        # it lends warm trackers and the open camera and times the first frame
+        self.host = None
+        # Read camera frames and landmarks from landmark_service.py (its --name, True for the
+        # default name), no tracker in the game
+        self.service = service
+        self.serviceLandmarks = None
+        # Side-by-side players (multiplayer.py): the frame is split into this many strips,
+        # each tracked in its own process, with score and lives per player
+        self.players = players
+        # Deterministic replay (replay.py): seed `random` with `seed` (random when recording),
+        # save the session to `record`, or re-run the session saved in `replay`
+        self.record = record
+        self.replay = replay
+        self.seed = seed
+        self.recording = None
+        self.replayMatches = None
+        if replay:
+            from replay import GAMEPLAY_OPTIONS, SessionRecording
+            self.recording = SessionRecording.load(replay)
+            for name in GAMEPLAY_OPTIONS:
+                # Recordings from before an option existed ran with its default
+                setattr(self, name, self.recording.meta.get(name, getattr(self, name)))
+            self.seed = self.recording.meta["seed"]
+            self.headless, self.realtime = True, False
+        if self.hitIndex is None:
+            self.hitIndex = "distance" if self.physics == "array" else "pymunk"
+
+    @property
+    def live(self):
+        return not (self.video or self.trace or self.replay)
+
+    @property
+    def threaded(self):
+        # Background capture/inference only makes sense against the wall clock
+        return self.realtime
+
+    @property
+    def exitOnGameOver(self):
+        if self.replay:
+            return self.recording.meta["exitOnGameOver"]
+        return self.headless
+
+    def setupDisplay(self):
+        # First thing every game does: startup times count from here
+        self.startedAt = time.perf_counter()
+        self.importSeconds = processAge()
+        if self.headless:
+            setupHeadless()
+
+    def makeClock(self):
+        if self.replay or self.record:
+            from replay import GAMEPLAY_OPTIONS, RecordingClock, ReplayClock, ReplayEvents, SessionRecording
+        if self.replay:
+            random.seed(self.seed)
+            self.replayEvents = ReplayEvents(self.recording)
+            return ReplayClock(self.recording)
+        if self.record and self.seed is None:
+            self.seed = random.SystemRandom().randrange(2 ** 32)
+        if self.seed is not None:
+            random.seed(self.seed)
+        clock = RealClock() if self.realtime else SimulatedClock()
+        if self.record:
+            self.recording = SessionRecording(dict({name: getattr(self, name) for name in GAMEPLAY_OPTIONS},
+                                                   seed=self.seed, exitOnGameOver=self.exitOnGameOver))
+            return RecordingClock(clock, self.recording)
+        return clock
+
+    def makeSpace(self, gravity):
+        from array_physics import makeSpace
+        return makeSpace(self.physics, gravity)
+
+    def loadSpace(self, gravity, phase):
+        # makeSpace() as a startup phase, with pymunk's import timed apart
+        import array_physics
+        phase.imported()
+        return self.makeSpace(gravity)
+
+    def makeScheduler(self):
+        from capture_pipeline import InferenceScheduler
+        return InferenceScheduler(self.inferEvery, self.inferBudget, self.inferMaxEvery)
+
+    def makeLandmarkFilter(self):
+        # Frames without inference get extrapolated landmarks, smoothed or not
+        decimating = self.inferEvery > 1 or self.inferBudget is not None or self.targetFps is not None
+        config = self.smoothing
+        if decimating and config is None:
+            config = extrapolationOnly()
+        elif decimating and not config.predict:
+            config = SmoothingConfig(config.minCutoff, config.beta, config.dCutoff, True, config.maxLead)
+        # The filter is gameplay too: a replay uses the recorded one
+        if self.replay:
+            recorded = self.recording.meta["filter"]
+            config = SmoothingConfig(**recorded) if recorded else None
+        elif self.record:
+            self.recording.meta["filter"] = vars(config) if config else None
+        return LandmarkFilter(config)
+
+    def makeTracker(self, factory):
+        # factory is one of trackers.noseTracker/mouthTracker/wristTracker;
+        # recorded landmarks (trace or replay) need no tracker
+        if self.trace or self.replay:
+            return None
+        if self.players > 1:
+            if self.service:
+                raise ValueError("--players needs the camera or a video, the landmark service tracks one player")
+            from multiplayer import MultiPlayerTracker
+            return MultiPlayerTracker(factory, self.players, roi=self.roi)
+        if self.service:
+            # The service runs the model, openSource() picks this tracker's landmarks from it
+            self.serviceLandmarks = SERVICE_LANDMARKS[factory]
+            return None
+        if self.host and factory in self.host.trackers:
+            return withRoi(SharedTracker(self.host.trackers[factory]), self.roi)
+        return factory(roi=self.roi)
+
+    def makeStartup(self, window, clock, factory, cameraSize=None):
+        # Loading screen on `window` while the tracker and the input source load
+        # on background threads; the game adds its assets and calls wait(). A
+        # camera is asked for cameraSize (width, height) once it is open.
+        # Module imports happened before Game(), in the host before the host served.
+        self.startup = StartupPipeline(window, origin=self.startedAt, imports=None if self.host else self.importSeconds)
+        self.startup.add("models", lambda phase: self.loadTracker(factory, phase))
+        # The landmark service's source needs to know which landmarks the tracker picked
+        self.startup.add("camera", lambda phase: self.loadSource(clock, cameraSize, phase),
+                         after=("models",) if self.service else ())
+        return self.startup
+
+    def loadTracker(self, factory, phase):
+        # makeTracker() with MediaPipe's import timed apart from building its graphs,
+        # when this process builds any (worker processes import it themselves)
+        if not (self.trace or self.replay or self.service or self.players > 1
+                or (self.host and factory in self.host.trackers)):
+            import mediapipe
+        phase.imported()
+        return self.makeTracker(factory)
+
+    def loadSource(self, clock, cameraSize=None, phase=None):
+        import cv2
+        import input_source
+        if phase:
+            phase.imported()
+        cap = self.openSource(clock)
+        if cameraSize and cap.isOpened():
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, cameraSize[0])
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, cameraSize[1])
+        return cap
+
+    def makeProfiler(self):
+        # The profiler the game loop reports to: the telemetry recorder when on
+        self.recorder = None
+        if self.telemetry or self.debugOverlay:
+            from telemetry import TelemetryRecorder
+            self.recorder = TelemetryRecorder(self.profiler)
+            return self.recorder
+        return self.profiler
+
+    def makeOverlay(self):
+        from telemetry import DebugOverlay, NullOverlay
+        return DebugOverlay(self.recorder) if self.debugOverlay and self.recorder else NullOverlay()
+
+    def makeDisplay(self, window):
+        from renderer import LayeredDisplay
+        return LayeredDisplay(window, partial=not self.fullRedraw)
+
+    def wrapPipeline(self, pipeline):
+        if self.replay or self.record:
+            from replay import RecordingPipeline, ReplayPipeline
+        if self.replay:
+            return ReplayPipeline(self.recording, pipeline)
+        if self.record:
+            return RecordingPipeline(pipeline, self.recording)
+        return pipeline
+
+    def events(self):
+        # pygame.event.get() for the game loop, recorded and replayed with the session
+        if self.replay:
+            return self.replayEvents.get()
+        events = pygame.event.get()
+        if self.host and self.host.quitRequested():
+            # Cancelled from the launcher: the game ends as if its window was closed
+            events.append(pygame.event.Event(pygame.QUIT))
+        if self.record:
+            self.recording.addEvents(events)
+        return events
+
+    def startSession(self, game, clock):
+        if self.replay and self.recording.meta["game"] != game:
+            raise ValueError(f"Recording is a {self.recording.meta['game']} session, not {game}")
+        if self.record:
+            self.recording.meta["game"] = game
+        self.session = SessionRecorder(game, clock)
+        return self.session
+
+    def finishSession(self, **outcome):
+        # Game(options) returns this; the launcher also gets it from --result-file
+        result = self.session.result(**outcome)
+        if self.startup:
+            result["startup"] = self.startup.summary()
+        if self.resultFile:
+            writeResult(self.resultFile, result)
+        if self.recorder and self.telemetry:
+            frames = self.recorder.save(self.telemetry)
+            print(f"Telemetry: {frames} frames saved to {self.telemetry}")
+        if self.record:
+            self.recording.meta["result"] = result
+            self.recording.save(self.record)
+            print(f"Recording: {len(self.recording.calls)} frames, seed {self.seed}, saved to {self.record}")
+        if self.replay:
+            from replay import compareResults
+            differences = compareResults(self.recording.meta["result"], result)
+            if not self.session.clock.consumed:
+                differences.append("game clock reads differ")
+            self.replayMatches = not differences
+            print("Replay: " + ("identical to the recording" if self.replayMatches
+                                else "differs from the recording (" + ", ".join(differences) + ")"))
+        return result
+
+    def frameShown(self):
+        # Called after every display update
+        if self.session:
+            self.session.frameShown()
+        if self.startup:
+            self.startup.frameShown()
+        if self.host:
+            self.host.frameShown()
+
+    def closeDisplay(self):
+        if self.startup:
+            self.startup.close()
+        # The host keeps pygame (mixer, fonts, cached sounds) initialized for the next game
+        if self.host:
+            pygame.display.quit()
+        else:
+            pygame.quit()
+
+    def openSource(self, clock):
+        from input_source import LandmarkTraceSource, VideoFileSource, openCamera
+        if self.replay:
+            from replay import ReplaySource
+            return ReplaySource(self.recording)
+        if self.trace:
+            return LandmarkTraceSource(self.trace, timeSource=None if self.realtime else clock.now,
+                                       loop=self.loop)
+        if self.video:
+            return VideoFileSource(self.video, loop=self.loop, realtime=self.realtime)
+        if self.service:
+            if self.serviceLandmarks is None:
+                raise ValueError("makeTracker() must be called before openSource() with a landmark service")
+            from landmark_service import DEFAULT_NAME, LandmarkServiceSource
+            model, landmarks = self.serviceLandmarks
+            return LandmarkServiceSource(model, landmarks, name=DEFAULT_NAME if self.service is True else self.service)
+        if self.host:
+            return self.host.camera(self.camera)
+        return openCamera(self.camera)
+
+
+def addArguments(parser):
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--camera", type=int, default=0, help="webcam index (default 0)")
+    source.add_argument("--video", help="play a video file instead of the webcam")
+    source.add_argument("--trace", help="replay a recorded landmark trace (.json/.npz) instead of MediaPipe")
+    source.add_argument("--replay", help="re-run a session saved with --record, headless and bit for bit")
+    source.add_argument("--service", nargs="?", const=True, metavar="NAME",
+                        help="read camera frames and landmarks from landmark_service.py (optional --name)")
+    parser.add_argument("--headless", action="store_true",
+                        help="dummy SDL video/audio drivers, simulated clock, exit at game over")
+    parser.add_argument("--realtime", action="store_true", help="keep wall-clock timing in headless mode")
+    parser.add_argument("--loop", action="store_true", help="loop the video file or trace")
+    parser.add_argument("--max-frames", type=int, help="stop after this many frames")
+    parser.add_argument("--target-fps", type=float, help="adapt quality at runtime to hold this frame rate")
+    parser.add_argument("--pool-prewarm", type=int, default=16, help="fruits to preallocate for the entity pool")
+    parser.add_argument("--players", type=int, choices=range(1, 5), default=1,
+                        help="players side by side, each tracked in their own part of the frame (Nose Fruit, "
+                             "Fruit Catcher)")
+    parser.add_argument("--hit-trail", type=int, default=2,
+                        help="landmark positions swept for hits (1 = current position only)")
+    parser.add_argument("--result-file", help="write the session result (score, counts, frame times) as JSON")
+    parser.add_argument("--record", help="save the session (seed, landmarks, clock, events) for --replay")
+    parser.add_argument("--seed", type=int, help="seed for spawn positions, speeds and fruit choice")
+    parser.add_argument("--telemetry", help="record per-frame metrics and save them to this .npz or .csv")
+    parser.add_argument("--debug-overlay", action="store_true", help="show rolling FPS and stage timings in game")
+    parser.add_argument("--full-redraw", action="store_true",
+                        help="update the whole display every frame, also on static screens")
+    parser.add_argument("--physics", choices=sorted(PHYSICS_BACKENDS), default="pymunk",
+                        help="physics backend, array (experimental) keeps all fruits in NumPy arrays "
+                             "(no fruit collisions)")
+    parser.add_argument("--hit-index", choices=sorted(HIT_INDEXES),
+                        help="spatial index for hit tests (default pymunk, distance with --physics array); "
+                             "grid and brute (test every fruit) are for benchmark comparison")
+    roi = parser.add_argument_group("region of interest", "crop MediaPipe input around the player")
+    roi.add_argument("--roi", action="store_true", help="enable ROI tracking")
+    roi.add_argument("--roi-padding", type=float, default=0.35, help="padding per side, relative to box size")
+    roi.add_argument("--roi-min-size", type=float, default=0.3, help="smallest box side as a fraction of the frame")
+    roi.add_argument("--roi-scale", type=float, default=1.0, help="resize factor for the cropped input")
+    roi.add_argument("--roi-max-side", type=int, help="cap on the longer side of the inference input, in pixels")
+    roi.add_argument("--roi-full-scale", type=float, default=1.0, help="resize factor for full-frame redetection")
+    decimation = parser.add_argument_group("inference decimation", "skip MediaPipe on some frames, "
+                                           "landmarks are extrapolated in between")
+    decimation.add_argument("--infer-every", type=int, default=1, help="run inference on every Nth frame")
+    decimation.add_argument("--infer-budget", type=float,
+                            help="share of the frame time inference may use (e.g. 0.5), N adapts to it")
+    decimation.add_argument("--infer-max-every", type=int, default=8, help="largest N the budget may pick")
+    smooth = parser.add_argument_group("landmark smoothing", "One Euro filter between MediaPipe and the game")
+    smooth.add_argument("--smooth", action="store_true", help="enable landmark smoothing")
+    smooth.add_argument("--smooth-min-cutoff", type=float, default=1.5, help="Hz, lower = steadier when still")
+    smooth.add_argument("--smooth-beta", type=float, default=10.0, help="speed coefficient, higher = less lag")
+    smooth.add_argument("--smooth-d-cutoff", type=float, default=1.0, help="Hz, cutoff of the speed estimate")
+    smooth.add_argument("--predict", action="store_true",
+                        help="extrapolate landmarks by the pipeline latency (implies --smooth)")
+    smooth.add_argument("--predict-max-lead", type=float, default=0.15, help="seconds, cap on the extrapolation")
+    return parser
+
+
+def optionsFromArgs(args):
+    smoothing = None
+    if args.smooth or args.predict:
+        smoothing = SmoothingConfig(minCutoff=args.smooth_min_cutoff, beta=args.smooth_beta,
+                                    dCutoff=args.smooth_d_cutoff, predict=args.predict,
+                                    maxLead=args.predict_max_lead)
+    roi = None
+    if args.roi:
+        roi = RoiConfig(padding=args.roi_padding, minSize=args.roi_min_size, scale=args.roi_scale,
+                        maxSide=args.roi_max_side, fullFrameScale=args.roi_full_scale)
+    return GameOptions(camera=args.camera, video=args.video, trace=args.trace, headless=args.headless,
+                       realtime=True if args.realtime else None, loop=args.loop, maxFrames=args.max_frames,
+                       roi=roi, targetFps=args.target_fps, poolPrewarm=args.pool_prewarm,
+                       hitTrail=args.hit_trail, hitIndex=args.hit_index, physics=args.physics,
+                       smoothing=smoothing, inferEvery=args.infer_every, inferBudget=args.infer_budget,
+                       inferMaxEvery=args.infer_max_every, resultFile=args.result_file,
+                       telemetry=args.telemetry, debugOverlay=args.debug_overlay,
+                       record=args.record, replay=args.replay, seed=args.seed, fullRedraw=args.full_redraw,
+                       service=args.service, players=args.players)
+
+
+def parseOptions(argv=None, description=None):
+    parser = addArguments(argparse.ArgumentParser(description=description))
+    return optionsFromArgs(parser.parse_args(argv))
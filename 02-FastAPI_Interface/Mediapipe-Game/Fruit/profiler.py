@@ -0,0 +1,77 @@
+import time
+
+import numpy as np
+
+
+# Per-stage frame timer. The game loop calls beginFrame(), then lap(stage)
+# after each stage, then endFrame(); stages measured elsewhere (capture and
+# inference inside the pipeline) are added with record(). sample() gets the
+# frame's packet and fruit count, for telemetry (telemetry.TelemetryRecorder).
+# beginFrame(start) backdates the frame to work done before the loop knew it
+# had a frame to play (fetching the packet), so a stalled frame is never begun.
+class FrameProfiler:
+    def __init__(self):
+        self.samples = {}
+        self.frames = 0
+        self.frameStart = None
+        self.lastMark = None
+        self.wallStart = None
+        self.wallEnd = None
+
+    def beginFrame(self, start=None):
+        now = time.perf_counter() if start is None else start
+        if self.wallStart is None:
+            self.wallStart = now
+        self.frameStart = self.lastMark = now
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.record(stage, (now - self.lastMark) * 1000)
+        self.lastMark = now
+
+    def record(self, stage, ms):
+        if stage not in self.samples:
+            self.samples[stage] = []
+        self.samples[stage].append(ms)
+
+    def sample(self, packet, fruits):
+        pass
+
+    def endFrame(self):
+        now = time.perf_counter()
+        self.record("frame", (now - self.frameStart) * 1000)
+        self.frames += 1
+        self.wallEnd = now
+
+    def fps(self):
+        if not self.frames or self.wallEnd is None:
+            return 0.0
+        return self.frames / max(self.wallEnd - self.wallStart, 1e-9)
+
+    def summary(self, percentiles=(50, 95, 99)):
+        stages = {}
+        for stage, values in self.samples.items():
+            values = np.asarray(values)
+            stats = {f"p{p}": float(np.percentile(values, p)) for p in percentiles}
+            stats["mean"] = float(values.mean())
+            stats["count"] = int(values.size)
+            stages[stage] = stats
+        return {"frames": self.frames, "fps": self.fps(), "stages": stages}
+
+
+# Stand-in used when nobody is measuring, so the game loop can call it unconditionally
+class NullProfiler:
+    def beginFrame(self, start=None):
+        pass
+
+    def lap(self, stage):
+        pass
+
+    def record(self, stage, ms):
+        pass
+
+    def sample(self, packet, fruits):
+        pass
+
+    def endFrame(self):
+        pass
@@ -0,0 +1,102 @@
+import time
+from collections import deque
+
+# Quality ladder, best first. Each step is cheaper than the one before it.
+#   inputScale      resize factor for the MediaPipe input
+#   modelComplexity pose model (0 lite, 1 full), ignored by face mesh
+#   inferEvery      run inference on every Nth frame
+#   cameraSize      requested camera resolution, None keeps the game's request
+#   effects         background overlay effects (e.g. Nose Fruit's low-lives tint)
+DEFAULT_LEVELS = [
+    dict(inputScale=1.0, modelComplexity=1, inferEvery=1, cameraSize=None, effects=True),
+    dict(inputScale=0.75, modelComplexity=1, inferEvery=1, cameraSize=None, effects=True),
+    dict(inputScale=0.75, modelComplexity=0, inferEvery=1, cameraSize=None, effects=True),
+    dict(inputScale=0.5, modelComplexity=0, inferEvery=1, cameraSize=None, effects=False),
+    dict(inputScale=0.5, modelComplexity=0, inferEvery=2, cameraSize=None, effects=False),
+    dict(inputScale=0.5, modelComplexity=0, inferEvery=2, cameraSize=(640, 360), effects=False),
+]
+
+
+# Measures render work per frame and inference time, and steps down the
+# quality ladder when a frame no longer fits the budget of the target FPS,
+# back up when there is clear headroom. Every change is logged with its reason.
+# Without a target FPS it stays at the top level and never changes anything.
+class QualityController:
+    def __init__(self, targetFps, pipeline, cameraSize=None, levels=None, window=1.0, cooldown=3.0,
+                 degradeLoad=1.0, upgradeLoad=0.6, log=print):
+        self.targetFps = targetFps
+        self.enabled = targetFps is not None
+        self.budgetMs = 1000 / targetFps if self.enabled else None
+        self.pipeline = pipeline
+        self.cameraSize = cameraSize  # what the game asked the camera for
+        self.levels = levels or DEFAULT_LEVELS
+        self.window = window  # seconds of samples per decision
+        self.cooldown = cooldown  # seconds between changes
+        self.degradeLoad = degradeLoad
+        self.upgradeLoad = upgradeLoad
+        self.log = log
+        self.level = 0
+        self.decisions = []
+        self.workMs = deque()
+        self.windowStart = None
+        self.lastChange = 0.0
+        self.lastInferenceCount = 0
+        self.frameStart = None
+
+    @property
+    def effects(self):
+        return self.levels[self.level]["effects"]
+
+    def beginFrame(self, start=None):
+        self.frameStart = time.perf_counter() if start is None else start
+
+    def endFrame(self):
+        # Called before clock.tick(), so sleeping is not counted as work
+        if not self.enabled or self.frameStart is None:
+            return
+        now = time.perf_counter()
+        if self.windowStart is None:
+            self.windowStart = now
+        self.workMs.append((now - self.frameStart) * 1000)
+        if now - self.windowStart >= self.window:
+            self._decide(now)
+            self.workMs.clear()
+            self.windowStart = now
+
+    def _decide(self, now):
+        renderMs = sum(self.workMs) / len(self.workMs)
+        # Inference cost per rendered frame over this window, inferEvery spreads it over several frames
+        inferred = self.pipeline.inferenceCount - self.lastInferenceCount
+        self.lastInferenceCount = self.pipeline.inferenceCount
+        inferenceMs = self.pipeline.stats.recentMean("inference", inferred) or 0.0
+        inferenceMs /= self.pipeline.inferEvery
+        # With a threaded pipeline render and inference overlap, otherwise inference
+        # runs inside the render loop and is already part of the render time
+        loadMs = max(renderMs, inferenceMs) if self.pipeline.threaded else renderMs
+        load = loadMs / self.budgetMs
+        if now - self.lastChange < self.cooldown:
+            return
+
+        reason = (f"load {load:.2f} (render {renderMs:.1f} ms, inference {inferenceMs:.1f} ms/frame, "
+                  f"{inferred} inferences, budget {self.budgetMs:.1f} ms at {self.targetFps} fps)")
+        if load > self.degradeLoad and self.level < len(self.levels) - 1:
+            self.setLevel(self.level + 1, reason, now)
+        elif load < self.upgradeLoad and self.level > 0:
+            self.setLevel(self.level - 1, reason, now)
+
+    def setLevel(self, level, reason="", now=None):
+        old, new = self.levels[self.level], self.levels[level]
+        changes = {key: value for key, value in new.items() if old.get(key) != value}
+        cameraSize = None
+        if "cameraSize" in changes:
+            cameraSize = changes["cameraSize"] or self.cameraSize
+        self.pipeline.configure(inputScale=changes.get("inputScale"),
+                                inferEvery=changes.get("inferEvery"),
+                                modelComplexity=changes.get("modelComplexity"),
+                                cameraSize=cameraSize)
+        decision = {"time": now or time.perf_counter(), "from": self.level, "to": level,
+                    "changes": changes, "reason": reason}
+        self.decisions.append(decision)
+        self.log(f"Quality {self.level} -> {level}: {changes}; {reason}")
+        self.level = level
+        self.lastChange = decision["time"]
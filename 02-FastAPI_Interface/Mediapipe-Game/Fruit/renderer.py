@@ -0,0 +1,70 @@
+import cv2
+import numpy as np
+import pygame
+
+
+# Full-frame colour effect drawn on the camera frame: a border in `color` and,
+# when tinted, every pixel blended (1 - weight) / weight with `color` (Nose
+# Fruit's low-lives warning). The blend only depends on a pixel's own value, so
+# it is a per-channel lookup table built once with cv2.addWeighted itself:
+# applying it in place gives the same pixels without a full-frame overlay
+# array and a blend per frame.
+class ScreenTint:
+    def __init__(self, color, weight=0.3, border=10):
+        self.color = color
+        self.border = border
+        ramp = np.repeat(np.arange(256, dtype=np.uint8)[None, :, None], 3, axis=2)
+        solid = np.empty_like(ramp)
+        solid[:] = color
+        self.table = cv2.addWeighted(ramp, 1 - weight, solid, weight, 0.0)
+
+    def apply(self, img, tint=True):
+        h, w = img.shape[:2]
+        cv2.rectangle(img, (0, 0), (w - 1, h - 1), self.color, self.border)
+        if tint:
+            cv2.LUT(img, self.table, dst=img)
+        return img
+
+
+# Layered output for a game window. Gameplay frames have the camera image as
+# their bottom layer, so they change everywhere and go to the display whole.
+# Screens that stay the same from frame to frame (game over) are composited
+# once into a cached surface; on the frames after that nothing is redrawn
+# except what lies on top (the debug overlay), and only those areas are sent
+# to the display. OpenGL displays always present the whole window, so there
+# the cached screen is simply blitted and updated in full.
+class LayeredDisplay:
+    def __init__(self, window, partial=True):
+        self.window = window
+        self.partial = partial and not window.get_flags() & pygame.OPENGL
+        self.layerKey = None
+        self.layer = None  # the last static screen, composited
+        self.static = None  # static screen drawn this frame, None for a live frame
+        self.shown = None  # static screen on the display since the last update
+        self.dirty = []  # areas drawn over the static screen by the last frame
+        self.restored = []
+
+    def showStatic(self, key, compose):
+        # compose(surface) draws the screen onto a copy of the window, like it
+        # would draw onto the window itself. key names the screen's content.
+        if key != self.layerKey:
+            self.layerKey, self.layer = key, self.window.copy()
+            compose(self.layer)
+        layer = self.layer
+        self.static = key
+        if self.partial and key == self.shown:
+            # Already on screen: only wipe what the last frame drew on top
+            self.restored = [self.window.blit(layer, rect, rect) for rect in self.dirty]
+        else:
+            self.window.blit(layer, (0, 0))
+
+    def update(self, rects=()):
+        # rects: areas drawn on top of this frame's screen (DebugOverlay.draw)
+        if self.partial and self.static is not None and self.static == self.shown:
+            pygame.display.update(self.restored + list(rects))
+        else:
+            pygame.display.update()
+        self.shown = self.static
+        self.static = None
+        self.dirty = list(rects)
+        self.restored = []
@@ -0,0 +1,250 @@
+# Deterministic session recording and replay. A recording holds everything a
+# game reads from the outside world: the `random` seed, every game clock read
+# (in order), every pipeline.latest() result (landmarks, sample time, frame
+# size) and the pygame events the loop handled. Replaying feeds exactly those
+# back, headless and without sleeping, so the session runs again bit for bit
+# and faster than real time (the frame work is the same, the waiting is gone).
+#
+#   python nose_fruit.py --record sesi.npz          # play normally, save at the end
+#   python replay.py sesi.npz [--telemetry t.npz]   # re-run it headless
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import types
+
+import cv2
+import numpy as np
+
+from capture_pipeline import FramePacket
+
+# Options that change gameplay, taken from the recording when replaying. The hit
+# index decides which fruits are tested and in what order; the pool prewarm
+# decides which bodies are reused and so the order they sit in the space.
+GAMEPLAY_OPTIONS = ("hitTrail", "startAt", "minFruits", "endless", "maxFrames", "physics", "players",
+                    "hitIndex", "poolPrewarm")
+# Session result fields a faithful replay reproduces (frame times are measured, not replayed)
+REPLAYED_RESULT = ("score", "lives", "duration", "frames", "spawned", "sliced", "bombs", "missed", "players")
+
+
+class SessionRecording:
+    def __init__(self, meta=None):
+        self.meta = meta or {}
+        self.times = []  # game clock reads
+        self.calls = []  # per pipeline.latest(): index into packets, -1 for None
+        self.packets = []  # (seq, sampleTime, measurement index, width, height)
+        self.measurements = []  # landmark dicts; one entry per new landmarks object
+        self.events = []  # per events() call: [(type, key), ...]
+        self.paused = False  # clock reads inside the pipeline are not the game's
+        self.lastPacket = None
+        self.lastLandmarks = None
+
+    def addPacket(self, packet):
+        if packet is None:
+            self.calls.append(-1)
+            return
+        if packet is not self.lastPacket:
+            self.lastPacket = packet
+            # LandmarkFilter tells measurements apart by identity, keep that
+            if packet.landmarks is not self.lastLandmarks:
+                self.lastLandmarks = packet.landmarks
+                self.measurements.append(packet.landmarks)
+            height, width = packet.image.shape[:2]
+            self.packets.append((packet.seq, packet.sampleTime, len(self.measurements) - 1, width, height))
+        self.calls.append(len(self.packets) - 1)
+
+    def addEvents(self, events):
+        self.events.append([(event.type, getattr(event, "key", 0)) for event in events])
+
+    def save(self, path):
+        names = sorted({name for landmarks in self.measurements for name in landmarks})
+        landmarks = np.full((len(self.measurements), len(names), 3), np.nan)
+        for i, measurement in enumerate(self.measurements):
+            for j, name in enumerate(names):
+                if name in measurement:
+                    landmarks[i, j] = measurement[name]
+        packets = np.array(self.packets, dtype=float).reshape(-1, 5)
+        events = [event for frame in self.events for event in frame]
+        meta = dict(self.meta, landmarks=names)
+        np.savez_compressed(path, meta=np.array(json.dumps(meta)), times=np.array(self.times),
+                            calls=np.array(self.calls, dtype=np.int32),
+                            packetSeq=packets[:, 0].astype(np.int64), sampleTime=packets[:, 1],
+                            measurement=packets[:, 2].astype(np.int32), size=packets[:, 3:].astype(np.int32),
+                            landmarks=landmarks, eventCounts=np.array([len(frame) for frame in self.events],
+                                                                       dtype=np.int32),
+                            events=np.array(events, dtype=np.int64).reshape(-1, 2))
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Recording not found: {path}")
+        with np.load(path) as data:
+            recording = cls(json.loads(str(data["meta"])))
+            recording.times = data["times"].tolist()
+            recording.calls = data["calls"].tolist()
+            recording.packets = list(zip(data["packetSeq"].tolist(), data["sampleTime"].tolist(),
+                                         data["measurement"].tolist(), *data["size"].T.tolist()))
+            names = recording.meta["landmarks"]
+            recording.measurements = [{name: tuple(row) for name, row in zip(names, rows.tolist())
+                                       if not any(np.isnan(row))} for rows in data["landmarks"]]
+            events = [tuple(event) for event in data["events"].tolist()]
+            counts = data["eventCounts"].tolist()
+        starts = np.cumsum([0] + counts).tolist()
+        recording.events = [events[start:start + count] for start, count in zip(starts, counts)]
+        return recording
+
+
+# Recording side: wrappers around the game's clock and capture pipeline
+
+class RecordingClock:
+    def __init__(self, clock, recording):
+        self.clock = clock
+        self.recording = recording
+        self.owner = threading.get_ident()  # the game loop; capture threads read the clock too
+
+    def now(self):
+        t = self.clock.now()
+        if not self.recording.paused and threading.get_ident() == self.owner:
+            self.recording.times.append(t)
+        return t
+
+    def tick(self, fps=0):
+        return self.clock.tick(fps)
+
+
+class RecordingPipeline:
+    def __init__(self, pipeline, recording):
+        self.pipeline = pipeline
+        self.recording = recording
+
+    def __getattr__(self, name):
+        return getattr(self.pipeline, name)
+
+    def latest(self):
+        self.recording.paused = True
+        try:
+            packet = self.pipeline.latest()
+        finally:
+            self.recording.paused = False
+        self.recording.addPacket(packet)
+        return packet
+
+
+# Replay side
+
+class ReplayClock:
+    def __init__(self, recording):
+        self.times = recording.times
+        self.index = 0
+        self.overrun = 0  # reads past the end: the replay went a different way
+
+    def now(self):
+        if self.index < len(self.times):
+            self.index += 1
+            return self.times[self.index - 1]
+        self.overrun += 1
+        return self.times[-1] if self.times else 0.0
+
+    def tick(self, fps=0):
+        return 0
+
+    @property
+    def consumed(self):
+        return self.index == len(self.times) and not self.overrun
+
+
+class ReplayPipeline:
+    def __init__(self, recording, pipeline):
+        self.recording = recording
+        self.pipeline = pipeline  # idle real pipeline, for configure/stop/latencySummary
+        self.index = 0
+        self.measurements = recording.measurements  # built once, so identity matches the recording
+        self.blanks = {}
+        self.packetIndex = None
+        self.packet = None
+
+    def __getattr__(self, name):
+        return getattr(self.pipeline, name)
+
+    def isRunning(self):
+        return self.index < len(self.recording.calls)
+
+    def latest(self):
+        packetIndex = self.recording.calls[self.index]
+        self.index += 1
+        if packetIndex < 0:
+            return None
+        if packetIndex != self.packetIndex:
+            seq, sampleTime, measurement, width, height = self.recording.packets[packetIndex]
+            # One blank frame per size: the games draw on it, nothing reads it back
+            image = self.blanks.get((width, height))
+            if image is None:
+                image = self.blanks[(width, height)] = np.zeros((height, width, 3), dtype=np.uint8)
+            now = time.perf_counter()
+            self.packetIndex = packetIndex
+            self.packet = FramePacket(seq, image, now, self.measurements[measurement], now, sampleTime)
+        return self.packet
+
+
+class ReplayEvents:
+    def __init__(self, recording):
+        self.events = recording.events
+        self.index = 0
+
+    def get(self):
+        if self.index >= len(self.events):
+            return []
+        self.index += 1
+        return [types.SimpleNamespace(type=kind, key=key) for kind, key in self.events[self.index - 1]]
+
+
+# Stands in for the camera: the frames come from the ReplayPipeline
+class ReplaySource:
+    def __init__(self, recording):
+        self.width, self.height = recording.packets[0][3:] if recording.packets else (1280, 720)
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        return False
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.width
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.height
+        return 0
+
+    def release(self):
+        pass
+
+
+def compareResults(recorded, replayed):
+    return [f"{key} {replayed.get(key)} != {recorded.get(key)}" for key in REPLAYED_RESULT
+            if replayed.get(key) != recorded.get(key)]
+
+
+def main():
+    # Replays a recording with the game it was made with
+    from options import addArguments, optionsFromArgs
+
+    parser = addArguments(argparse.ArgumentParser(description="Replay a recorded game session headless"))
+    parser.add_argument("recording", help="file written by --record")
+    args = parser.parse_args()
+    args.replay = args.recording
+    options = optionsFromArgs(args)
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    game = __import__(options.recording.meta["game"])
+    start = time.perf_counter()
+    result = game.Game(options)
+    if result:
+        wall = time.perf_counter() - start
+        print(f"Replayed {result['duration']:.1f} s of play in {wall:.1f} s ({result['duration'] / wall:.1f}x real time)")
+    sys.exit(0 if result and options.replayMatches else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import json
+import os
+import time
+
+import numpy as np
+
+
+# What a finished game hands back to the launcher (app.py): the outcome plus
+# how smoothly it ran. Frame times are the wall-clock intervals between
+# display updates, so they include the wait for the frame cap; duration is
+# game time (simulated in headless runs).
+class SessionRecorder:
+    def __init__(self, game, clock):
+        self.game = game
+        self.clock = clock
+        self.startTime = clock.now()
+        self.frames = 0
+        self.lastFrame = None
+        self.frameTimes = []  # ms
+
+    def frameShown(self):
+        now = time.perf_counter()
+        if self.lastFrame is not None:
+            self.frameTimes.append((now - self.lastFrame) * 1000)
+        self.lastFrame = now
+        self.frames += 1
+
+    def result(self, score, lives, lifecycle, sliced, bombs, players=None):
+        # sliced: fruits sliced/eaten/caught, bombs: bombs hit, missed: anything
+        # that left the playfield untouched (bombs included). With several players
+        # (multiplayer.Player) score and lives are the team totals and `players`
+        # has each player's own.
+        times = np.asarray(self.frameTimes)
+        if players is not None:
+            players = [{"player": player.name, "score": player.score, "lives": player.lives} for player in players]
+        return {"game": self.game, "score": score, "lives": lives, "players": players,
+                "duration": self.clock.now() - self.startTime, "frames": self.frames,
+                "spawned": lifecycle.spawned, "sliced": sliced, "bombs": bombs,
+                "missed": lifecycle.released.get("offscreen", 0),
+                "frameMsMean": float(times.mean()) if times.size else None,
+                "frameMsP95": float(np.percentile(times, 95)) if times.size else None}
+
+
+def writeResult(path, result):
+    # Written next to the target and renamed, so a reader never sees half a file
+    temp = f"{path}.tmp"
+    with open(temp, "w") as f:
+        json.dump(result, f)
+    os.replace(temp, path)
+
+
+def readResult(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def formatResult(result):
+    frameTime = "-"
+    if result["frameMsMean"] is not None:
+        frameTime = f"{result['frameMsMean']:.1f}/{result['frameMsP95']:.1f} ms"
+    players = ""
+    if result.get("players"):
+        players = " (" + ", ".join(f"{player['player']} {player['score']}/{player['lives']}"
+                                   for player in result["players"]) + ")"
+    return (f"Session: score {result['score']}, lives {result['lives']}{players}, {result['duration']:.1f} s, "
+            f"spawned {result['spawned']}, sliced {result['sliced']}, bombs {result['bombs']}, "
+            f"missed {result['missed']}, frame time (mean/p95) {frameTime}")
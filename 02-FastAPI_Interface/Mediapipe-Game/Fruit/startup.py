@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+
+import pygame
+
+from hud import TextRenderer
+
+# Startup pipeline: the game opens its window and shows a loading screen right
+# away, while the slow parts of getting ready (MediaPipe import and graphs, the
+# camera, decoding sprite sheets) load on background threads at the same time
+# instead of one after the other behind a black window. Each phase records when
+# it ran, on which thread, and how long went into importing modules and into
+# initializing; with the module imports before Game() and the first playable
+# frame this becomes the "startup" part of the session result. A background
+# phase (sprite sheets the first frames can do without) keeps going after the
+# loading screen is gone.
+
+PHASE_LABELS = {"models": "Models", "camera": "Camera", "physics": "Physics", "assets": "Images",
+                "sprites": "Fruit sprites"}
+
+
+def processAge():
+    # Seconds since this process started (interpreter start-up plus module
+    # imports), from /proc; None where that is not available
+    try:
+        with open("/proc/self/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - started
+    except (OSError, AttributeError, ValueError, IndexError):
+        return None
+
+
+class StartupPhase:
+    def __init__(self, name, stopEvent, background=False):
+        self.name = name
+        self.stopEvent = stopEvent
+        self.background = background
+        self.thread = None
+        self.start = None
+        self.importedAt = None  # set by the task once its imports are done
+        self.end = None
+
+    def imported(self):
+        self.importedAt = time.perf_counter()
+
+    def stopped(self):
+        # True once the game is closing: a background task should give up
+        return self.stopEvent.is_set()
+
+    @property
+    def done(self):
+        return self.end is not None
+
+    def summary(self, origin):
+        imported = self.importedAt or self.start
+        return {"thread": self.thread, "background": self.background, "start": self.start - origin,
+                "import": imported - self.start, "init": self.end - imported, "end": self.end - origin}
+
+
+class StartupPipeline:
+    def __init__(self, window, origin=None, imports=None, workers=3):
+        self.window = window
+        self.origin = origin or time.perf_counter()  # when Game() started
+        self.imports = imports  # seconds before Game(): interpreter and module imports
+        self.phases = {}
+        self.futures = {}
+        self.stopEvent = threading.Event()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="startup")
+        self.hud = TextRenderer()
+        self.windowAt = None  # first loading screen on the display
+        self.readyAt = None
+        self.firstFrameAt = None
+        self.draw()
+
+    def add(self, name, task, after=(), background=False):
+        # task(phase) runs on a startup thread once the phases in `after` are
+        # done; the game does not wait for a background phase
+        phase = self.phases[name] = StartupPhase(name, self.stopEvent, background)
+        waitFor = [self.futures[other] for other in after]
+
+        def run():
+            for future in waitFor:
+                future.result()
+            phase.thread = threading.current_thread().name
+            phase.start = time.perf_counter()
+            try:
+                return task(phase)
+            except Exception as e:
+                if background:
+                    print(f"Startup: {name} failed in the background ({e})")
+                raise
+            finally:
+                phase.end = time.perf_counter()
+
+        self.futures[name] = self.executor.submit(run)
+        return self
+
+    def wait(self):
+        # Keeps the loading screen up until every foreground phase is done and
+        # returns their results in the order they were added; a failed one raises here
+        futures = [self.futures[name] for name, phase in self.phases.items() if not phase.background]
+        pending = set(futures)
+        while pending:
+            _, pending = wait(pending, timeout=1 / 30, return_when=FIRST_EXCEPTION)
+            pygame.event.pump()  # the window stays responsive, events wait for the game loop
+            self.draw()
+            if any(future.done() and future.exception() for future in futures):
+                self.stopEvent.set()  # the game will not start, neither should the background
+                break
+        self.executor.shutdown(wait=False)  # background phases run on
+        self.readyAt = time.perf_counter()
+        return [future.result() for future in futures]
+
+    def close(self):
+        # Before the display goes: background phases still decoding sprites stop
+        self.stopEvent.set()
+        wait([self.futures[name] for name, phase in self.phases.items() if phase.background])
+
+    def draw(self):
+        width, height = self.window.get_size()
+        self.window.fill((47, 171, 86))
+        self.hud.draw(self.window, "Loading", (width // 2, height // 2 - 80), 80, (255, 255, 255),
+                      outline=(0, 0, 0), center=True)
+        dots = "." * (int(time.perf_counter() * 3) % 4)
+        for i, phase in enumerate(self.phases.values()):
+            label = PHASE_LABELS.get(phase.name, phase.name)
+            status = f"ready ({phase.end - phase.start:.1f} s)" if phase.done else f"loading{dots}"
+            self.hud.draw(self.window, f"{label}: {status}", (width // 2, height // 2 + i * 40), 36,
+                          (255, 255, 255), center=True)
+        pygame.display.update()
+        if self.windowAt is None:
+            self.windowAt = time.perf_counter()
+
+    def frameShown(self):
+        # The first game frame after loading: time to first playable frame
+        if self.firstFrameAt is None and self.readyAt is not None:
+            self.firstFrameAt = time.perf_counter()
+            print(formatStartup(self.summary()))
+
+    def summary(self):
+        # Seconds since Game() started, except `imports` (before it, None when
+        # unknown or in the game host) and `firstPlayableFrame` (since the
+        # process started, when `imports` is known)
+        since = lambda moment: moment - self.origin if moment is not None else None
+        firstFrame = since(self.firstFrameAt)
+        return {"imports": self.imports, "window": since(self.windowAt),
+                "phases": {name: phase.summary(self.origin) for name, phase in self.phases.items() if phase.done},
+                "ready": since(self.readyAt),
+                "firstPlayableFrame": firstFrame + (self.imports or 0) if firstFrame is not None else None}
+
+
+def formatStartup(startup):
+    parts = []
+    if startup["imports"] is not None:
+        parts.append(f"imports {startup['imports']:.2f}s")
+    parts.append(f"window {startup['window']:.2f}s")
+    for name, phase in startup["phases"].items():
+        parts.append(f"{name} {phase['end'] - phase['start']:.2f}s "
+                     f"(import {phase['import']:.2f} + init {phase['init']:.2f})")
+    parts.append(f"ready {startup['ready']:.2f}s")
+    if startup["firstPlayableFrame"] is not None:
+        parts.append(f"first playable frame {startup['firstPlayableFrame']:.2f}s")
+    return "Startup: " + ", ".join(parts)
@@ -0,0 +1,147 @@
+import time
+
+import numpy as np
+
+from hud import TextRenderer
+from profiler import NullProfiler
+
+# Per-frame telemetry columns: seconds since the first frame, then milliseconds,
+# then the live fruit count and the lowest landmark visibility (0 = nothing found).
+# capture/inference are the cost of the camera frame the game used, NaN when
+# the game frame reused the previous camera frame.
+COLUMNS = ("time", "frame", "capture", "inference", "physics", "draw", "update", "wait", "fruits", "confidence")
+# Game laps folded into the columns (laps are the profiler stages of the games)
+LAP_COLUMNS = {"pipeline": "update", "spawn": "update", "fruits": "update", "present": "draw",
+               "hud": "draw", "display": "draw", "physics": "physics", "tick": "wait"}
+COLUMN = {name: index for index, name in enumerate(COLUMNS)}
+
+
+# Opt-in session recorder. Takes the profiler's place in the game loop (the
+# wrapped profiler still gets every call) and keeps the last `capacity` frames
+# in a preallocated ring buffer, so recording allocates nothing per frame.
+# save() writes the frames in order as .npz (one array per column) or .csv.
+class TelemetryRecorder:
+    def __init__(self, profiler=None, capacity=16384):
+        self.profiler = profiler or NullProfiler()
+        self.capacity = capacity
+        self.rows = np.full((capacity, len(COLUMNS)), np.nan, dtype=np.float32)
+        self.lapColumns = {lap: COLUMN[column] for lap, column in LAP_COLUMNS.items()}
+        self.lapIndices = sorted(set(self.lapColumns.values()))
+        self.frames = 0  # completed frames, the next row is frames % capacity
+        self.row = None
+        self.startTime = None
+        self.frameStart = None
+        self.lastMark = None
+        self.lastSeq = None
+
+    def beginFrame(self, start=None):
+        now = time.perf_counter() if start is None else start
+        if self.startTime is None:
+            self.startTime = now
+        self.row = self.rows[self.frames % self.capacity]
+        self.row[:] = np.nan
+        self.row[self.lapIndices] = 0  # laps add up
+        self.row[COLUMN["time"]] = now - self.startTime
+        self.frameStart = self.lastMark = now
+        self.profiler.beginFrame(now)
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        column = self.lapColumns.get(stage)
+        if column is not None:
+            self.row[column] += (now - self.lastMark) * 1000
+        self.lastMark = now
+        self.profiler.lap(stage)
+
+    def record(self, stage, ms):
+        # Pipeline stages arrive per packet through sample()
+        self.profiler.record(stage, ms)
+
+    def sample(self, packet, fruits):
+        self.row[COLUMN["fruits"]] = fruits
+        if packet is None:
+            return
+        if packet.seq != self.lastSeq:
+            self.lastSeq = packet.seq
+            self.row[COLUMN["capture"]] = packet.captureMs
+            self.row[COLUMN["inference"]] = packet.inferenceMs
+        landmarks = packet.landmarks
+        self.row[COLUMN["confidence"]] = min(value[2] for value in landmarks.values()) if landmarks else 0.0
+        self.profiler.sample(packet, fruits)
+
+    def endFrame(self):
+        self.row[COLUMN["frame"]] = (time.perf_counter() - self.frameStart) * 1000
+        self.frames += 1
+        self.profiler.endFrame()
+
+    def recent(self, count):
+        count = min(count, self.frames, self.capacity)
+        end = self.frames % self.capacity
+        return self.rows[np.arange(end - count, end) % self.capacity]
+
+    def ordered(self):
+        if self.frames <= self.capacity:
+            return self.rows[:self.frames]
+        start = self.frames % self.capacity
+        return np.concatenate((self.rows[start:], self.rows[:start]))
+
+    def save(self, path):
+        rows = self.ordered()
+        if path.endswith(".csv"):
+            np.savetxt(path, rows, delimiter=",", fmt="%.6g", header=",".join(COLUMNS), comments="")
+        else:
+            np.savez_compressed(path, **{name: rows[:, index] for index, name in enumerate(COLUMNS)})
+        return len(rows)
+
+
+def columnMean(rows, name):
+    values = rows[:, COLUMN[name]]
+    values = values[~np.isnan(values)]
+    return float(values.mean()) if values.size else float("nan")
+
+
+# Debug overlay: rolling FPS and stage timings from the recorder's last
+# `window` frames. The text changes every `refresh` seconds, so the HUD
+# cache renders it twice a second rather than every frame.
+class DebugOverlay:
+    def __init__(self, recorder, window=60, refresh=0.5, pos=(10, 150), size=26):
+        self.recorder = recorder
+        self.window = window
+        self.refresh = refresh
+        self.pos = pos
+        self.size = size
+        self.text = TextRenderer(maxEntries=16)
+        self.lines = []
+        self.nextRefresh = 0
+
+    def draw(self, target):
+        # Returns the areas drawn, for partial display updates
+        now = time.perf_counter()
+        if now >= self.nextRefresh:
+            self.lines = self._lines()
+            self.nextRefresh = now + self.refresh
+        x, y = self.pos
+        rects = []
+        for line in self.lines:
+            rects.append(self.text.draw(target, line, (x, y), self.size, (255, 255, 255), outline=(0, 0, 0)))
+            y += self.size
+        return rects
+
+    def _lines(self):
+        rows = self.recorder.recent(self.window)
+        if len(rows) < 2:
+            return []
+        span = rows[-1, COLUMN["time"]] - rows[0, COLUMN["time"]]
+        fps = (len(rows) - 1) / span if span > 0 else 0.0
+        frame = rows[:, COLUMN["frame"]] - rows[:, COLUMN["wait"]]
+        mean = lambda name: columnMean(rows, name)
+        return [f"FPS {fps:.1f}  work {np.nanmean(frame):.1f} ms (p95 {np.nanpercentile(frame, 95):.1f})",
+                f"capture {mean('capture'):.1f}  inference {mean('inference'):.1f} ms",
+                f"physics {mean('physics'):.1f}  update {mean('update'):.1f}  draw {mean('draw'):.1f} ms",
+                f"fruits {rows[-1, COLUMN['fruits']]:.0f}  confidence {rows[-1, COLUMN['confidence']]:.2f}"]
+
+
+# Stand-in when the overlay is off, so the game loop can call it unconditionally
+class NullOverlay:
+    def draw(self, target):
+        return []
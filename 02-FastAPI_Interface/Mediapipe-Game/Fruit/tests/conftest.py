@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The game modules are flat files in the Fruit folder, imported by name
+FRUIT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, FRUIT_DIR)
+
+# No window or sound card needed
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
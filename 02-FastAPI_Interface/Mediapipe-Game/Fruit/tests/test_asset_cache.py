@@ -0,0 +1,88 @@
+import threading
+
+import pygame
+import pytest
+
+from asset_cache import AssetCache
+
+
+@pytest.fixture(scope="module", autouse=True)
+def display():
+    # convert_alpha() needs a display mode
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    yield
+    pygame.display.quit()
+
+
+@pytest.fixture
+def sheets(tmp_path):
+    paths = []
+    for i in range(4):
+        path = str(tmp_path / f"fruit{i}.png")
+        pygame.image.save(pygame.Surface((40, 20), pygame.SRCALPHA), path)
+        paths.append(path)
+    return paths
+
+
+SHEET_BYTES = 40 * 20 * 4
+
+
+def test_frames_are_shared_and_split(sheets):
+    cache = AssetCache()
+    frames = cache.getFrames(sheets[0], 1, grid=(2, 4), animationFrames=6)
+    assert len(frames) == 6
+    assert frames[0].get_size() == (10, 10)
+    # Scales quantize to the same entry
+    assert cache.getFrames(sheets[0], 1.02, grid=(2, 4), animationFrames=6) is frames
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_is_evicted(sheets):
+    cache = AssetCache(maxBytes=3 * SHEET_BYTES)
+    for path in sheets[:3]:
+        cache.getFrames(path)
+    cache.getFrames(sheets[0])  # now the most recently used
+    cache.getFrames(sheets[3])
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] == 3 * SHEET_BYTES <= cache.maxBytes
+    keys = [key[1] for key in cache.entries]
+    assert keys == [sheets[2], sheets[0], sheets[3]]
+
+
+def test_bytes_stay_under_the_limit(sheets):
+    cache = AssetCache(maxBytes=2 * SHEET_BYTES + 1)
+    for _ in range(3):
+        for path in sheets:
+            cache.getFrames(path)
+            assert cache.bytesUsed <= cache.maxBytes
+    assert cache.stats()["entries"] == 2
+    assert cache.bytesUsed == sum(size for _, size in cache.entries.values())
+
+
+def test_oversize_entry_is_kept(sheets):
+    cache = AssetCache(maxBytes=SHEET_BYTES // 2)
+    cache.getFrames(sheets[0])
+    frames = cache.getFrames(sheets[1])
+    assert list(cache.entries) == [("frames", sheets[1], 1, (2, 4), 8)]
+    assert cache.getFrames(sheets[1]) is frames
+    assert cache.evictions == 1
+
+
+def test_missing_file():
+    with pytest.raises(FileNotFoundError):
+        AssetCache().getFrames("no_such_fruit.png")
+
+
+def test_clear_waits_for_a_load_in_progress(sheets):
+    cache = AssetCache()
+    cache.getFrames(sheets[0])
+    with cache.lock:  # held by a preload thread storing a sheet
+        cleared = threading.Thread(target=cache.clear)
+        cleared.start()
+        cleared.join(0.1)
+        assert cleared.is_alive()
+        assert cache.stats()["entries"] == 1
+    cleared.join()
+    assert cache.stats()["entries"] == 0 and cache.bytesUsed == 0
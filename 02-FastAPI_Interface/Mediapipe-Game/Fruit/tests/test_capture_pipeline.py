@@ -0,0 +1,35 @@
+import pytest
+
+from capture_pipeline import InferenceScheduler
+
+FRAME = 1 / 60
+
+
+def pattern(scheduler, frames):
+    return [scheduler.shouldInfer(i * FRAME) for i in range(frames)]
+
+
+def test_every_frame_by_default():
+    assert pattern(InferenceScheduler(), 5) == [True] * 5
+
+
+def test_fixed_decimation():
+    scheduler = InferenceScheduler(every=3)
+    assert scheduler.decimating
+    assert pattern(scheduler, 7) == [True, False, False, True, False, False, True]
+
+
+def test_quality_floor_raises_the_interval():
+    scheduler = InferenceScheduler(every=2)
+    scheduler.qualityEvery = 4
+    assert pattern(scheduler, 5) == [True, False, False, False, True]
+    assert scheduler.currentEvery == 4
+
+
+@pytest.mark.parametrize("inference, expected", [(0.004, 1), (0.02, 3), (1.0, 8)])
+def test_budget_follows_inference_time(inference, expected):
+    scheduler = InferenceScheduler(budget=0.5, maxEvery=8)
+    scheduler.shouldInfer(0.0)
+    scheduler.record(inference)
+    scheduler.shouldInfer(FRAME)
+    assert scheduler.currentEvery == expected
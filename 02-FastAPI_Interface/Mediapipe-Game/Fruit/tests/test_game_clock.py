@@ -0,0 +1,100 @@
+import pymunk
+import pytest
+
+from array_physics import ArraySpace, makeBody, makeCircle
+from game_clock import PhysicsClock, SimulatedClock
+
+DT = 1 / 60
+
+
+def fallingSpace(space):
+    space.gravity = 0, -900
+    body = makeBody(space, 1, 1)
+    makeCircle(body, 10)
+    body.position = 100, 500
+    body.velocity = 50, 200
+    space.add(body)
+    return body
+
+
+@pytest.fixture(params=["pymunk", "array"])
+def space(request):
+    return pymunk.Space() if request.param == "pymunk" else ArraySpace()
+
+
+def test_accumulator_keeps_remainder(space):
+    clock = PhysicsClock(space, DT, 0.0)
+    assert clock.update(2.5 * DT) == 2
+    assert clock.alpha == pytest.approx(0.5)
+    # The remaining half step completes with the next half
+    assert clock.update(3 * DT) == 1
+    assert clock.alpha == pytest.approx(0.0, abs=1e-6)
+    assert clock.steps == 3
+
+
+def test_exact_steps_do_not_drift(space):
+    clock = PhysicsClock(space, DT, 0.0)
+    sim = SimulatedClock(defaultFps=60)
+    for _ in range(600):
+        sim.tick()
+        assert clock.update(sim.now()) == 1
+
+
+def test_max_steps_drops_time(space):
+    clock = PhysicsClock(space, DT, 0.0, maxSteps=5)
+    assert clock.update(20 * DT) == 5
+    assert clock.droppedTime == pytest.approx(15 * DT)
+    assert clock.accumulator < DT
+    assert clock.update(21 * DT) == 1
+
+
+def test_reset_forgets_paused_time(space):
+    clock = PhysicsClock(space, DT, 0.0)
+    clock.update(DT)
+    clock.reset(100.0)
+    assert clock.update(100.0 + DT) == 1
+    assert clock.droppedTime == 0.0
+
+
+def test_position_interpolates_between_steps(space):
+    body = fallingSpace(space)
+    clock = PhysicsClock(space, DT, 0.0)
+    start = tuple(body.position)
+    clock.update(DT)
+    before = tuple(body.position)
+    clock.update(2.25 * DT)
+    after = tuple(body.position)
+    drawn = clock.position(body)
+    for axis in range(2):
+        assert drawn[axis] == pytest.approx(before[axis] + (after[axis] - before[axis]) * 0.25)
+    assert before != start
+    # A placed body is drawn where it is
+    body.position = 300, 300
+    clock.forget(body)
+    assert tuple(clock.position(body)) == pytest.approx((300, 300))
+
+
+def test_snapshot_matches_position(space):
+    bodies = [fallingSpace(space) for _ in range(3)]
+    for i, body in enumerate(bodies):
+        body.position = 100 + 50 * i, 400
+    clock = PhysicsClock(space, DT, 0.0)
+    clock.update(1.6 * DT)
+    snapshot = clock.snapshot()
+    for body in bodies:
+        assert tuple(snapshot.position(body)) == pytest.approx(tuple(body.position))
+        assert tuple(snapshot.drawPosition(body)) == pytest.approx(tuple(clock.position(body)))
+    # A body added after the snapshot is read from the space
+    late = fallingSpace(space)
+    assert tuple(snapshot.position(late)) == pytest.approx((100, 500))
+
+
+def test_array_space_follows_pymunk():
+    reference, array = pymunk.Space(), ArraySpace()
+    a, b = fallingSpace(reference), fallingSpace(array)
+    clocks = PhysicsClock(reference, DT, 0.0), PhysicsClock(array, DT, 0.0)
+    for frame in range(1, 120):
+        for clock in clocks:
+            clock.update(frame / 45)
+        assert tuple(b.position) == pytest.approx(tuple(a.position), abs=1e-6)
+        assert tuple(clocks[1].position(b)) == pytest.approx(tuple(clocks[0].position(a)), abs=1e-6)
@@ -0,0 +1,126 @@
+import random
+
+import pymunk
+import pytest
+
+from array_physics import ArraySpace, makeBody, makeCircle
+from hit_test import DistanceIndex, LandmarkTrail, makeHitIndex, pathDistance, pathHitsBox, segmentHitsBox
+
+BOX = (10, 10, 20, 20)
+
+
+@pytest.mark.parametrize("a, b, hits", [
+    ((0, 15), (30, 15), True),  # straight through
+    ((0, 0), (30, 30), True),  # diagonal through the corners
+    ((15, 15), (40, 40), True),  # starts inside
+    ((0, 5), (30, 5), False),  # passes below
+    ((0, 0), (5, 5), False),  # stops short
+    ((25, 0), (25, 30), False),  # vertical, beside the box
+    ((15, 0), (15, 30), True),  # vertical, through the box
+    ((0, 30), (30, 25), False),  # passes above
+])
+def test_segment_hits_box(a, b, hits):
+    assert segmentHitsBox(a, b, BOX) is hits
+    assert segmentHitsBox(b, a, BOX) is hits
+
+
+def test_point_path_is_strictly_inside():
+    assert pathHitsBox([(15, 15)], BOX)
+    assert not pathHitsBox([(10, 15)], BOX)  # on the edge
+    assert not pathHitsBox([(25, 15)], BOX)
+
+
+def test_swept_path_hits_box_jumped_over():
+    # Two points on either side: the point test misses, the sweep does not
+    path = [(0, 15), (30, 15)]
+    assert not any(pathHitsBox([point], BOX) for point in path)
+    assert pathHitsBox(path, BOX)
+    assert not pathHitsBox([(0, 0), (5, 0), (5, 5)], BOX)
+
+
+def test_path_distance():
+    assert pathDistance([(0, 0)], (3, 4)) == pytest.approx(5)
+    # Perpendicular to the segment, and beyond either end
+    assert pathDistance([(0, 0), (10, 0)], (5, 3)) == pytest.approx(3)
+    assert pathDistance([(0, 0), (10, 0)], (13, 4)) == pytest.approx(5)
+    assert pathDistance([(0, 0), (10, 0)], (-3, -4)) == pytest.approx(5)
+    # Nearest of several segments, and a zero-length one
+    assert pathDistance([(0, 0), (10, 0), (10, 10)], (12, 5)) == pytest.approx(2)
+    assert pathDistance([(2, 2), (2, 2)], (2, 5)) == pytest.approx(3)
+
+
+def test_trail_breaks_when_landmark_is_lost():
+    trail = LandmarkTrail(length=2)
+    trail.push((0, 0))
+    trail.push((1, 1))
+    trail.push((2, 2))
+    assert trail.path() == [(1, 1), (2, 2)]
+    trail.push(None)
+    assert trail.path() == []
+    trail.push((5, 5))
+    assert trail.path() == [(5, 5)]
+
+
+PATHS = [[(300, 200)], [(100, 100), (500, 300)], [(50, 400), (400, 50), (700, 500)]]
+
+
+def scatteredSpace(count=200, seed=1):
+    rng = random.Random(seed)
+    space = pymunk.Space()
+    for _ in range(count):
+        body = pymunk.Body(1, 1)
+        body.position = rng.uniform(0, 800), rng.uniform(0, 600)
+        space.add(body, pymunk.Circle(body, 30))
+    return space
+
+
+@pytest.mark.parametrize("kind", ["grid", "pymunk", "brute"])
+@pytest.mark.parametrize("path", PATHS)
+def test_index_finds_every_body_in_reach(kind, path):
+    space = scatteredSpace()
+    index = makeHitIndex(kind, space)
+    index.update()
+    reach = 80
+    expected = {body for body in space.bodies if pathDistance(path, body.position) <= reach}
+    assert expected
+    assert index.nearby(path, reach) >= expected
+    assert index.nearby([], reach) == set()
+
+
+def test_grid_only_returns_bodies_near_the_path():
+    space = scatteredSpace()
+    index = makeHitIndex("grid", space)
+    index.update()
+    found = index.nearby([(300, 200)], 50)
+    assert found and len(found) < len(space.bodies)
+    # The broad phase stays inside the path's box grown by the reach
+    assert all(abs(body.position.x - 300) <= 50 and abs(body.position.y - 200) <= 50 for body in found)
+
+
+@pytest.mark.parametrize("kind", ["grid", "pymunk", "brute", "distance"])
+def test_index_maps_screen_to_space(kind):
+    space = pymunk.Space()
+    body = pymunk.Body(1, 1)
+    body.position = 100, 500  # y-up space
+    space.add(body, pymunk.Circle(body, 30))
+    index = makeHitIndex(kind, space, toSpace=lambda point: (point[0], 600 - point[1]))
+    index.update()
+    assert index.nearby([(100, 100)], 1) == {body}
+    if kind != "brute":
+        assert index.nearby([(100, 500)], 1) == set()
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_distance_index_is_exact_on_array_space(path):
+    rng = random.Random(1)
+    space = ArraySpace()
+    for _ in range(200):
+        body = makeBody(space, 1, 1)
+        makeCircle(body, 30)
+        body.position = rng.uniform(0, 800), rng.uniform(0, 600)
+        space.add(body)
+    reach = 80
+    expected = {body for body in space.bodies if pathDistance(path, body.position) <= reach}
+    assert expected
+    assert DistanceIndex(space).nearby(path, reach) == expected
+    assert DistanceIndex(space).nearby([], reach) == set()
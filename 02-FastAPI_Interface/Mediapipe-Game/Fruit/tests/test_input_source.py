@@ -0,0 +1,60 @@
+import cv2
+import pytest
+
+from game_clock import SimulatedClock
+from input_source import LandmarkTraceSource, loadTrace, saveTrace
+
+TIMES = [0.0, 0.1, 0.2, 0.3]
+FRAMES = [{"nose": (0.1, 0.2, 0.9)}, {"nose": (0.2, 0.3, 0.9)}, {}, {"nose": (0.4, 0.5, 0.8), "left_eye": (0.3, 0.4, 1.0)}]
+
+
+@pytest.mark.parametrize("suffix", [".npz", ".json"])
+def test_trace_round_trips(tmp_path, suffix):
+    path = str(tmp_path / f"trace{suffix}")
+    saveTrace(path, TIMES, FRAMES)
+    times, frames = loadTrace(path)
+    assert list(times) == TIMES
+    # Undetected landmarks stay missing, NaN rows in the NPZ form
+    assert frames == FRAMES
+
+
+def test_trace_source_follows_the_clock(tmp_path):
+    path = str(tmp_path / "trace.npz")
+    saveTrace(path, TIMES, FRAMES)
+    clock = SimulatedClock()
+    source = LandmarkTraceSource(path, size=(64, 48), timeSource=clock.now)
+    assert source.isOpened()
+    success, img = source.read()
+    assert success and img.shape == (48, 64, 3)
+    assert source.lastLandmarks == FRAMES[0]
+    clock.time = 0.25
+    source.read()
+    assert source.lastLandmarks == {}  # latest sample at or before 0.25
+    clock.time = 0.5
+    assert source.read() == (False, None)
+
+
+def test_looped_trace_wraps(tmp_path):
+    path = str(tmp_path / "trace.json")
+    saveTrace(path, TIMES, FRAMES)
+    clock = SimulatedClock()
+    source = LandmarkTraceSource(path, timeSource=clock.now, loop=True)
+    source.read()
+    clock.time = 0.35
+    assert source.read()[0]
+    assert source.lastLandmarks == FRAMES[0]
+
+
+def test_trace_frames_take_the_requested_size(tmp_path):
+    path = str(tmp_path / "trace.json")
+    saveTrace(path, TIMES, FRAMES)
+    source = LandmarkTraceSource(path, timeSource=lambda: 0.0)
+    source.set(cv2.CAP_PROP_FRAME_WIDTH, 320)
+    source.set(cv2.CAP_PROP_FRAME_HEIGHT, 240)
+    assert source.get(cv2.CAP_PROP_FRAME_WIDTH) == 320
+    assert source.read()[1].shape == (240, 320, 3)
+
+
+def test_missing_trace():
+    with pytest.raises(FileNotFoundError):
+        LandmarkTraceSource("no_such_trace.npz")
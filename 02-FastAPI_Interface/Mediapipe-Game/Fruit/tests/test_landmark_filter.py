@@ -0,0 +1,102 @@
+from types import SimpleNamespace
+
+import pytest
+
+from landmark_filter import LandmarkFilter, OneEuroFilter, SmoothingConfig, extrapolationOnly
+
+
+def packet(landmarks, sampleTime):
+    return SimpleNamespace(landmarks=landmarks, sampleTime=sampleTime)
+
+
+def test_first_sample_passes_through():
+    f = OneEuroFilter(1.5, 10.0, 1.0)
+    assert f.update(0.0, (0.3, 0.7)) == (0.3, 0.7)
+
+
+def test_still_landmark_stays_put():
+    f = OneEuroFilter(1.5, 10.0, 1.0)
+    for i in range(30):
+        value = f.update(i / 30, (0.4, 0.6))
+    assert value == pytest.approx((0.4, 0.6))
+    assert f.velocity == pytest.approx((0.0, 0.0))
+
+
+def test_step_is_smoothed_and_converges():
+    f = OneEuroFilter(1.5, 0.0, 1.0)
+    f.update(0.0, (0.0, 0.0))
+    first = f.update(1 / 30, (1.0, 0.0))
+    assert 0.0 < first[0] < 1.0  # lags behind the jump
+    for i in range(2, 90):
+        value = f.update(i / 30, (1.0, 0.0))
+    assert value[0] == pytest.approx(1.0, abs=1e-3)
+
+
+def test_faster_motion_lags_less_with_beta():
+    samples = [(i / 30, (i * 0.05, 0.0)) for i in range(10)]
+    slow, fast = OneEuroFilter(1.0, 0.0, 1.0), OneEuroFilter(1.0, 10.0, 1.0)
+    for t, point in samples:
+        lagging, following = slow.update(t, point), fast.update(t, point)
+    assert following[0] > lagging[0]
+
+
+def test_repeated_timestamp_keeps_value():
+    f = OneEuroFilter(1.5, 10.0, 1.0)
+    f.update(1.0, (0.5, 0.5))
+    assert f.update(1.0, (0.9, 0.9)) == (0.5, 0.5)
+    assert f.update(0.5, (0.9, 0.9)) == (0.5, 0.5)
+
+
+def test_without_config_landmarks_pass_through():
+    landmarks = {"nose": (0.2, 0.3, 0.9)}
+    assert LandmarkFilter().apply(packet(landmarks, 0.0), 1.0) is landmarks
+    assert LandmarkFilter().apply(None, 1.0) == {}
+
+
+def test_prediction_lead_is_capped():
+    lf = LandmarkFilter(SmoothingConfig(predict=True, maxLead=0.1))
+    lf.apply(packet({"nose": (0.0, 0.5, 1.0)}, 0.0), 0.0)
+    landmarks = {"nose": (0.1, 0.5, 1.0)}
+    measured = lf.apply(packet(landmarks, 0.1), 0.1)
+    assert lf.lead == 0.0
+    ahead = lf.apply(packet(landmarks, 0.1), 0.15)
+    assert lf.lead == pytest.approx(0.05)
+    assert ahead["nose"][0] > measured["nose"][0]  # moved on along the velocity
+    lf.apply(packet(landmarks, 0.1), 5.0)
+    assert lf.lead == pytest.approx(0.1)
+
+
+def test_no_prediction_keeps_lead_zero():
+    lf = LandmarkFilter(SmoothingConfig(predict=False))
+    lf.apply(packet({"nose": (0.5, 0.5, 1.0)}, 0.0), 0.5)
+    assert lf.lead == 0.0
+
+
+def test_lost_landmark_starts_fresh():
+    lf = LandmarkFilter(SmoothingConfig())
+    lf.apply(packet({"nose": (0.0, 0.0, 1.0)}, 0.0), 0.0)
+    lf.apply(packet({}, 0.1), 0.1)
+    assert "nose" not in lf.filters
+    assert lf.apply(packet({"nose": (0.8, 0.8, 1.0)}, 0.2), 0.2)["nose"] == pytest.approx((0.8, 0.8, 1.0))
+
+
+def test_extrapolation_follows_the_velocity():
+    lf = LandmarkFilter(extrapolationOnly(maxLead=0.1))
+    lf.apply(packet({"nose": (0.0, 0.5, 1.0)}, 0.0), 0.0)
+    lf.apply(packet({"nose": (0.1, 0.5, 1.0)}, 0.1), 0.1)  # 1 width per second
+    assert lf.apply(packet(lf.measured, 0.1), 0.15)["nose"][0] == pytest.approx(0.15)
+    assert lf.lead == pytest.approx(0.05)
+    # Far past the last measurement the extrapolation stops at maxLead
+    assert lf.apply(packet(lf.measured, 0.1), 5.0)["nose"][0] == pytest.approx(0.2)
+    assert lf.lead == pytest.approx(0.1)
+
+
+def test_decimated_frames_are_not_new_measurements():
+    lf = LandmarkFilter(SmoothingConfig(minCutoff=1.0, beta=0.0))
+    lf.apply(packet({"nose": (0.0, 0.0, 1.0)}, 0.0), 0.0)
+    landmarks = {"nose": (1.0, 0.0, 1.0)}
+    once = lf.apply(packet(landmarks, 0.1), 0.1)
+    # Same object again: the filter is not fed a second time
+    again = lf.apply(packet(landmarks, 0.1), 0.2)
+    assert again["nose"] == pytest.approx(once["nose"])
+    assert lf.filters["nose"].time == 0.1
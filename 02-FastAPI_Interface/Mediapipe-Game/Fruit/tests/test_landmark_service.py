@@ -0,0 +1,134 @@
+import os
+import sys
+from multiprocessing import resource_tracker
+
+import cv2
+import numpy as np
+import pytest
+
+from capture_pipeline import CapturePipeline, mirrorLandmarks
+from fruit_catcher import siapkan_frame, siapkan_landmark
+from landmark_service import SharedRing
+
+
+@pytest.fixture
+def ring():
+    ring = SharedRing.create(f"fruit_test_{os.getpid()}", (2, 3), np.float64, slots=4)
+    yield ring
+    ring.close()
+
+
+def write(ring, value):
+    item, meta = ring.begin()
+    item[:] = value
+    meta[0] = value
+    return ring.commit()
+
+
+def test_empty_ring(ring):
+    assert ring.latest() == (0, None, None)
+    assert ring.get(0) is None
+
+
+def test_latest_is_newest_committed(ring):
+    write(ring, 1)
+    seq = write(ring, 2)
+    latest, item, meta = ring.latest()
+    assert latest == seq == 2
+    assert (item == 2).all() and meta[0] == 2
+
+
+def test_item_being_written_is_not_visible(ring):
+    write(ring, 1)
+    item, _ = ring.begin()
+    item[:] = 7
+    seq, item, _ = ring.latest()
+    assert seq == 1 and (item == 1).all()
+    assert ring.get(2) is None and not ring.valid(2)
+    assert ring.commit() == 2
+    assert ring.latest()[0] == 2
+
+
+def test_overwritten_item_is_invalid(ring):
+    seq = write(ring, 1)
+    item, _ = ring.get(seq)
+    assert ring.valid(seq)
+    for value in range(2, 6):
+        write(ring, value)
+    # Slot 1 now holds item 5: the old views show it, and say so
+    assert ring.get(seq) is None
+    assert not ring.valid(seq)
+    assert (item == 5).all()
+    # An item stops being valid as soon as its slot is being rewritten
+    assert ring.valid(2)
+    ring.begin()
+    assert not ring.valid(2) and ring.get(2) is None
+
+
+def test_reader_shares_items_read_only(ring):
+    write(ring, 3)
+    reader = SharedRing.attach(ring.memory.name)
+    if sys.version_info < (3, 13):
+        # attach() unregistered the segment from this process's resource tracker,
+        # which here is also the owner's: register it again for the owner's unlink
+        resource_tracker.register(ring.memory._name, "shared_memory")
+    try:
+        assert reader.shape == (2, 3) and reader.slots == 4
+        seq, item, meta = reader.latest()
+        assert seq == 1 and (item == 3).all() and meta[0] == 3
+        with pytest.raises(ValueError):
+            item[0, 0] = 0
+        write(ring, 4)
+        assert reader.latest()[0] == 2
+    finally:
+        reader.close()
+
+
+# Stands in for LandmarkServiceSource: a raw camera frame with a white dot where
+# the landmark is, and the landmark in that frame's coordinates
+class FakeServiceSource:
+    cameraLandmarks = True
+
+    def __init__(self, size, point):
+        width, height = size
+        self.frame = np.zeros((height, width, 3), dtype=np.uint8)
+        cv2.circle(self.frame, (int(point[0] * width), int(point[1] * height)), 3, (255, 255, 255), -1)
+        self.frame.flags.writeable = False  # like the shared-memory views
+        self.lastLandmarks = {"nose": (*point, 0.9)}
+
+    def read(self):
+        return True, self.frame
+
+
+def landmarkAndDot(source, prepare, prepareLandmarks):
+    packet = CapturePipeline(source, None, prepare=prepare, prepareLandmarks=prepareLandmarks,
+                             threaded=False).latest()
+    height, width = packet.image.shape[:2]
+    ys, xs = np.nonzero(packet.image[:, :, 0] > 128)
+    x, y, visibility = packet.landmarks["nose"]
+    assert visibility == 0.9
+    return (x * width, y * height), (xs.mean(), ys.mean())
+
+
+@pytest.mark.parametrize("prepare, prepareLandmarks, size", [
+    (lambda img: cv2.flip(img, 1), mirrorLandmarks, (320, 240)),  # Nose Fruit
+    (siapkan_frame, siapkan_landmark, (320, 240)),  # Fruit Catcher
+    (siapkan_frame, siapkan_landmark, (240, 320)),  # Fruit Catcher, portrait camera
+])
+def test_service_landmarks_follow_the_prepared_frame(prepare, prepareLandmarks, size):
+    landmark, dot = landmarkAndDot(FakeServiceSource(size, (0.2, 0.3)), prepare, prepareLandmarks)
+    # Within a few pixels (the dot's radius, scaled by the resize)
+    assert landmark == pytest.approx(dot, abs=12)
+
+
+def test_recorded_landmarks_are_not_moved():
+    source = FakeServiceSource((320, 240), (0.2, 0.3))
+    source.cameraLandmarks = False  # a trace: already in the game's coordinates
+    packet = CapturePipeline(source, None, prepare=lambda img: cv2.flip(img, 1), prepareLandmarks=mirrorLandmarks,
+                             threaded=False).latest()
+    assert packet.landmarks == {"nose": (0.2, 0.3, 0.9)}
+
+
+def test_geometry_changing_game_without_landmark_mapping_is_refused():
+    with pytest.raises(ValueError):
+        CapturePipeline(FakeServiceSource((320, 240), (0.5, 0.5)), None, prepare=lambda img: cv2.flip(img, 1))
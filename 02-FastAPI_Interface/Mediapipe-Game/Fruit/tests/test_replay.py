@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from input_source import saveTrace
+from options import GameOptions
+from replay import REPLAYED_RESULT, SessionRecording, compareResults
+
+FRUIT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(FRUIT_DIR, "benchmarks"))
+from synthetic import mouthTrace, noseTrace, wristTrace  # noqa: E402
+
+RESULT = {"game": "nose_fruit", "score": 4, "lives": 3, "players": None, "duration": 12.5, "frames": 300,
+          "spawned": 9, "sliced": 4, "bombs": 1, "missed": 2, "frameMsMean": 12.0, "frameMsP95": 20.0,
+          "startup": {"firstPlayableFrame": 0.8}}
+
+
+def test_identical_results():
+    assert compareResults(RESULT, dict(RESULT)) == []
+
+
+@pytest.mark.parametrize("key", REPLAYED_RESULT)
+def test_replayed_key_differs(key):
+    replayed = dict(RESULT, **{key: "other"})
+    assert compareResults(RESULT, replayed) == [f"{key} other != {RESULT[key]}"]
+
+
+def test_timing_is_not_compared():
+    # Frame times and startup depend on the machine, not on the session
+    replayed = dict(RESULT, frameMsMean=30.0, frameMsP95=50.0, startup={"firstPlayableFrame": 3.0})
+    assert compareResults(RESULT, replayed) == []
+
+
+def test_replay_takes_gameplay_options_from_the_recording(tmp_path):
+    path = str(tmp_path / "session.npz")
+    SessionRecording({"seed": 1, "exitOnGameOver": True, "hitIndex": "grid", "poolPrewarm": 0,
+                      "hitTrail": 4}).save(path)
+    options = GameOptions(replay=path, hitIndex="brute", poolPrewarm=40, hitTrail=2)
+    assert (options.hitIndex, options.poolPrewarm, options.hitTrail) == ("grid", 0, 4)
+    assert options.seed == 1
+
+
+@pytest.mark.parametrize("game, trace", [("nose_fruit.py", noseTrace), ("fruit_eater.py", mouthTrace),
+                                         ("fruit_catcher.py", wristTrace)])
+def test_record_then_replay(tmp_path, game, trace):
+    tracePath, recording = str(tmp_path / "trace.npz"), str(tmp_path / "session.npz")
+    saveTrace(tracePath, *trace(duration=10))
+
+    def run(*args):
+        done = subprocess.run([sys.executable, *args], cwd=FRUIT_DIR, capture_output=True, text=True, timeout=300)
+        assert done.returncode == 0, done.stdout + done.stderr
+        return done.stdout
+
+    run(game, "--trace", tracePath, "--headless", "--max-frames", "90", "--seed", "1", "--record", recording)
+    assert os.path.isfile(recording)
+    assert "Replay: identical to the recording" in run("replay.py", recording)
@@ -0,0 +1,20 @@
+import os
+
+from session_result import readResult, writeResult
+
+
+def test_result_round_trips(tmp_path):
+    path = str(tmp_path / "result.json")
+    result = {"game": "fruit_catcher", "score": 7, "lives": None, "players": [{"player": "P1", "score": 7}],
+              "frameMsMean": None, "startup": {"imports": 0.4}}
+    writeResult(path, result)
+    assert readResult(path) == result
+    assert os.listdir(tmp_path) == ["result.json"]  # no .tmp left behind
+
+
+def test_result_is_replaced(tmp_path):
+    path = str(tmp_path / "result.json")
+    writeResult(path, {"score": 1})
+    writeResult(path, {"score": 2})
+    assert readResult(path) == {"score": 2}
+    assert os.listdir(tmp_path) == ["result.json"]
@@ -0,0 +1,66 @@
+import numpy as np
+
+from trackers import RoiConfig, RoiTracker, SharedTracker
+
+
+# Stands in for PoseTracker: finds its one landmark at the middle of whatever
+# image it gets, and remembers the shapes it was given
+class FakeTracker:
+    def __init__(self, static=False):
+        self.landmarks = {"nose": 0}
+        self.roiIndices = None
+        self.lastPoints = None
+        self.staticMode = static
+        self.static = None
+        self.shapes = []
+        self.closed = False
+
+    def staticTwin(self):
+        if self.static is None:
+            self.static = FakeTracker(static=True)
+        return self.static
+
+    def process(self, imgRGB):
+        self.shapes.append(imgRGB.shape[:2])
+        self.lastPoints = np.array([[0.5, 0.5]])
+        return {"nose": (0.5, 0.5, 1.0)}
+
+    def close(self):
+        self.closed = True
+
+
+def test_crops_go_to_the_static_twin():
+    video = FakeTracker()
+    roi = RoiTracker(video, RoiConfig(padding=0.1, minSize=0.2))
+    frame = np.zeros((100, 200, 3), dtype=np.uint8)
+    for _ in range(3):
+        landmarks = roi.process(frame)
+    # The first frame finds the player on the full frame, later ones only crop
+    assert video.shapes == [(100, 200)]
+    assert roi.cropTracker.staticMode and len(roi.cropTracker.shapes) == 2
+    assert all(shape != (100, 200) for shape in roi.cropTracker.shapes)
+    assert roi.stats() == {"roiRuns": 2, "fullFrameRuns": 1, "lost": 0}
+    # Crop coordinates come back in full-frame coordinates
+    assert landmarks["nose"][:2] == (0.5, 0.5)
+    assert roi.lastPoints.tolist() == [[0.5, 0.5]]
+    assert video.lastPoints.tolist() == [[0.5, 0.5]]  # the video graph's own result is untouched
+
+
+def test_lost_player_goes_back_to_the_video_graph():
+    video = FakeTracker()
+    roi = RoiTracker(video, RoiConfig(maxMisses=0))
+    frame = np.zeros((100, 200, 3), dtype=np.uint8)
+    roi.process(frame)
+    roi.cropTracker.process = lambda imgRGB: {}
+    roi.process(frame)
+    assert roi.stats() == {"roiRuns": 1, "fullFrameRuns": 2, "lost": 1}
+    assert video.shapes == [(100, 200), (100, 200)]
+
+
+def test_host_keeps_one_static_twin():
+    hostTracker = FakeTracker()
+    first = RoiTracker(SharedTracker(hostTracker))
+    second = RoiTracker(SharedTracker(hostTracker))
+    assert first.cropTracker is second.cropTracker is hostTracker.static
+    first.close()
+    assert not hostTracker.closed
@@ -0,0 +1,259 @@
+import numpy as np
+
+
+# Landmark trackers turn an RGB frame into {name: (x, y, visibility)} with
+# x/y normalized to [0, 1], so the games do not depend on MediaPipe result types.
+# `lastPoints` keeps every landmark of the last detection (N x 2, normalized) and
+# `roiIndices` says which of them outline the region worth tracking.
+# MediaPipe is imported when a tracker is built: games reading landmarks from
+# landmark_service.py (or a trace) never load it. cv2 too is imported where used.
+class PoseTracker:
+    def __init__(self, landmarks, roiIndices=None, **poseOptions):
+        import mediapipe as mp
+        self.landmarks = landmarks  # name -> pose landmark index
+        self.roiIndices = roiIndices
+        self.poseOptions = poseOptions
+        self.pose = mp.solutions.pose.Pose(**poseOptions)
+        self.lastPoints = None
+        self.static = None  # see staticTwin()
+
+    def detect(self, imgRGB):
+        # Every landmark of the detection as an N x 3 array (x, y, visibility), None when nobody is found
+        results = self.pose.process(imgRGB)
+        if not results.pose_landmarks:
+            return None
+        return np.array([(point.x, point.y, point.visibility) for point in results.pose_landmarks.landmark])
+
+    def process(self, imgRGB):
+        return selectLandmarks(self, self.detect(imgRGB))
+
+    def staticTwin(self):
+        # Same landmarks and settings in static image mode, built once and kept
+        if self.static is None:
+            self.static = PoseTracker(self.landmarks, self.roiIndices,
+                                      **dict(self.poseOptions, static_image_mode=True))
+        return self.static
+
+    def setModelComplexity(self, complexity):
+        if self.static is not None:
+            self.static.setModelComplexity(complexity)
+        # MediaPipe fixes the model at construction, so switching means a new graph
+        if self.poseOptions.get("model_complexity", 1) == complexity:
+            return
+        import mediapipe as mp
+        self.pose.close()
+        self.poseOptions["model_complexity"] = complexity
+        self.pose = mp.solutions.pose.Pose(**self.poseOptions)
+
+    def close(self):
+        self.pose.close()
+        if self.static is not None:
+            self.static.close()
+
+
+class FaceMeshTracker:
+    def __init__(self, landmarks, roiIndices=None, **faceMeshOptions):
+        import mediapipe as mp
+        self.landmarks = landmarks  # name -> face mesh landmark index
+        self.roiIndices = roiIndices
+        self.faceMeshOptions = faceMeshOptions
+        self.faceMesh = mp.solutions.face_mesh.FaceMesh(**faceMeshOptions)
+        self.lastPoints = None
+        self.static = None
+
+    def detect(self, imgRGB):
+        results = self.faceMesh.process(imgRGB)
+        if not results.multi_face_landmarks:
+            return None
+        # Face mesh has no per-landmark visibility, a detected face counts as fully visible
+        return np.array([(point.x, point.y, 1.0) for point in results.multi_face_landmarks[0].landmark])
+
+    def process(self, imgRGB):
+        return selectLandmarks(self, self.detect(imgRGB))
+
+    def staticTwin(self):
+        if self.static is None:
+            self.static = FaceMeshTracker(self.landmarks, self.roiIndices,
+                                          **dict(self.faceMeshOptions, static_image_mode=True))
+        return self.static
+
+    def close(self):
+        self.faceMesh.close()
+        if self.static is not None:
+            self.static.close()
+
+
+def selectLandmarks(tracker, points):
+    # detect() result -> the tracker's named landmarks, keeping all points for the ROI
+    if points is None:
+        tracker.lastPoints = None
+        return {}
+    tracker.lastPoints = points[:, :2]
+    return {name: tuple(points[index].tolist()) for name, index in tracker.landmarks.items()}
+
+
+# Crop/scale policy for RoiTracker. Sizes are fractions of the frame.
+class RoiConfig:
+    def __init__(self, padding=0.35, minSize=0.3, scale=1.0, maxSide=None, fullFrameScale=1.0, maxMisses=1):
+        self.padding = padding  # added on every side, relative to the larger box side
+        self.minSize = minSize  # smallest box side before padding
+        self.scale = scale  # resize factor applied to the crop before inference
+        self.maxSide = maxSide  # optional cap in pixels on the longer side of the inference input
+        self.fullFrameScale = fullFrameScale  # resize factor for full-frame (re)detection
+        self.maxMisses = maxMisses  # empty ROI results tolerated before falling back to full frame
+
+
+# Runs the wrapped tracker on a padded box around the last detection, at a
+# reduced resolution, and falls back to full-frame detection when it loses the
+# player. Landmarks are mapped back to full-frame coordinates, so the games do
+# not notice the difference.
+#
+# The box follows the player, so every crop has a new origin and size. A
+# video-mode MediaPipe graph carries its tracking region from one call to the
+# next in the previous input's coordinates, which is wrong for the next crop,
+# so crops go to the tracker's static image mode twin and the video-mode graph
+# only ever sees full frames. The price is latency: static mode runs the
+# person/face detector on every crop instead of tracking, so a crop costs
+# more than a tracked frame of the same size. In exchange each result depends
+# on the current crop alone, and re-acquisition after a miss starts clean.
+class RoiTracker:
+    def __init__(self, tracker, config=None):
+        self.tracker = tracker
+        self.cropTracker = tracker.staticTwin()
+        self.config = config or RoiConfig()
+        self.box = None  # (x0, y0, x1, y1) in pixels
+        self.points = None  # lastPoints of the last run, in full-frame coordinates
+        self.misses = 0
+        self.roiRuns = 0
+        self.fullFrameRuns = 0
+        self.lostCount = 0
+
+    @property
+    def lastPoints(self):
+        return self.points
+
+    def setModelComplexity(self, complexity):
+        if hasattr(self.tracker, "setModelComplexity"):
+            self.tracker.setModelComplexity(complexity)
+
+    def process(self, imgRGB):
+        h, w = imgRGB.shape[:2]
+        landmarks = {}
+        if self.box is not None:
+            self.roiRuns += 1
+            landmarks = self._run(self.cropTracker, imgRGB, self.box, self.config.scale)
+            if not landmarks:
+                self.misses += 1
+                if self.misses > self.config.maxMisses:
+                    self.box = None
+                    self.lostCount += 1
+                else:
+                    return landmarks
+        if self.box is None:
+            self.fullFrameRuns += 1
+            landmarks = self._run(self.tracker, imgRGB, (0, 0, w, h), self.config.fullFrameScale)
+        if landmarks:
+            self.misses = 0
+            self.box = self._boxAround(self.points, w, h)
+        return landmarks
+
+    def _run(self, tracker, imgRGB, box, scale):
+        h, w = imgRGB.shape[:2]
+        x0, y0, x1, y1 = box
+        crop = imgRGB[y0:y1, x0:x1]
+        factor = scale
+        if self.config.maxSide:
+            factor = min(factor, self.config.maxSide / max(crop.shape[:2]))
+        if factor != 1:
+            import cv2
+            crop = cv2.resize(crop, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+        landmarks = tracker.process(np.ascontiguousarray(crop))
+        self.points = None
+        if not landmarks:
+            return landmarks
+
+        # Crop-normalized -> frame-normalized (scaling does not change normalized coordinates)
+        cropW, cropH = x1 - x0, y1 - y0
+        if tracker.lastPoints is not None:
+            self.points = (tracker.lastPoints * (cropW, cropH) + (x0, y0)) / (w, h)
+        return {name: ((x0 + x * cropW) / w, (y0 + y * cropH) / h, visibility)
+                for name, (x, y, visibility) in landmarks.items()}
+
+    def _boxAround(self, points, w, h):
+        if points is None:
+            return None
+        if self.tracker.roiIndices is not None:
+            points = points[list(self.tracker.roiIndices)]
+        xMin, yMin = points.min(axis=0) * (w, h)
+        xMax, yMax = points.max(axis=0) * (w, h)
+        boxW = max(xMax - xMin, self.config.minSize * w)
+        boxH = max(yMax - yMin, self.config.minSize * h)
+        pad = self.config.padding * max(boxW, boxH)
+        cx, cy = (xMin + xMax) / 2, (yMin + yMax) / 2
+        x0 = int(max(0, cx - boxW / 2 - pad))
+        y0 = int(max(0, cy - boxH / 2 - pad))
+        x1 = int(min(w, cx + boxW / 2 + pad))
+        y1 = int(min(h, cy + boxH / 2 + pad))
+        if x1 - x0 < 16 or y1 - y0 < 16:
+            return None
+        return x0, y0, x1, y1
+
+    def stats(self):
+        return {"roiRuns": self.roiRuns, "fullFrameRuns": self.fullFrameRuns, "lost": self.lostCount}
+
+    def close(self):
+        self.tracker.close()  # closes the static twin too
+
+
+# A tracker the game host keeps loaded between games. Reads and writes go to
+# the wrapped tracker, close() keeps the MediaPipe graph (and its static
+# twin, built by the first --roi game) open for the next game.
+class SharedTracker:
+    def __init__(self, tracker):
+        object.__setattr__(self, "tracker", tracker)
+
+    def __getattr__(self, name):
+        return getattr(self.tracker, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.tracker, name, value)
+
+    def close(self):
+        pass
+
+
+def withRoi(tracker, roi):
+    return RoiTracker(tracker, roi) if roi is not None else tracker
+
+
+# Landmarks each game reads, by model (mp.solutions.pose.PoseLandmark values / face mesh index)
+NOSE = {"nose": 0}
+LIPS = {"upper_lip": 13, "lower_lip": 14}
+WRISTS = {"right_wrist": 16, "left_wrist": 15}
+
+
+def noseTracker(roi=None):
+    # Face and shoulders (pose landmarks 0-12) frame the nose region
+    return withRoi(PoseTracker(NOSE,
+                               roiIndices=range(0, 13),
+                               min_detection_confidence=0.5,
+                               min_tracking_confidence=0.5,
+                               model_complexity=1), roi)
+
+
+def mouthTracker(roi=None):
+    # The whole face mesh frames the lips, the face detector needs the full face
+    return withRoi(FaceMeshTracker(LIPS,
+                                   max_num_faces=1, refine_landmarks=True, min_detection_confidence=0.7), roi)
+
+
+def wristTracker(roi=None):
+    # Upper body (pose landmarks 0-24) keeps both arms inside the crop
+    return withRoi(PoseTracker(WRISTS, roiIndices=range(0, 25)), roi)
+
+
+# What landmark_service.py publishes for each tracker: the model and the landmarks
+# the game reads from it. The pose settings of noseTracker are MediaPipe's
+# defaults, which wristTracker uses, so one pose model serves both.
+SERVICE_LANDMARKS = {noseTracker: ("pose", NOSE), mouthTracker: ("face", LIPS), wristTracker: ("pose", WRISTS)}
+SERVICE_MODELS = {"pose": noseTracker, "face": mouthTracker}